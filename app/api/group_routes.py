@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.group_schema import Group, Participant
+from app.database import get_db, get_async_db
+from app.models.group_schema import Group
+from app.repositories import GroupRepository
 from pydantic import BaseModel
 import uuid
+from datetime import datetime
 from typing import List, Optional
 from app.config import settings
 
@@ -45,10 +48,21 @@ class GroupResponse(GroupCreate):
     class Config:
         from_attributes = True
 
+class InviteStatus(BaseModel):
+    participant_id: Optional[str] = None
+    to_email: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # --- Endpoints ---
 
 @router.post("/groups", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
-def create_group(group_in: GroupCreate, db: Session = Depends(get_db)):
+async def create_group(group_in: GroupCreate, db: AsyncSession = Depends(get_async_db)):
     # Generate UUID
     new_id = str(uuid.uuid4())
     
@@ -61,75 +75,71 @@ def create_group(group_in: GroupCreate, db: Session = Depends(get_db)):
         travel_month=group_in.travel_month,
         duration=group_in.duration,
         group_size=group_in.group_size,
-        status="collecting"
+        status="collecting",
+        participants=[] # Loaded collection, so the response never lazy-loads
     )
     db.add(db_group)
-    db.commit()
-    db.refresh(db_group)
+    await db.commit()
     return db_group
 
 @router.post("/groups/{group_id}/participants", status_code=status.HTTP_201_CREATED)
-def add_participant(group_id: str, participant_in: ParticipantCreate, db: Session = Depends(get_db)):
+async def add_participant(group_id: str, participant_in: ParticipantCreate, db: AsyncSession = Depends(get_async_db)):
     import traceback
     try:
         print(f"DEBUG: Adding participant to {group_id}")
-        # Verify group exists
-        group = db.query(Group).filter(Group.id == group_id).first()
-        if not group:
+        # Verify group exists (only its name is needed, for the invite)
+        group_name = await db.scalar(GroupRepository.name(group_id))
+        if group_name is None:
             print("DEBUG: Group not found")
             raise HTTPException(status_code=404, detail="Group not found")
-        print(f"DEBUG: Group found: {group.name}")
-        
-        # Check duplicate email in group
-        existing = db.query(Participant).filter(
-            Participant.group_id == group_id, 
-            Participant.email == participant_in.email
-        ).first()
-        
-        if existing:
-            return {"message": "Participant already exists", "participant_id": existing.id}
+        print(f"DEBUG: Group found: {group_name}")
 
         new_p_id = str(uuid.uuid4())
         
-        # dynamic_link = f"{settings.GOOGLE_FORM_LINK}&entry.12345={group_id}" 
-        # For now, just sending the raw link or appending ID if we knew the field ID
-        # Let's assume user just sends the main link, and we rely on manual grouping for MVP 
-        # OR we append ?gid={group_id} just in case they added hidden fields
-        
-        final_link = f"{settings.GOOGLE_FORM_LINK}&entry.123456789={group_id}" # Example field ID, replace if known
+        # Prefill the hidden group-id question so sheet sync can route the response
+        # to this group without relying on the email alone
+        final_link = settings.GOOGLE_FORM_LINK
+        if settings.GOOGLE_FORM_GROUP_FIELD:
+            final_link = f"{settings.GOOGLE_FORM_LINK}&{settings.GOOGLE_FORM_GROUP_FIELD}={group_id}"
         
-        new_participant = Participant(
+        # Duplicate check and insert in one statement, backed by the unique (group_id, email) index
+        result = await db.execute(GroupRepository.insert_participant(
+            db.bind.dialect.name,
             id=new_p_id,
             group_id=group_id,
             name=participant_in.name,
             email=participant_in.email,
-            survey_link=settings.GOOGLE_FORM_LINK, 
+            survey_link=final_link,
+        ))
+        if result.rowcount == 0:
+            existing_id = await db.scalar(GroupRepository.existing_participant_id(group_id, participant_in.email))
+            await db.rollback()
+            return {"message": "Participant already exists", "participant_id": existing_id}
+
+        # Invite goes to the outbox in the same transaction; the outbox worker sends it
+        from app.services.email_service import EmailService
+        invite = EmailService.enqueue_invite(
+            db,
+            to_email=participant_in.email,
+            group_name=group_name,
+            survey_link=final_link,
+            participant_id=new_p_id,
         )
-        print("DEBUG: Object created, adding to DB session")
-        db.add(new_participant)
         
-        db.commit()
+        await db.commit()
         print("DEBUG: Commit successful")
-        
-        # Trigger Email Invite
-        invite_res = {"status": "skipped"}
-        try:
-            from app.services.email_service import EmailService
-            # In a real app, use BackgroundTasks for this
-            sent = EmailService.send_invite(
-                to_email=new_participant.email, 
-                group_name=group.name, 
-                survey_link=new_participant.survey_link
-            )
-            invite_res = {"status": "sent" if sent else "failed"}
-        except Exception as e:
-            print(f"EMAIL ERROR: {e}")
-            invite_res = {"status": "failed", "error": str(e)}
+
+        from app.recommender.result_cache import ranking_cache
+        ranking_cache.invalidate(group_id)
+
+        from app.services.email_outbox import notify_outbox
+        notify_outbox()
+        invite_res = {"status": "queued", "outbox_id": invite.id}
         
         return {
             "message": "Participant added", 
             "participant_id": new_p_id, 
-            "link": new_participant.survey_link, 
+            "link": final_link, 
             "invite_status": invite_res
         }
     except HTTPException:
@@ -137,26 +147,45 @@ def add_participant(group_id: str, participant_in: ParticipantCreate, db: Sessio
     except Exception as e:
         print("CRITICAL ERROR IN ADD_PARTICIPANT:")
         traceback.print_exc()
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Server Crash: {str(e)}")
 
 @router.get("/groups/{group_id}", response_model=GroupResponse)
-def get_group(group_id: str, db: Session = Depends(get_db)):
-    group = db.query(Group).filter(Group.id == group_id).first()
+async def get_group(group_id: str, db: AsyncSession = Depends(get_async_db)):
+    group = await db.scalar(GroupRepository.with_participants(group_id))
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
     return group
 
+@router.get("/groups/{group_id}/invites", response_model=List[InviteStatus])
+async def get_invites(group_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Delivery status of the group's invite emails, as written back by the outbox worker."""
+    return (await db.scalars(GroupRepository.invites(group_id))).all()
+
 # Phase 5: Hybrid Recommendation Endpoint
+# Ranking is CPU-bound numpy/sklearn work on a sync Session, so it stays a
+# threadpool route rather than blocking the event loop
 @router.post("/groups/{group_id}/recommendations")
-def recommend_for_group(group_id: str, db: Session = Depends(get_db)):
+def recommend_for_group(
+    group_id: str,
+    pregenerate: Optional[int] = Query(None, ge=0, le=10, description="Itineraries to generate in the background for the top results"),
+    db: Session = Depends(get_db),
+):
     from app.services.recommendation import RecommendationService
-    from app.models.place import Place
+    from app.recommender.result_cache import ranking_cache, ranking_fingerprint, catalog_stamp
+    from fastapi.encoders import jsonable_encoder
     import json
     
-    group = db.query(Group).filter(Group.id == group_id).first()
+    group = db.scalar(GroupRepository.for_ranking(group_id))
     if not group:
         raise HTTPException(status_code=404, detail="Group not found")
+
+    # Serve the last ranking if none of its inputs changed
+    fingerprint = ranking_fingerprint(group, catalog_stamp(db))
+    cached = ranking_cache.get(group_id, fingerprint)
+    if cached is not None:
+        pregenerate_itineraries(group, cached, pregenerate)
+        return cached
         
     # 1. Aggregate Preferences
     # Combine all participant preferences into one big text blob for TF-IDF
@@ -189,10 +218,30 @@ def recommend_for_group(group_id: str, db: Session = Depends(get_db)):
         "start_city": group.start_city,
         "combined_text": combined_query
     }
-    ranked_places = service.rank_places(candidates, group_prefs=group_prefs)
-    
     # Return top 5
-    return ranked_places[:5]
+    ranked_places = jsonable_encoder(service.rank_places(candidates, group_prefs=group_prefs, limit=5))
+    
+    ttl = None if service.weather_complete else settings.RANKING_CACHE_PARTIAL_TTL_SECONDS
+    ranking_cache.put(group_id, fingerprint, ranked_places, ttl_seconds=ttl)
+    pregenerate_itineraries(group, ranked_places, pregenerate)
+    return ranked_places
+
+def pregenerate_itineraries(group, ranked_places: list, top_n: Optional[int]):
+    # Users nearly always open one of the top results; start those plans now
+    top_n = settings.ITINERARY_PREGENERATE_TOP_N if top_n is None else top_n
+    if top_n <= 0 or not ranked_places:
+        return
+    from app.services.pregeneration import get_pregeneration_queue
+    try:
+        get_pregeneration_queue().submit(group, ranked_places, top_n)
+    except Exception as e:
+        print(f"WARNING: Could not queue itinerary pre-generation: {e}")
+
+@router.get("/groups/{group_id}/itinerary/jobs")
+def get_itinerary_jobs(group_id: str):
+    """Background itinerary jobs for the group (latest first)."""
+    from app.services.pregeneration import get_pregeneration_queue
+    return list(reversed(get_pregeneration_queue().jobs(group_id)))
 
 @router.post("/groups/{group_id}/itinerary")
 def generate_trip_plan(group_id: str, payload: dict, db: Session = Depends(get_db)):
@@ -201,17 +250,11 @@ def generate_trip_plan(group_id: str, payload: dict, db: Session = Depends(get_d
     """
     from app.services.itinerary_service import ItineraryService
     
-    group = db.query(Group).filter(Group.id == group_id).first()
+    group = db.scalar(GroupRepository.for_itinerary(group_id))
     if not group:
          raise HTTPException(status_code=404, detail="Group not found")
          
-    # Aggregate preferences again or pass from frontend? 
-    # Let's simple-aggregate here
-    aggr_prefs = []
-    for p in group.participants:
-        if p.preferences:
-            aggr_prefs.append(str(p.preferences))
-    context = " ".join(aggr_prefs)
+    context = ItineraryService.group_context(group)
     
     destination = payload.get("destination")
     weather = payload.get("weather_summary", "Not available")
@@ -220,7 +263,30 @@ def generate_trip_plan(group_id: str, payload: dict, db: Session = Depends(get_d
         destination_name=destination,
         duration=group.duration,
         group_context=context,
-        weather_summary=weather
+        weather_summary=weather,
+        participant_preferences=ItineraryService.group_preferences(group)
     )
     
     return plan
+
+@router.post("/groups/{group_id}/itinerary/stream")
+async def stream_trip_plan(group_id: str, payload: dict, db: AsyncSession = Depends(get_async_db)):
+    """
+    Same plan as POST /groups/{group_id}/itinerary, as Server-Sent Events:
+    "meta" ({title, summary}) and one "day" per daily_plan entry as soon as
+    it's generated, then "done" with the complete plan.
+    """
+    from app.api.sse import sse_response
+    from app.services.itinerary_service import ItineraryService
+
+    group = await db.scalar(GroupRepository.for_itinerary(group_id))
+    if not group:
+        raise HTTPException(status_code=404, detail="Group not found")
+
+    return sse_response(ItineraryService.stream_itinerary(
+        destination_name=payload.get("destination"),
+        duration=group.duration,
+        group_context=ItineraryService.group_context(group),
+        weather_summary=payload.get("weather_summary", "Not available"),
+        participant_preferences=ItineraryService.group_preferences(group),
+    ))
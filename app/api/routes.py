@@ -1,42 +1,183 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.recommendation import RecommendationService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, SessionLocal
+from app.models.place import Place
+from app.services.recommendation import RecommendationService, RANK_COLUMNS
 from typing import List, Optional
 from pydantic import BaseModel
+import base64
+import json
+
+# Candidates ranked (or rows fetched) per batch when streaming
+STREAM_BATCH_SIZE = 2000
 
 router = APIRouter()
 
 class PlaceResponse(BaseModel):
+    id: int
     name: str
     state: Optional[str]
     description: Optional[str]
     url: Optional[str]
     min_budget: Optional[float]
+    best_time: Optional[str] = None
+    match_score: Optional[float] = None
 
     class Config:
         from_attributes = True
 
-@router.get("/recommendations", response_model=List[PlaceResponse])
-def get_recommendations(
+class RecommendationPage(BaseModel):
+    items: List[PlaceResponse]
+    next_cursor: Optional[str] = None
+
+# Columns needed for PlaceResponse in unranked mode
+LIST_COLUMNS = (Place.id, Place.name, Place.state, Place.description, Place.url, Place.min_budget, Place.best_time)
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def ndjson_line(data) -> str:
+    return json.dumps(jsonable_encoder(data)) + "\n"
+
+@router.get("/recommendations", response_model=RecommendationPage)
+async def get_recommendations(
     max_budget: Optional[float] = Query(None, description="Maximum budget per person"),
     preferred_states: Optional[List[str]] = Query(None, description="List of preferred states"),
     query: Optional[str] = Query(None, description="Free text query for similarity matching"),
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=100, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    stream: bool = Query(False, description="Stream results as NDJSON"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    service = RecommendationService(db)
+    """
+    Without `query`: places in id order, keyset-paginated on id.
+    With `query`: places ranked by rank_places, keyset-paginated on (score, id).
+    With `stream`: NDJSON lines ({"event": "place"} ... {"event": "end"}) are sent
+    as soon as each candidate batch is ranked. A streamed place can later be
+    pushed out of the top; the "order" in the "end" line is the final page.
+    Listing pages are read on the async session; ranking is CPU-bound and runs
+    in the threadpool on its own sync session.
+    """
+    after = decode_cursor(cursor) if cursor else None
     
-    # 1. Filter
-    candidates = service.filter_places(max_budget=max_budget, preferred_states=preferred_states)
+    # 1. Filter (budget and states are indexed SQL predicates)
+    filters = {
+        "max_budget": max_budget,
+        "preferred_states": preferred_states,
+        "columns": RANK_COLUMNS if query else LIST_COLUMNS,
+    }
     
     # 2. Rank (if query provided)
-    if query:
-        # For single user query mode, treating query as "group_preferences"
-        candidates = service.rank_places(candidates, group_preferences=query)
-        
-    return candidates
+    # For single user query mode, treating query as "group_preferences"
+    group_prefs = {"combined_text": query}
+    if not query:
+        if after and "id" not in after:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if stream:
+            return StreamingResponse(
+                stream_listing(filters, after["id"] if after else None, limit),
+                media_type="application/x-ndjson"
+            )
+        statement = RecommendationService.filter_statement(**filters)
+        if after:
+            statement = statement.where(Place.id > after["id"])
+        page = (await db.scalars(statement.limit(limit + 1))).all()
+        next_cursor = encode_cursor({"id": page[limit - 1].id}) if len(page) > limit else None
+        return {"items": page[:limit], "next_cursor": next_cursor}
+
+    if after and "score" not in after:
+        raise HTTPException(status_code=400, detail="Cursor is not from a ranked query")
+    if stream and not after:
+        return StreamingResponse(stream_ranked(filters, group_prefs, limit), media_type="application/x-ndjson")
+
+    ranked = await run_in_threadpool(
+        rank_page, filters, group_prefs, limit + 1, (after["score"], after["id"]) if after else None
+    )
+    next_cursor = None
+    if len(ranked) > limit:
+        last = ranked[limit - 1]
+        next_cursor = encode_cursor({"score": last.rank_score, "id": last.id})
+    items = ranked[:limit]
+    if stream:
+        return StreamingResponse(
+            iter([ndjson_line({"event": "place", "place": PlaceResponse.model_validate(p)}) for p in items]
+                 + [ndjson_line({"event": "end", "order": [p.id for p in items], "next_cursor": next_cursor})]),
+            media_type="application/x-ndjson"
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+def rank_page(filters: dict, group_prefs: dict, limit: int, after: Optional[tuple]):
+    db = SessionLocal()
+    try:
+        service = RecommendationService(db)
+        # Closing detaches the places; the columns they were loaded with stay readable
+        return service.rank_places(service.filter_query(**filters).all(), group_prefs=group_prefs,
+                                   limit=limit, after=after)
+    finally:
+        db.close()
+
+# Streaming generators run after the request's session is closed, so they open their own
+def stream_listing(filters: dict, after_id: Optional[int], limit: int):
+    db = SessionLocal()
+    try:
+        candidates = RecommendationService(db).filter_query(**filters)
+        if after_id is not None:
+            candidates = candidates.filter(Place.id > after_id)
+        last_id, count = None, 0
+        for place in candidates.limit(limit + 1).yield_per(STREAM_BATCH_SIZE):
+            if count == limit:
+                yield ndjson_line({"event": "end", "next_cursor": encode_cursor({"id": last_id})})
+                return
+            yield ndjson_line({"event": "place", "place": PlaceResponse.model_validate(place)})
+            last_id, count = place.id, count + 1
+        yield ndjson_line({"event": "end", "next_cursor": None})
+    finally:
+        db.close()
 
-from app.services.ai_itinerary import ItineraryService
+def stream_ranked(filters: dict, group_prefs: dict, limit: int):
+    db = SessionLocal()
+    try:
+        service = RecommendationService(db)
+        candidates = service.filter_query(**filters)
+        top = []
+        sent = set()
+        # The extra ranked row only decides the cursor; places are streamed from the first `limit`
+        for _, top in service.rank_in_batches(candidates, group_prefs, limit + 1, STREAM_BATCH_SIZE):
+            for place in top[:limit]:
+                if place.id not in sent:
+                    sent.add(place.id)
+                    yield ndjson_line({"event": "place", "place": PlaceResponse.model_validate(place)})
+        next_cursor = None
+        if len(top) > limit:
+            last = top[limit - 1]
+            next_cursor = encode_cursor({"score": last.rank_score, "id": last.id})
+        yield ndjson_line({"event": "end", "order": [p.id for p in top[:limit]], "next_cursor": next_cursor})
+    finally:
+        db.close()
+
+@router.get("/recommendations/cache")
+def recommendation_cache_stats():
+    from app.recommender.result_cache import ranking_cache
+    return ranking_cache.stats()
+
+@router.get("/itinerary/cache")
+def itinerary_cache_stats():
+    from app.services.itinerary_cache import itinerary_cache
+    return itinerary_cache.stats()
+
+@router.get("/itinerary/jobs")
+def itinerary_job_status():
+    from app.services.pregeneration import get_pregeneration_queue
+    return get_pregeneration_queue().status()
 
 class ItineraryRequest(BaseModel):
     place_name: str
@@ -45,6 +186,33 @@ class ItineraryRequest(BaseModel):
 
 @router.post("/itinerary")
 async def create_itinerary(request: ItineraryRequest):
+    from app.services.ai_itinerary import ItineraryService
+
     service = ItineraryService()
     itinerary = await service.generate_itinerary(request.place_name, request.duration, request.preferences)
     return {"itinerary": itinerary}
+
+@router.post("/itinerary/stream")
+async def stream_itinerary(request: ItineraryRequest):
+    """
+    Same itinerary as POST /itinerary, as Server-Sent Events: "chunk" events
+    with {"text"} while the model writes, then "done" with {"itinerary"} (or
+    "error" with {"detail"}).
+    """
+    from app.api.sse import sse_response
+    from app.services.ai_itinerary import ItineraryService
+
+    service = ItineraryService()
+
+    async def events():
+        parts = []
+        try:
+            async for chunk in service.stream_itinerary(request.place_name, request.duration, request.preferences):
+                parts.append(chunk)
+                yield "chunk", {"text": chunk}
+        except Exception as e:
+            yield "error", {"detail": f"Error generating itinerary: {str(e)}"}
+            return
+        yield "done", {"itinerary": "".join(parts)}
+
+    return sse_response(events())
@@ -0,0 +1,24 @@
+import json
+from typing import AsyncIterator, Tuple
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events: AsyncIterator[Tuple[str, object]]) -> StreamingResponse:
+    """
+    Streams (event, data) pairs as Server-Sent Events. Headers keep proxies
+    (nginx) from buffering the stream.
+    """
+    async def body():
+        async for event, data in events:
+            yield sse_event(event, data)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,12 +1,43 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import get_db
-from app.services.sheet_sync import SheetSyncService
+from app.models.group_schema import Participant
 
 router = APIRouter()
 
 @router.post("/sync/{group_id}")
-def sync_group_data(group_id: str, db: Session = Depends(get_db)):
+def sync_group_data(group_id: str, full: bool = False, db: Session = Depends(get_db)):
+    """
+    Applies new form responses to the group. `full` re-reads every response
+    instead of only those after the stored watermark. While the background
+    poller keeps the local copy fresh, the group's status is returned from it
+    without calling the Sheets API.
+    """
+    # Google API client and OAuth libraries load on first sync, not at boot
+    from app.services.sheet_sync import SheetSyncService
+
     service = SheetSyncService(db)
-    service.sync_responses(group_id)
-    return {"message": "Sync triggered"}
+    if settings.SHEETS_SYNC_INTERVAL_SECONDS > 0 and not full:
+        synced_at = service.last_synced()
+        if synced_at and (datetime.utcnow() - synced_at).total_seconds() <= settings.SHEETS_SYNC_MAX_AGE_SECONDS:
+            participants, responded = db.execute(
+                select(func.count(Participant.id), func.coalesce(func.sum(Participant.has_responded), 0))
+                .where(Participant.group_id == group_id)
+            ).one()
+            return {
+                "message": "Up to date",
+                "source": "local",
+                "synced_at": synced_at.isoformat(),
+                "participants": participants,
+                "responded": responded,
+            }
+
+    # With a group-id column one read of the sheet serves every group
+    if settings.SHEETS_GROUP_ID_COLUMN:
+        stats = service.sync_all(full=full)
+    else:
+        stats = service.sync_responses(group_id, full=full)
+    return {"message": "Sync complete" if "error" not in stats else stats["error"], **stats}
@@ -7,25 +7,100 @@ class Settings(BaseSettings):
     
     # Database (MySQL Support)
     DATABASE_URL: str = "sqlite:///./packvote.db" 
+    ASYNC_DATABASE_URL: Optional[str] = None # Defaults to DATABASE_URL with the async driver (aiosqlite/aiomysql/asyncpg)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800 # Below MySQL's default wait_timeout
+    DB_POOL_PRE_PING: bool = True
+    SQL_ECHO: bool = False
 
     # Google APIs (Forms/Sheets/Maps)
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
     GOOGLE_SERVICE_ACCOUNT_FILE: Optional[str] = None
     GOOGLE_MAPS_API_KEY: Optional[str] = None
+    SHEETS_SPREADSHEET_ID: str = "PLACEHOLDER_SHEET_ID" # Spreadsheet the Google Form writes responses to
+    SHEETS_RESPONSES_SHEET: str = "Form Responses 1"
+    SHEETS_GROUP_ID_COLUMN: Optional[str] = None # Sheet column (e.g. "H") of the prefilled group-id question; enables one-pass sync of all groups
+    SHEETS_SYNC_INTERVAL_SECONDS: float = 0 # 0 disables the background poller
+    SHEETS_SYNC_JITTER_SECONDS: float = 15 # Random extra delay per poll so workers don't hit the API in lockstep
+    SHEETS_SYNC_MAX_AGE_SECONDS: float = 120 # POST /sync/{group_id} answers from the local copy if the last poll is this recent
+    SHEETS_UNMATCHED_RETRY_DAYS: float = 7 # Responses matching no participant are retried on each sync for this long
+    GEOCODE_CACHE_PATH: str = "data/index/geocode_cache.json"
+    DISTANCE_CACHE_PATH: str = "data/index/distance_cache.sqlite"
+    DISTANCE_CACHE_TTL_SECONDS: float = 30 * 24 * 3600
+    DISTANCE_MAX_WORKERS: int = 8
+    DISTANCE_TIMEOUT_SECONDS: float = 10
+    DISTANCE_SCALE_KM: float = 1000.0 # Distance score decays to ~0.37 at this distance
+    DISTANCE_MAX_RADIUS_KM: Optional[float] = None # Drop candidates farther than this before ranking
     
     # OpenWeather / Open-Meteo
+    WEATHER_DEADLINE_SECONDS: float = 1.5 # Latency budget for weather enrichment while ranking
+    WEATHER_MAX_WORKERS: int = 16
+    WEATHER_BULK_CHUNK_SIZE: int = 50 # Locations per multi-coordinate archive request
+    CLIMATOLOGY_YEARS: int = 3 # Complete years averaged into each place's monthly climatology
+    CLIMATOLOGY_CHUNK_SIZE: int = 20
+    CLIMATOLOGY_MAX_AGE_DAYS: int = 180
+    CLIMATOLOGY_REFRESH_INTERVAL_HOURS: float = 0 # 0 disables the in-process refresher
+    WEATHER_CACHE_TTL_SECONDS: float = 6 * 3600 # Expired entries are served (and refreshed) for one more TTL, then dropped
+    WEATHER_CACHE_MAX_ENTRIES: int = 20000 # Least recently used locations are evicted beyond this
     
     # Email (SMTP)
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
     SMTP_USERNAME: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
+    SMTP_FROM: Optional[str] = None # Defaults to SMTP_USERNAME; required when SMTP_AUTH is off
+    SMTP_STARTTLS: bool = True
+    SMTP_AUTH: bool = True # False for a local relay or test server that takes mail without a login
+    SMTP_TIMEOUT_SECONDS: float = 10
+    SMTP_IDLE_SECONDS: float = 60 # Close the worker's connection after this long without mail
+    EMAIL_WORKER_ENABLED: bool = True # In-process outbox worker
+    EMAIL_POLL_SECONDS: float = 5
+    EMAIL_BATCH_SIZE: int = 50 # Outbox rows claimed per round
+    EMAIL_RATE_PER_SECOND: float = 5 # Sending limit per worker; Gmail allows a few per second
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BASE_SECONDS: float = 30 # Doubles per attempt
+    EMAIL_RETRY_MAX_SECONDS: float = 3600
+    EMAIL_LEASE_SECONDS: float = 300 # A claimed row is retried by another worker after this (worker crashed mid-batch)
     
     # Google Form
     GOOGLE_FORM_LINK: str = "https://docs.google.com/forms/d/e/1FAIpQLScJEkvkVUi-xT-Tk9PaQgjA-nKe4Te0urxSeQaFMYd8UJT8FA/viewform?usp=header" # Default fallback
+    GOOGLE_FORM_GROUP_FIELD: Optional[str] = "entry.123456789" # Prefill parameter of the hidden group-id question, replace if known
     
     # Gemini
     GEMINI_API_KEY: Optional[str] = None
+    GEMINI_MODEL_NAME: str = "gemini-pro"
+    GEMINI_MAX_CONCURRENCY: int = 4 # Generations in flight per worker; more requests queue
+    GEMINI_TIMEOUT_SECONDS: float = 90
+    ITINERARY_MODEL: str = "gemini" # "gemini" or "fake" (canned local model for tests and frontend work)
+    FAKE_MODEL_DELAY_SECONDS: float = 0.05 # Per streamed chunk of the fake model
+    ITINERARY_CACHE_PATH: str = "data/index/itinerary_cache.sqlite"
+    ITINERARY_CACHE_MAX_ENTRIES: int = 256 # In-memory tier; the SQLite tier is unbounded
+    ITINERARY_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    ITINERARY_CACHE_TEMP_BUCKET: float = 5 # Degrees C per weather bucket in the cache key
+    ITINERARY_PREGENERATE_TOP_N: int = 0 # Default for ?pregenerate on group recommendations; 0 = off
+    ITINERARY_PREGENERATE_WORKERS: int = 1 # Keep below GEMINI_MAX_CONCURRENCY so clicks always get a model slot
+    ITINERARY_PREGENERATE_GROUP_BUDGET: int = 6 # Speculative generations per group per window
+    ITINERARY_PREGENERATE_BUDGET_WINDOW_SECONDS: float = 24 * 3600
+    ITINERARY_PREGENERATE_HISTORY: int = 20 # Jobs kept per group for the status endpoints
+    ITINERARY_PREGENERATE_MAX_GROUPS: int = 1000
+
+    # Recommendation indexes
+    CATALOG_INDEX_PATH: str = "data/index/catalog_tfidf.joblib"
+    EMBEDDING_INDEX_PATH: str = "data/index/place_embeddings"
+    EMBEDDING_DIM: int = 256
+    RANKING_TEXT_MODEL: str = "tfidf" # "tfidf" or "embedding"
+    RANKING_CACHE_MAX_ENTRIES: int = 1024
+    RANKING_CACHE_TTL_SECONDS: float = 3600
+    RANKING_CACHE_PARTIAL_TTL_SECONDS: float = 30 # Rankings computed while weather was still loading
+
+    # Startup
+    WARMUP_ON_STARTUP: bool = True # Preload indexes and the ranking stack before serving
+    IMPORT_BUDGET_MS: float = 900 # Target for `import app.main`, checked by scripts/import_budget.py
+
+    # Observability
+    DEBUG_TIMING_HEADER: bool = False # Always send X-Debug-Timing, not only when the request asks for it
 
     class Config:
         env_file = ".env"
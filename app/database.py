@@ -1,14 +1,64 @@
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import create_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+# Sync URL scheme -> async driver for the same database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+def pool_options(url: str) -> dict:
+    # In-memory SQLite is a single static connection; nothing to size
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        return {}
+    options = {}
+    if url.startswith("sqlite+aiosqlite"):
+        # aiosqlite defaults to NullPool, i.e. a new connection and thread per request
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return {
+        **options,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+class DuplicateRowsError(RuntimeError):
+    """
+    A unique index can't be added because existing rows violate it. Raised at
+    startup instead of deleting data; scripts/remove_duplicates.py resolves it.
+    """
+
+engine = create_engine(settings.DATABASE_URL, echo=settings.SQL_ECHO, **pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for I/O-bound routes; same database, async driver
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=settings.SQL_ECHO, **pool_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
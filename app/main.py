@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router as api_router
 from app.api.group_routes import router as group_router
@@ -18,10 +20,102 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Per-route latency for /metrics. With an X-Debug-Timing request header (or
+    DEBUG_TIMING_HEADER enabled) the response carries the per-stage breakdown.
+    """
+    from app.config import settings
+    from app.metrics import observe_request, start_request_timings, timing_header
+
+    debug = settings.DEBUG_TIMING_HEADER or "x-debug-timing" in request.headers
+    timings = start_request_timings() if debug else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Route template, not the raw path, so ids don't explode label cardinality
+    route = request.scope.get("route")
+    observe_request(request.method, getattr(route, "path", "unmatched"), response.status_code, elapsed)
+    if timings is not None:
+        response.headers["X-Debug-Timing"] = timing_header(timings, elapsed)
+    return response
+
 app.include_router(api_router, prefix="/api/v1")
 app.include_router(group_router, prefix="/api/v1")
 app.include_router(sync_router, prefix="/api/v1")
 
+@app.on_event("startup")
+def ensure_schema():
+    # New tables are created here; databases created before a column or index
+    # was added don't get it from create_all, so those are added explicitly
+    from app.database import Base, DuplicateRowsError, engine
+    from app.repositories import ensure_group_indexes
+    from app.services.catalog_loader import ensure_place_columns
+    import app.models  # noqa: F401
+
+    try:
+        Base.metadata.create_all(bind=engine)
+        ensure_place_columns(engine)
+        ensure_group_indexes(engine)
+    except DuplicateRowsError:
+        # Refuse to start rather than run without the unique index (or delete rows)
+        raise
+    except Exception as e:
+        print(f"WARNING: Could not bring the schema up to date: {e}")
+
+@app.on_event("startup")
+def warm_up():
+    # Load (or build once) the indexes and import the ranking stack now, so the
+    # first recommendation request doesn't pay for it
+    from app.config import settings
+    from app.database import SessionLocal
+    from app.warmup import warm_up as run_warmup
+
+    if not settings.WARMUP_ON_STARTUP:
+        return
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        timings = run_warmup(db)
+    finally:
+        db.close()
+    print(f"Warmup finished in {(time.perf_counter() - start) * 1000:.0f} ms: {timings}")
+
+@app.on_event("startup")
+def start_background_jobs():
+    from app.config import settings
+
+    if settings.CLIMATOLOGY_REFRESH_INTERVAL_HOURS > 0:
+        from app.database import SessionLocal
+        from app.services.climatology import start_climatology_refresher
+        start_climatology_refresher(SessionLocal, settings.CLIMATOLOGY_REFRESH_INTERVAL_HOURS)
+
+    if settings.EMAIL_WORKER_ENABLED:
+        from app.database import SessionLocal
+        from app.services.email_outbox import start_outbox_worker
+        start_outbox_worker(SessionLocal, settings.EMAIL_POLL_SECONDS)
+
+    if settings.SHEETS_SYNC_INTERVAL_SECONDS > 0:
+        from app.database import SessionLocal
+        from app.services.sheet_sync import start_sheet_sync_scheduler
+        start_sheet_sync_scheduler(
+            SessionLocal, settings.SHEETS_SYNC_INTERVAL_SECONDS, settings.SHEETS_SYNC_JITTER_SECONDS
+        )
+
+@app.on_event("shutdown")
+async def close_connections():
+    from app.database import async_engine
+    await async_engine.dispose()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    from app.metrics import render_latest
+
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/")
 def root():
     return {"message": "PackVote backend running"}
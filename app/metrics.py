@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+REGISTRY = CollectorRegistry()
+
+STAGE_SECONDS = Histogram(
+    "packvote_rank_stage_seconds",
+    "Time spent in each stage of the recommendation pipeline.",
+    ["stage"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=REGISTRY,
+)
+CANDIDATES = Histogram(
+    "packvote_rank_candidates",
+    "Candidate places entering each stage of the recommendation pipeline.",
+    ["stage"],
+    buckets=(0, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000),
+    registry=REGISTRY,
+)
+REQUEST_SECONDS = Histogram(
+    "packvote_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry=REGISTRY,
+)
+ITINERARY_CACHE = Counter(
+    "packvote_itinerary_cache_lookups",
+    "Itinerary cache lookups by outcome (memory_hits, store_hits, coalesced, misses).",
+    ["result"],
+    registry=REGISTRY,
+)
+
+# Per-request stage breakdown (ms), only set while a debug timing header was asked for
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a pipeline stage into STAGE_SECONDS (and the current request's
+    breakdown if one is being collected).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed * 1000.0
+
+
+def observe_candidates(stage_name: str, count: int):
+    CANDIDATES.labels(stage_name).observe(count)
+
+
+def observe_itinerary_cache(result: str):
+    ITINERARY_CACHE.labels(result).inc()
+
+
+def start_request_timings() -> Dict[str, float]:
+    """
+    Starts collecting a stage breakdown for the current request. The dict is
+    shared with worker threads the request runs in, so it fills in place.
+    """
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def timing_header(timings: Dict[str, float], total_seconds: float) -> str:
+    """
+    X-Debug-Timing value: "total=12.3ms, filter=4.1ms, ...".
+    """
+    parts = [f"total={total_seconds * 1000.0:.1f}ms"]
+    parts += [f"{name}={ms:.1f}ms" for name, ms in timings.items()]
+    return ", ".join(parts)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float):
+    REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def render_latest():
+    """
+    (body, content type) for the Prometheus text exposition format.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
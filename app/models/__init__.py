@@ -1,2 +1,5 @@
 from .place import Place
 from .group_schema import Group, Participant
+from .sync_state import SheetSyncState, SheetSyncPending
+from .outbox import EmailOutbox
+from .catalog_state import CatalogVersion
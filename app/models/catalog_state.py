@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.database import Base
+
+class CatalogVersion(Base):
+    """
+    Single-row counter of changes to the places table, incremented in the same
+    transaction as each write, so rankings cached in any process can tell the
+    catalog changed even when rows were only updated in place.
+    """
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True) # Always 1
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
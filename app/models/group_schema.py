@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 import uuid
@@ -33,3 +33,6 @@ class Participant(Base):
     preferences = Column(JSON, nullable=True) 
 
     group = relationship("Group", back_populates="participants")
+
+# One participant per email in a group; also serves the duplicate check on insert
+PARTICIPANT_EMAIL_INDEX = Index("ux_participants_group_email", Participant.group_id, Participant.email, unique=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from app.database import Base
+
+class EmailOutbox(Base):
+    """
+    Email waiting to be delivered by the outbox worker. Rows are written in the
+    same transaction as whatever triggered them, so an email is never lost or
+    sent for a change that was rolled back.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    participant_id = Column(String, nullable=True, index=True)
+    to_email = Column(String(320), nullable=False)
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False) # HTML
+    status = Column(String(16), nullable=False, default="pending") # 'pending', 'sending', 'sent', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Also the lease expiry while 'sending'
+    claimed_by = Column(String(64), nullable=True) # Worker holding the row while 'sending'
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_email_outbox_due", "status", "next_attempt_at"),)
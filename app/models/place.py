@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, Text, JSON, DateTime, event
 from app.database import Base
+from app.recommender.season import parse_best_time
 
 class Place(Base):
     __tablename__ = "places"
@@ -8,13 +9,25 @@ class Place(Base):
     name = Column(String(255), index=True)
     state = Column(String(255), index=True)
     description = Column(Text)
-    url = Column(String(500))
+    url = Column(String(500), unique=True, index=True) # Natural key for catalog upserts
+    best_time = Column(String(255), nullable=True)
+    best_months = Column(Integer, nullable=True, index=True) # 12-bit mask parsed from best_time, bit 0 = January
     
     # For constraints/filtering
-    min_budget = Column(Float, nullable=True) 
+    min_budget = Column(Float, nullable=True, index=True)
     latitude = Column(Float, nullable=True)
     longitude = Column(Float, nullable=True)
     
     # For AI/Recommendation
     embedding = Column(JSON, nullable=True)
-    weather_cache = Column(JSON, nullable=True)
+    weather_cache = Column(JSON, nullable=True) # 12-month climatology, see ClimatologyService
+    weather_updated_at = Column(DateTime, nullable=True, index=True)
+
+    # Fingerprint of the record the catalog pipeline last loaded, see catalog_pipeline
+    content_hash = Column(String(32), nullable=True)
+
+
+@event.listens_for(Place.best_time, "set")
+def _set_best_months(target, value, oldvalue, initiator):
+    # Keep the month mask in sync whenever best_time is written through the ORM
+    target.best_months = parse_best_time(value)
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint
+from app.database import Base
+
+class SheetSyncState(Base):
+    """
+    High-watermark of a response sheet: the last sheet row already applied,
+    so the next sync only reads rows appended after it.
+    """
+    __tablename__ = "sheet_sync_state"
+
+    id = Column(Integer, primary_key=True)
+    spreadsheet_id = Column(String(255), nullable=False)
+    sheet_name = Column(String(255), nullable=False)
+    scope = Column(String(64), nullable=False) # Group id the rows were applied to
+    last_row = Column(Integer, nullable=False, default=1) # Row 1 is the header
+    last_timestamp = Column(String(64), nullable=True) # Timestamp cell of last_row, for reference
+    synced_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (UniqueConstraint("spreadsheet_id", "sheet_name", "scope", name="ux_sheet_sync_state"),)
+
+
+class SheetSyncPending(Base):
+    """
+    A response row the watermark has passed that matched no participant yet
+    (e.g. the form was answered before the organizer added that email). Kept
+    once per sheet (scope "all") and retried by the syncs until it matches or
+    SHEETS_UNMATCHED_RETRY_DAYS have passed.
+    """
+    __tablename__ = "sheet_sync_pending"
+
+    id = Column(Integer, primary_key=True)
+    spreadsheet_id = Column(String(255), nullable=False)
+    sheet_name = Column(String(255), nullable=False)
+    scope = Column(String(64), nullable=False)
+    sheet_row = Column(Integer, nullable=False)
+    row = Column(JSON, nullable=False) # Response values, column B onwards
+    first_seen = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("spreadsheet_id", "sheet_name", "scope", "sheet_row", name="ux_sheet_sync_pending"),
+    )
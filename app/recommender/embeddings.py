@@ -0,0 +1,274 @@
+import os
+import threading
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from app.config import settings
+from app.recommender.text_index import place_document
+
+# Quantization scale: unit vectors are stored as int8 in [-127, 127]
+QUANT_SCALE = 127.0
+# Rows converted to float per block while scanning, keeps query memory flat
+SEARCH_BLOCK_ROWS = 65536
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedder: word uni/bigrams and character n-grams are
+    feature-hashed into `dim` signed buckets and L2-normalised. Deterministic,
+    so vectors built offline match queries embedded at request time.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.version = f"hash-{self.dim}-v1"
+        self._words = HashingVectorizer(
+            n_features=self.dim, stop_words="english", ngram_range=(1, 2),
+            alternate_sign=True, norm=None
+        )
+        self._chars = HashingVectorizer(
+            n_features=self.dim, analyzer="char_wb", ngram_range=(3, 5),
+            alternate_sign=True, norm=None
+        )
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        float32 matrix (len(texts) x dim) of unit vectors; empty texts give zeros.
+        """
+        vectors = (self._words.transform(texts) + 0.5 * self._chars.transform(texts)).toarray()
+        vectors = vectors.astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def quantize(vectors: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(vectors * QUANT_SCALE), -127, 127).astype(np.int8)
+
+
+class EmbeddingIndex:
+    """
+    int8-quantized place embeddings in a memory-mapped .npy file
+    (one row per place, `dim` bytes each) plus an aligned id array.
+    Search is a blocked scan, so resident memory stays flat as the catalog grows.
+    Places added since the file was written (add_places) are held in memory
+    until the next build_embedding_index.
+    """
+
+    def __init__(self, vectors: Optional[np.ndarray] = None, place_ids: Optional[np.ndarray] = None,
+                 embedder: Optional[HashingEmbedder] = None):
+        self.embedder = embedder or HashingEmbedder()
+        self.vectors = vectors if vectors is not None else np.zeros((0, self.embedder.dim), dtype=np.int8)
+        self.place_ids = place_ids if place_ids is not None else np.zeros(0, dtype=np.int64)
+        self._added = np.zeros((0, self.embedder.dim), dtype=np.int8) # Rows after those in `vectors`
+        self._rows = {pid: i for i, pid in enumerate(self.place_ids.tolist())}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.place_ids)
+
+    def __contains__(self, place_id: int) -> bool:
+        return place_id in self._rows
+
+    def _blocks(self) -> Iterator[Tuple[int, np.ndarray]]:
+        # (first row, int8 block) over the file rows, then the in-memory ones
+        for start in range(0, len(self.vectors), SEARCH_BLOCK_ROWS):
+            yield start, self.vectors[start:start + SEARCH_BLOCK_ROWS]
+        if len(self._added):
+            yield len(self.vectors), self._added
+
+    def _take(self, rows: np.ndarray) -> np.ndarray:
+        block = np.empty((len(rows), self.embedder.dim), dtype=np.float32)
+        on_disk = rows < len(self.vectors)
+        block[on_disk] = self.vectors[rows[on_disk]]
+        block[~on_disk] = self._added[rows[~on_disk] - len(self.vectors)]
+        return block
+
+    def add_places(self, places: Iterable) -> int:
+        """
+        Embeds places that are not indexed yet and keeps them in memory.
+        Returns the number of places added.
+        """
+        with self._lock:
+            new_places = [p for p in places if p.id not in self._rows]
+            if not new_places:
+                return 0
+            vectors = quantize(self.embedder.embed([place_document(p) for p in new_places]))
+            self._added = np.concatenate([self._added, vectors])
+            self.place_ids = np.concatenate([self.place_ids, np.asarray([p.id for p in new_places], dtype=np.int64)])
+            self._rows = {pid: i for i, pid in enumerate(self.place_ids.tolist())}
+            return len(new_places)
+
+    @staticmethod
+    def _paths(path: str) -> Tuple[str, str]:
+        return f"{path}.npy", f"{path}.ids.npy"
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "EmbeddingIndex":
+        vectors_path, ids_path = cls._paths(path or settings.EMBEDDING_INDEX_PATH)
+        vectors = np.load(vectors_path, mmap_mode="r")
+        place_ids = np.load(ids_path)
+        return cls(vectors, place_ids, HashingEmbedder(vectors.shape[1]))
+
+    @classmethod
+    def write(cls, places: Iterable, path: Optional[str] = None, existing: Optional["EmbeddingIndex"] = None,
+              batch_size: int = 10000) -> "EmbeddingIndex":
+        """
+        Writes a new index file: rows of `existing` (if any) followed by the
+        embeddings of `places`, then atomically swaps it in. `places` may be a
+        lazy iterable; new rows are spilled to disk batch by batch, so only
+        the ids are held in memory.
+        """
+        path = path or settings.EMBEDDING_INDEX_PATH
+        vectors_path, ids_path = cls._paths(path)
+        os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+
+        embedder = existing.embedder if existing is not None else HashingEmbedder()
+        n_old = len(existing) if existing is not None else 0
+        new_ids: List[np.ndarray] = []
+        n_new = 0
+
+        def embed(batch: List) -> int:
+            batch = [p for p in batch if existing is None or p.id not in existing]
+            if batch:
+                spill.write(quantize(embedder.embed([place_document(p) for p in batch])).tobytes())
+                new_ids.append(np.asarray([p.id for p in batch], dtype=np.int64))
+            return len(batch)
+
+        tmp_new = f"{vectors_path}.new.tmp"
+        with open(tmp_new, "wb") as spill:
+            batch = []
+            for place in places:
+                batch.append(place)
+                if len(batch) >= batch_size:
+                    n_new += embed(batch)
+                    batch = []
+            n_new += embed(batch)
+
+        n = n_old + n_new
+        tmp_vectors = f"{vectors_path}.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=np.int8, shape=(n, embedder.dim))
+        ids = np.empty(n, dtype=np.int64)
+        if n_old:
+            for start, block in existing._blocks():
+                out[start:start + len(block)] = block
+            ids[:n_old] = existing.place_ids
+        if n_new:
+            spilled = np.memmap(tmp_new, dtype=np.int8, mode="r", shape=(n_new, embedder.dim))
+            for start in range(0, n_new, SEARCH_BLOCK_ROWS):
+                out[n_old + start:n_old + start + SEARCH_BLOCK_ROWS] = spilled[start:start + SEARCH_BLOCK_ROWS]
+            ids[n_old:] = np.concatenate(new_ids)
+            del spilled
+        out.flush()
+        del out
+        os.remove(tmp_new)
+
+        tmp_ids = f"{ids_path}.tmp.npy"
+        np.save(tmp_ids, ids)
+        os.replace(tmp_vectors, vectors_path)
+        os.replace(tmp_ids, ids_path)
+        return cls.load(path)
+
+    def _query(self, query: str) -> Optional[np.ndarray]:
+        if not query:
+            return None
+        q = self.embedder.embed([query])[0]
+        return q if q.any() else None
+
+    def search(self, query: str, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k places by cosine similarity: (place_ids, scores), best first.
+        """
+        q = self._query(query)
+        if q is None or len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        k = min(k, len(self))
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        with self._lock:
+            blocks = list(self._blocks())
+            place_ids = self.place_ids
+        for start, block in blocks:
+            scores = np.asarray(block, dtype=np.float32) @ q / QUANT_SCALE
+            rows = np.arange(start, start + len(block))
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                scores, rows = scores[top], rows[top]
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, rows])
+            if len(best_scores) > k:
+                top = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[top], best_rows[top]
+
+        order = np.argsort(-best_scores, kind="stable")
+        return place_ids[best_rows[order]], best_scores[order]
+
+    def similarity(self, query: str, place_ids: Sequence[int]) -> np.ndarray:
+        """
+        Cosine similarity between the query and the given places only.
+        Places missing from the index score 0.
+        """
+        scores = np.zeros(len(place_ids), dtype=np.float64)
+        q = self._query(query)
+        if q is None:
+            return scores
+
+        with self._lock:
+            rows = np.fromiter((self._rows.get(pid, -1) for pid in place_ids),
+                               dtype=np.int64, count=len(place_ids))
+            known = np.flatnonzero(rows >= 0)
+            block = self._take(rows[known]) if len(known) else None
+        if block is not None:
+            scores[known] = block @ q / QUANT_SCALE
+        return scores
+
+
+_index: Optional[EmbeddingIndex] = None
+_index_lock = threading.Lock()
+
+
+def build_embedding_index(db, rebuild: bool = False, path: Optional[str] = None) -> EmbeddingIndex:
+    """
+    Embeds places that are not in the index yet (every place if rebuild).
+    Only the indexed text columns are read, streamed from the database.
+    """
+    from app.models.place import Place
+
+    global _index
+    existing = None
+    if not rebuild:
+        try:
+            existing = EmbeddingIndex.load(path)
+        except (FileNotFoundError, ValueError):
+            existing = None
+
+    # Rows expose the columns as attributes like places do
+    places = db.query(Place.id, Place.name, Place.state, Place.best_time, Place.description) \
+        .order_by(Place.id).yield_per(10000)
+    index = EmbeddingIndex.write(places, path=path, existing=existing)
+
+    with _index_lock:
+        _index = index
+    print(f"Embedding index: {len(index)} places ({index.embedder.dim} bytes/place)")
+    return index
+
+
+def get_embedding_index() -> EmbeddingIndex:
+    """
+    Process-wide embedding index, memory-mapped from disk on first use.
+    Starts empty (places are then added as they are ranked) if none has
+    been built.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = EmbeddingIndex.load()
+                except (FileNotFoundError, ValueError) as e:
+                    print(f"Embedding index not available, starting empty: {e}")
+                    _index = EmbeddingIndex()
+    return _index
@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+WeatherKey = Tuple[float, float, int, int]
+
+
+class WeatherEnricher:
+    """
+    Concurrent, deadline-bounded weather lookups for ranking candidates.
+
+    Missing locations are packed into multi-location chunks that fan out over
+    a shared thread pool. Whatever finishes within the deadline is returned;
+    the rest keep running in the background and land in a bounded LRU cache
+    with a TTL, so the next request for the same places gets them for free.
+    Expired entries are still served while a refresh runs, for at most one
+    more TTL.
+    """
+
+    def __init__(self, fetch_bulk: Optional[Callable] = None,
+                 max_workers: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None,
+                 chunk_size: Optional[int] = None,
+                 retries: int = 1,
+                 max_entries: Optional[int] = None):
+        if fetch_bulk is None:
+            from app.services.weather_service import WeatherService
+            fetch_bulk = WeatherService.get_forecast_bulk
+        self.fetch_bulk = fetch_bulk
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.WEATHER_CACHE_TTL_SECONDS
+        self.chunk_size = chunk_size or settings.WEATHER_BULK_CHUNK_SIZE
+        self.retries = retries
+        self.max_entries = max_entries or settings.WEATHER_CACHE_MAX_ENTRIES
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.WEATHER_MAX_WORKERS,
+            thread_name_prefix="weather"
+        )
+        self._cache: "OrderedDict[WeatherKey, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[WeatherKey, Future] = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(latitude: float, longitude: float, year: int, month: int) -> WeatherKey:
+        return (round(latitude, 4), round(longitude, 4), year, month)
+
+    def _fetch_chunk(self, keys: List[WeatherKey]) -> Dict[WeatherKey, dict]:
+        from app.services.weather_service import WeatherService
+
+        _, _, year, month = keys[0]
+        bulk = self.fetch_bulk([(lat, lon) for lat, lon, _, _ in keys], year, month)
+        found = {}
+        for i, key in enumerate(keys):
+            weather = WeatherService.summary_at(bulk, i)
+            if weather:
+                found[key] = weather
+        return found
+
+    def _submit(self, keys: List[WeatherKey], retries_left: int) -> Dict[WeatherKey, Future]:
+        """
+        Schedules chunked fetches for keys that are not already in flight and
+        returns the future responsible for each key.
+        All keys must share the same year and month.
+        """
+        with self._lock:
+            futures = {k: self._inflight[k] for k in keys if k in self._inflight}
+            todo = [k for k in keys if k not in futures]
+            for offset in range(0, len(todo), self.chunk_size):
+                chunk = todo[offset:offset + self.chunk_size]
+                future = self._executor.submit(self._fetch_chunk, chunk)
+                for key in chunk:
+                    self._inflight[key] = future
+                    futures[key] = future
+                future.add_done_callback(
+                    lambda f, chunk=chunk: self._on_done(chunk, f, retries_left)
+                )
+            return futures
+
+    def _on_done(self, chunk: List[WeatherKey], future: Future, retries_left: int):
+        found = {} if future.cancelled() or future.exception() else future.result()
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key in chunk:
+                self._inflight.pop(key, None)
+                if key in found:
+                    self._cache[key] = (expires, found[key])
+                    self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        failed = [key for key in chunk if key not in found]
+        if failed and retries_left > 0:
+            try:
+                self._submit(failed, retries_left - 1)
+            except RuntimeError:
+                # Executor shut down (interpreter exiting)
+                pass
+
+    def enrich(self, coords: Sequence[Tuple[float, float]], year: int, month: int,
+               deadline: Optional[float] = None) -> List[Optional[dict]]:
+        """
+        Weather for each (latitude, longitude), aligned to the input.
+        Entries are None when the lookup failed or missed the deadline.
+        """
+        deadline = deadline if deadline is not None else settings.WEATHER_DEADLINE_SECONDS
+        results: List[Optional[dict]] = [None] * len(coords)
+        pending: Dict[WeatherKey, List[int]] = {}
+        stale: List[WeatherKey] = []
+        now = time.monotonic()
+
+        with self._lock:
+            for i, (latitude, longitude) in enumerate(coords):
+                key = self._key(latitude, longitude, year, month)
+                cached = self._cache.get(key)
+                if cached and cached[0] + self.ttl_seconds <= now:
+                    # Too old to serve even while refreshing
+                    del self._cache[key]
+                    cached = None
+                if cached:
+                    expires, weather = cached
+                    self._cache.move_to_end(key)
+                    results[i] = weather
+                    if expires <= now:
+                        stale.append(key)
+                else:
+                    pending.setdefault(key, []).append(i)
+
+        if stale:
+            self._submit(stale, 0)
+        if not pending:
+            return results
+
+        futures = self._submit(list(pending), self.retries)
+        wait(set(futures.values()), timeout=deadline)
+
+        late = 0
+        for key, rows in pending.items():
+            future = futures[key]
+            if not future.done():
+                late += len(rows)
+                continue
+            if future.cancelled() or future.exception():
+                continue
+            weather = future.result().get(key)
+            for i in rows:
+                results[i] = weather
+
+        if late:
+            print(f"Weather enrichment: {late} lookups missed the {deadline}s deadline, refreshing in background")
+        return results
+
+
+_enricher: Optional[WeatherEnricher] = None
+_enricher_lock = threading.Lock()
+
+
+def get_weather_enricher() -> WeatherEnricher:
+    global _enricher
+    if _enricher is None:
+        with _enricher_lock:
+            if _enricher is None:
+                _enricher = WeatherEnricher()
+    return _enricher
@@ -0,0 +1,37 @@
+from typing import Iterable, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def coordinates(places: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Latitude and longitude arrays for the places, NaN where not geocoded.
+    """
+    lats, lons = [], []
+    for p in places:
+        lats.append(p.latitude if p.latitude is not None else np.nan)
+        lons.append(p.longitude if p.longitude is not None else np.nan)
+    return np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distance in km from one point to every point in (lats, lons).
+    NaN coordinates give NaN distances.
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def distance_scores(distances_km: np.ndarray, scale_km: float, unknown: float = 0.5) -> np.ndarray:
+    """
+    Exponential decay from 1.0 at the start city; `scale_km` away scores ~0.37.
+    Places without coordinates get `unknown`.
+    """
+    scores = np.exp(-distances_km / scale_km)
+    return np.where(np.isnan(scores), unknown, scores)
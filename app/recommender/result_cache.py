@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+_catalog_version = 0
+_catalog_lock = threading.Lock()
+
+
+def catalog_version() -> int:
+    return _catalog_version
+
+
+def bump_catalog_version():
+    """
+    Marks the place catalog as changed; every cached ranking becomes stale.
+    """
+    global _catalog_version
+    with _catalog_lock:
+        _catalog_version += 1
+    ranking_cache.clear()
+
+
+def record_catalog_change(db):
+    """
+    Increments the stored catalog version in the caller's transaction (Session
+    or Connection), as one upsert. Call it with every write to the places
+    table, before the commit; catalog_stamp reads it back.
+    """
+    from datetime import datetime
+    from app.models.catalog_state import CatalogVersion
+
+    dialect = db.dialect.name if hasattr(db, "dialect") else db.get_bind().dialect.name
+    table = CatalogVersion.__table__
+    now = datetime.utcnow()
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(id=1, version=1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(index_elements=[table.c.id],
+                                          set_={"version": table.c.version + 1, "updated_at": now})
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(table).values(id=1, version=1, updated_at=now)
+        stmt = stmt.on_duplicate_key_update(version=table.c.version + 1, updated_at=now)
+    else:
+        raise ValueError(f"Unsupported database for upserts: {dialect}")
+    db.execute(stmt)
+
+
+def catalog_stamp(db) -> Tuple[int, int]:
+    """
+    In-process catalog version and the stored version every catalog write
+    increments (loads and climatology refreshes in other processes included):
+    one primary-key read per request.
+    """
+    from sqlalchemy import select
+    from app.models.catalog_state import CatalogVersion
+
+    version = db.scalar(select(CatalogVersion.version).where(CatalogVersion.id == 1))
+    return catalog_version(), version or 0
+
+
+def ranking_fingerprint(group, catalog: Any, extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash of everything a group's ranking depends on: participant preferences,
+    budget, month, start city and the catalog version.
+    """
+    payload = {
+        "participants": sorted(
+            (p.id, p.preferences if isinstance(p.preferences, str) else json.dumps(p.preferences, sort_keys=True))
+            for p in group.participants
+        ),
+        "max_budget": group.max_budget,
+        "travel_month": group.travel_month,
+        "start_city": group.start_city,
+        "catalog": catalog,
+        "extra": extra or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class RankingCache:
+    """
+    Bounded LRU of ranked results per group, validated by input fingerprint.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.RANKING_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._listeners: List[Callable[[str], None]] = []
+
+    def get(self, group_id: str, fingerprint: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(group_id)
+            if entry is None or entry[0] != fingerprint or entry[1] <= time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(group_id)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, group_id: str, fingerprint: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.RANKING_CACHE_TTL_SECONDS
+        with self._lock:
+            self._entries[group_id] = (fingerprint, time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(group_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def on_invalidate(self, listener: Callable[[str], None]):
+        """
+        Registers a callback run with the group id whenever a group's inputs
+        change (invalidate is called), whether or not a ranking was cached.
+        """
+        self._listeners.append(listener)
+
+    def invalidate(self, group_id: str):
+        with self._lock:
+            if self._entries.pop(group_id, None) is not None:
+                self.invalidations += 1
+        for listener in self._listeners:
+            try:
+                listener(group_id)
+            except Exception as e:
+                print(f"WARNING: Ranking invalidation listener failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+ranking_cache = RankingCache()
@@ -0,0 +1,83 @@
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+# Sim: 40%, Weather: 30%, Season: 20%, Distance: 10%
+DEFAULT_WEIGHTS = {
+    "similarity": 0.4,
+    "weather": 0.3,
+    "season": 0.2,
+    "distance": 0.1,
+}
+
+
+class ScoringEngine:
+    """
+    Columnar scoring for ranked places.
+
+    Each feature is a float array aligned to the candidate list. Scores are a
+    single weighted sum over the stacked feature matrix, and only the top k
+    rows are ever sorted or turned into per-place breakdowns.
+    """
+
+    def __init__(self, weights: Optional[Mapping[str, float]] = None):
+        weights = weights or DEFAULT_WEIGHTS
+        self.features = tuple(weights)
+        self.weights = np.asarray([weights[f] for f in self.features], dtype=np.float64)
+
+    def feature_matrix(self, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+        return np.column_stack([np.asarray(columns[f], dtype=np.float64) for f in self.features])
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        return matrix @ self.weights
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: Optional[int] = None) -> np.ndarray:
+        """
+        Indices of the k highest scores, best first, ties in input order.
+        Uses argpartition so only the selected k are sorted.
+        """
+        n = len(scores)
+        if n == 0:
+            return np.empty(0, dtype=np.int64)
+        if k is None or k >= n:
+            return np.argsort(-scores, kind="stable")
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        # Ties at the cut-off are taken in input order, so results are
+        # deterministic and keyset pagination never skips a tied row.
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+        selected = np.concatenate([above, ties])
+        return selected[np.argsort(-scores[selected], kind="stable")]
+
+    def breakdown(self, matrix: np.ndarray, rows: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Per-feature raw values and weighted contributions for the given rows only.
+        """
+        result = []
+        for row in matrix[rows]:
+            result.append({
+                f: {"value": round(float(v), 3), "contribution": round(float(v * w) * 100, 1)}
+                for f, v, w in zip(self.features, row, self.weights)
+            })
+        return result
+
+    def rank(self, columns: Mapping[str, np.ndarray], k: Optional[int] = None,
+             ids: Optional[np.ndarray] = None, after: Optional[Tuple[float, int]] = None):
+        """
+        Returns (top row indices, their scores, their breakdowns).
+        With `after` = (score, id), only rows ranked after that keyset
+        (lower score, or equal score and higher id) are considered.
+        """
+        matrix = self.feature_matrix(columns)
+        scores = self.score(matrix)
+        if after is None:
+            top = self.top_k(scores, k)
+        else:
+            after_score, after_id = after
+            rows = np.flatnonzero((scores < after_score) | ((scores == after_score) & (ids > after_id)))
+            top = rows[self.top_k(scores[rows], k)]
+        return top, scores[top], self.breakdown(matrix, top)
@@ -0,0 +1,71 @@
+import re
+from typing import Optional
+
+MONTHS = ["january", "february", "march", "april", "may", "june",
+          "july", "august", "september", "october", "november", "december"]
+
+# Bit i set = month i (0 = January) is a good time to visit
+ALL_MONTHS = (1 << 12) - 1
+
+_SEGMENT_SPLIT = re.compile(r"[;,/&]|\band\b")
+_RANGE_WORDS = re.compile(r"\bto\b|\btill\b|\buntil\b|-|–")
+_WORD = re.compile(r"[a-z]+")
+
+
+def month_index(name: Optional[str]) -> Optional[int]:
+    """
+    0-based month for a full or abbreviated month name ("Oct", "Sept", "June").
+    """
+    if not name:
+        return None
+    word = name.strip().lower().rstrip(".")
+    if len(word) < 3:
+        return None
+    for i, month in enumerate(MONTHS):
+        if month.startswith(word):
+            return i
+    return None
+
+
+def month_bit(month: int) -> int:
+    return 1 << month
+
+
+def month_range(start: int, end: int) -> int:
+    """
+    Mask for start..end inclusive, wrapping past December ("October to March").
+    """
+    mask = 0
+    month = start
+    while True:
+        mask |= month_bit(month)
+        if month == end:
+            return mask
+        month = (month + 1) % 12
+
+
+def parse_best_time(best_time: Optional[str]) -> Optional[int]:
+    """
+    Parses free-text best_time strings into a 12-bit month mask.
+
+    Handles ranges ("September to May", "October - March", "Mid May to Mid Oct"),
+    several segments ("September - November; March - May") and year-round
+    phrasing. Returns None when no month can be recognised.
+    """
+    if not best_time:
+        return None
+    text = best_time.lower()
+    if "year" in text or "all season" in text:
+        return ALL_MONTHS
+
+    mask = 0
+    for segment in _SEGMENT_SPLIT.split(text):
+        months = [m for m in (month_index(w) for w in _WORD.findall(segment)) if m is not None]
+        if not months:
+            continue
+        if len(months) >= 2 and _RANGE_WORDS.search(segment):
+            mask |= month_range(months[0], months[-1])
+        else:
+            for m in months:
+                mask |= month_bit(m)
+    return mask or None
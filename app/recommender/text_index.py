@@ -0,0 +1,251 @@
+import os
+import threading
+from typing import Iterable, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.config import settings
+from app.recommender.result_cache import bump_catalog_version
+
+
+def place_document(place) -> str:
+    """
+    Text indexed for a place: name, state, best time to visit and description.
+    """
+    parts = [place.name, place.state, getattr(place, "best_time", None), place.description]
+    return " ".join(str(p) for p in parts if p)
+
+
+class CatalogTextIndex:
+    """
+    Prebuilt TF-IDF index over the place catalog.
+
+    The vectorizer is fitted once over the whole catalog and persisted to disk.
+    At request time only the group query is transformed. Document vectors are
+    kept column-major (term -> postings), so scoring a query only touches the
+    postings of the terms it contains.
+    """
+
+    def __init__(self, vectorizer: Optional[TfidfVectorizer] = None,
+                 matrix: Optional[sparse.csc_matrix] = None,
+                 place_ids: Optional[Sequence[int]] = None):
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.place_ids = np.asarray(place_ids if place_ids is not None else [], dtype=np.int64)
+        self._rows = {pid: i for i, pid in enumerate(self.place_ids.tolist())}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, place_id: int) -> bool:
+        return place_id in self._rows
+
+    @classmethod
+    def build(cls, places: Iterable) -> "CatalogTextIndex":
+        places = list(places)
+        if not places:
+            return cls()
+
+        vectorizer = TfidfVectorizer(stop_words="english")
+        try:
+            matrix = vectorizer.fit_transform([place_document(p) for p in places])
+        except ValueError:
+            # Empty vocabulary (e.g. every description is a stop word)
+            return cls()
+        return cls(vectorizer, matrix.tocsc(), [p.id for p in places])
+
+    def add_places(self, places: Iterable) -> int:
+        """
+        Appends places that are not indexed yet, using the fitted vocabulary.
+        Terms unseen at build time are ignored until the next full rebuild.
+        Returns the number of places added.
+        """
+        with self._lock:
+            new_places = [p for p in places if p.id not in self._rows]
+            if not new_places:
+                return 0
+
+            if self.vectorizer is None:
+                built = CatalogTextIndex.build(new_places)
+                self.vectorizer, self.matrix = built.vectorizer, built.matrix
+                self.place_ids = built.place_ids
+            else:
+                new_rows = self.vectorizer.transform([place_document(p) for p in new_places])
+                self.matrix = sparse.vstack([self.matrix, new_rows]).tocsc()
+                self.place_ids = np.concatenate([
+                    self.place_ids,
+                    np.asarray([p.id for p in new_places], dtype=np.int64),
+                ])
+
+            self._rows = {pid: i for i, pid in enumerate(self.place_ids.tolist())}
+            return len(new_places)
+
+    def replace_places(self, places: Iterable) -> int:
+        """
+        Re-transforms places whose text changed (appending any not indexed
+        yet) with the fitted vocabulary. Returns the number of places written.
+        """
+        with self._lock:
+            places = list({p.id: p for p in places}.values())
+            if not places:
+                return 0
+            if self.vectorizer is None:
+                built = CatalogTextIndex.build(places)
+                self.vectorizer, self.matrix, self.place_ids = built.vectorizer, built.matrix, built.place_ids
+            else:
+                keep = np.ones(len(self.place_ids), dtype=bool)
+                stale = [self._rows[p.id] for p in places if p.id in self._rows]
+                keep[stale] = False
+                new_rows = self.vectorizer.transform([place_document(p) for p in places])
+                self.matrix = sparse.vstack([self.matrix.tocsr()[keep], new_rows]).tocsc()
+                self.place_ids = np.concatenate([
+                    self.place_ids[keep],
+                    np.asarray([p.id for p in places], dtype=np.int64),
+                ])
+
+            self._rows = {pid: i for i, pid in enumerate(self.place_ids.tolist())}
+            return len(places)
+
+    def similarity(self, query: str, place_ids: Sequence[int]) -> np.ndarray:
+        """
+        Cosine similarity between the query and each of the given places.
+        Places missing from the index score 0.
+        """
+        scores = np.zeros(len(place_ids), dtype=np.float64)
+        with self._lock:
+            vectorizer, matrix, row_of = self.vectorizer, self.matrix, self._rows
+        if not query or vectorizer is None:
+            return scores
+
+        query_vec = vectorizer.transform([query])
+        if query_vec.nnz == 0:
+            return scores
+
+        # Rows are L2-normalised by the vectorizer, so the dot product is the cosine.
+        # Only the postings of the query terms are read.
+        doc_scores = matrix[:, query_vec.indices] @ query_vec.data
+
+        rows = np.fromiter((row_of.get(pid, -1) for pid in place_ids),
+                           dtype=np.int64, count=len(place_ids))
+        known = rows >= 0
+        scores[known] = doc_scores[rows[known]]
+        return scores
+
+    def save(self, path: Optional[str] = None):
+        path = path or settings.CATALOG_INDEX_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Written aside and renamed, so a process reloading it never reads half a file
+        partial = f"{path}.{os.getpid()}.tmp"
+        with self._lock:
+            joblib.dump({
+                "vectorizer": self.vectorizer,
+                "matrix": self.matrix,
+                "place_ids": self.place_ids,
+            }, partial)
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "CatalogTextIndex":
+        data = joblib.load(path or settings.CATALOG_INDEX_PATH)
+        return cls(data["vectorizer"], data["matrix"], data["place_ids"])
+
+
+_index: Optional[CatalogTextIndex] = None
+_index_stamp: Optional[Tuple[int, int]] = None # File the index was loaded from or saved to
+_index_lock = threading.Lock()
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _set_index(index: CatalogTextIndex):
+    # Called right after saving to the default path, so this process doesn't reload its own write
+    global _index, _index_stamp
+    with _index_lock:
+        _index = index
+        _index_stamp = _file_stamp(settings.CATALOG_INDEX_PATH)
+
+
+def build_catalog_index(db, path: Optional[str] = None) -> CatalogTextIndex:
+    """
+    Rebuilds the index from every place in the database and saves it.
+    """
+    from app.models.place import Place
+
+    global _index
+    # Only the indexed text columns; rows expose them as attributes like places do
+    index = CatalogTextIndex.build(db.query(
+        Place.id, Place.name, Place.state, Place.best_time, Place.description
+    ).all())
+    index.save(path)
+    if path is None:
+        _set_index(index)
+    else:
+        with _index_lock:
+            _index = index
+    bump_catalog_version()
+    print(f"Catalog index built: {len(index)} places")
+    return index
+
+
+def get_catalog_index(db=None) -> CatalogTextIndex:
+    """
+    Process-wide catalog index. Loaded from disk on first use, or built from
+    the database if no saved index exists yet. Reloaded when the saved file
+    changes (another process such as scripts/load_places.py updated it).
+    """
+    global _index, _index_stamp
+    stamp = _file_stamp(settings.CATALOG_INDEX_PATH)
+    if _index is None or (stamp is not None and stamp != _index_stamp):
+        reloaded = False
+        with _index_lock:
+            if stamp is not None and (_index is None or stamp != _index_stamp):
+                try:
+                    index = CatalogTextIndex.load()
+                    reloaded = _index is not None
+                    _index = index
+                except Exception as e:
+                    print(f"Catalog index load failed, {'keeping the loaded one' if _index else 'rebuilding'}: {e}")
+                # Not retried on every request if the file can't be read
+                _index_stamp = stamp
+        if reloaded:
+            print(f"Catalog index reloaded: {len(_index)} places")
+            bump_catalog_version()
+        if _index is None:
+            if db is None:
+                return CatalogTextIndex()
+            return build_catalog_index(db)
+    return _index
+
+
+def update_catalog_index(db, places: Iterable, chunk_size: int = 50000, replace: bool = False) -> int:
+    """
+    Adds newly loaded places to the saved index without refitting it (with
+    replace, also re-indexes places already in it whose text changed).
+    `places` may be a lazy iterable; it is transformed chunk by chunk and the
+    index is saved once.
+    """
+    index = get_catalog_index(db)
+    write = index.replace_places if replace else index.add_places
+    added = 0
+    chunk = []
+    for place in places:
+        chunk.append(place)
+        if len(chunk) >= chunk_size:
+            added += write(chunk)
+            chunk = []
+    added += write(chunk)
+    if added:
+        index.save()
+        _set_index(index)
+        bump_catalog_version()
+    return added
@@ -0,0 +1 @@
+from .group_repository import GroupRepository, duplicate_participants, ensure_group_indexes
@@ -0,0 +1,126 @@
+from sqlalchemy import Select, func, insert, inspect, select
+from sqlalchemy.orm import load_only, selectinload
+
+from app.database import DuplicateRowsError
+from app.models.group_schema import Group, Participant, PARTICIPANT_EMAIL_INDEX
+from app.models.outbox import EmailOutbox
+
+
+class GroupRepository:
+    """
+    Group and participant queries, each loading participants in one extra
+    SELECT ... IN (selectinload) and only the columns its endpoint reads.
+
+    Statement builders are shared by the sync and async routes; execute them
+    with Session.scalar / AsyncSession.scalar.
+    """
+
+    @staticmethod
+    def with_participants(group_id: str) -> Select:
+        """Full group plus participants, for the group page."""
+        return (
+            select(Group)
+            .options(selectinload(Group.participants))
+            .where(Group.id == group_id)
+        )
+
+    @staticmethod
+    def for_ranking(group_id: str) -> Select:
+        """Fields the recommendation fingerprint, preference aggregation and itinerary pre-generation read."""
+        return (
+            select(Group)
+            .options(
+                load_only(Group.id, Group.max_budget, Group.travel_month, Group.start_city, Group.duration),
+                selectinload(Group.participants).load_only(Participant.id, Participant.preferences),
+            )
+            .where(Group.id == group_id)
+        )
+
+    @staticmethod
+    def for_itinerary(group_id: str) -> Select:
+        return (
+            select(Group)
+            .options(
+                load_only(Group.id, Group.duration),
+                selectinload(Group.participants).load_only(Participant.id, Participant.preferences),
+            )
+            .where(Group.id == group_id)
+        )
+
+    @staticmethod
+    def name(group_id: str) -> Select:
+        """Just the group name, or None if the group doesn't exist."""
+        return select(Group.name).where(Group.id == group_id)
+
+    @staticmethod
+    def existing_participant_id(group_id: str, email: str) -> Select:
+        return select(Participant.id).where(Participant.group_id == group_id, Participant.email == email)
+
+    @staticmethod
+    def invites(group_id: str) -> Select:
+        """Outbox rows of the group's participants, oldest first."""
+        return (
+            select(EmailOutbox)
+            .join(Participant, Participant.id == EmailOutbox.participant_id)
+            .where(Participant.group_id == group_id)
+            .order_by(EmailOutbox.id)
+        )
+
+    @staticmethod
+    def insert_participant(dialect_name: str, **values):
+        """
+        INSERT that silently skips a duplicate (group_id, email), relying on
+        the unique index. rowcount is 1 if the row was added, 0 if it existed,
+        so the check and the insert are a single round trip and concurrent
+        adds of the same email can't both succeed.
+        """
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect_name in ("mysql", "mariadb"):
+            return insert(Participant).values(**values).prefix_with("IGNORE")
+        else:
+            raise ValueError(f"Unsupported database for insert_participant: {dialect_name}")
+        return (
+            dialect_insert(Participant)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=[Participant.group_id, Participant.email])
+        )
+
+
+def duplicate_participants() -> Select:
+    """(group_id, email, count) of every email that appears more than once in a group."""
+    return (
+        select(Participant.group_id, Participant.email, func.count())
+        .group_by(Participant.group_id, Participant.email)
+        .having(func.count() > 1)
+    )
+
+
+def ensure_group_indexes(engine) -> bool:
+    """
+    Adds the unique (group_id, email) index to databases created before it
+    existed. Returns whether it was added. Never deletes rows: if duplicate
+    participants exist, raises DuplicateRowsError so they can be reviewed and
+    merged with scripts/remove_duplicates.py.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(Participant.__tablename__):
+        return False # create_all will add it with the table
+    if PARTICIPANT_EMAIL_INDEX.name in {ix["name"] for ix in inspector.get_indexes(Participant.__tablename__)}:
+        return False
+
+    with engine.connect() as conn:
+        duplicates = conn.execute(duplicate_participants()).all()
+    if duplicates:
+        rows = sum(count - 1 for _, _, count in duplicates)
+        raise DuplicateRowsError(
+            f"Cannot add {PARTICIPANT_EMAIL_INDEX.name}: {len(duplicates)} emails appear more than once "
+            f"in a group ({rows} extra participants). Review them with "
+            f"`python scripts/remove_duplicates.py participants` and merge with --apply."
+        )
+
+    PARTICIPANT_EMAIL_INDEX.create(bind=engine, checkfirst=True)
+    print(f"Added index {PARTICIPANT_EMAIL_INDEX.name}")
+    return True
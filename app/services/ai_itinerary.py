@@ -1,20 +1,16 @@
-import google.generativeai as genai
-from app.config import settings
-from typing import Dict
+from typing import AsyncIterator
+
+from app.services.itinerary_cache import itinerary_cache, itinerary_key
+from app.services.itinerary_client import get_itinerary_client
 
 class ItineraryService:
     def __init__(self):
-        if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-pro')
-        else:
-            self.model = None
-
-    async def generate_itinerary(self, place_name: str, duration: int, preferences: str) -> str:
-        if not self.model:
-            return "Gemini API Key missing. Cannot generate itinerary."
+        # Shared across requests: the model is configured once per process
+        self.client = get_itinerary_client()
 
-        prompt = f"""
+    @staticmethod
+    def prompt(place_name: str, duration: int, preferences: str) -> str:
+        return f"""
         Create a {duration}-day travel itinerary for a group visiting {place_name}.
         Group Preferences: {preferences}.
         
@@ -24,9 +20,39 @@ class ItineraryService:
         - Suggested restaurants
         - Estimated budget tips
         """
-        
+
+    async def generate_itinerary(self, place_name: str, duration: int, preferences: str) -> str:
+        if not self.client.available:
+            return "Gemini API Key missing. Cannot generate itinerary."
+
+        # Same destination, duration and preferences: served from cache, and
+        # identical requests in flight share one model call
+        key = itinerary_key("markdown", place_name, duration, preferences)
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return await itinerary_cache.aget_or_generate(
+                key, lambda: self.client.agenerate(self.prompt(place_name, duration, preferences))
+            )
         except Exception as e:
             return f"Error generating itinerary: {str(e)}"
+
+    async def stream_itinerary(self, place_name: str, duration: int, preferences: str) -> AsyncIterator[str]:
+        """
+        Markdown chunks as the model writes them.
+        """
+        if not self.client.available:
+            raise RuntimeError("Gemini API Key missing. Cannot generate itinerary.")
+        key = itinerary_key("markdown", place_name, duration, preferences)
+        # Joins a generation already in flight for the same key instead of starting another
+        cached, future = await itinerary_cache.aclaim(key)
+        if future is None:
+            yield cached
+            return
+        parts = []
+        try:
+            async for chunk in self.client.astream(self.prompt(place_name, duration, preferences)):
+                parts.append(chunk)
+                yield chunk
+        except BaseException as e:
+            itinerary_cache.settle(key, future, error=e)
+            raise
+        itinerary_cache.settle(key, future, "".join(parts))
@@ -0,0 +1,288 @@
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+BASE_URL = "https://www.holidify.com"
+START_URL = "https://www.holidify.com/country/india/places-to-visit.html"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Responses worth retrying (with backoff); anything else non-200/304 fails the page
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def listing_url(start_url: str, page: int) -> str:
+    return start_url if page == 0 else f"{start_url}?pageNum={page}"
+
+
+def parse_listing(html: str, base_url: str) -> List[Dict]:
+    """
+    Place cards of one listing page. Runs in a worker process, so it only
+    takes and returns plain data.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    records = []
+    for card in soup.select("div.content-card"):
+        name_tag = card.select_one("h3")
+        link_tag = card.find("a", href=True)
+
+        if not name_tag or not link_tag:
+            continue
+
+        # extract state (Located in:)
+        state = "Unknown"
+        for tag in card.find_all(["span", "small", "p"]):
+            txt = tag.get_text(strip=True)
+            if "Located in:" in txt:
+                state = txt.replace("Located in:", "").strip()
+                break
+
+        # description
+        desc_tag = card.find("p", class_="card-text") # Adjust selector if needed based on site
+        if not desc_tag:
+             desc_tag = card.find("p")
+
+        records.append({
+            "name": name_tag.get_text(strip=True),
+            "state": state,
+            "description": desc_tag.get_text(strip=True) if desc_tag else "Popular tourist destination",
+            "url": urljoin(base_url, link_tag["href"]),
+        })
+    return records
+
+
+class CrawlState:
+    """
+    Crawl frontier and per-page validators, saved atomically as JSON. Pages
+    marked done are skipped on resume; their ETag/Last-Modified make the next
+    re-crawl conditional.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pages: Dict[str, Dict] = {}
+        self.last_page: Optional[int] = None # First listing page that had no cards
+
+    def load(self) -> "CrawlState":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return self
+        self.pages = data.get("pages", {})
+        self.last_page = data.get("last_page")
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"pages": self.pages, "last_page": self.last_page}, f)
+        os.replace(tmp, self.path)
+
+    def pending(self, urls: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+        return [(page, url) for page, url in urls if self.pages.get(url, {}).get("status") != "done"]
+
+
+class HostLimiter:
+    """
+    Politeness per host: at most `concurrency` requests in flight and at
+    least `delay` seconds between request starts.
+    """
+
+    def __init__(self, concurrency: int, delay: float):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        await semaphore.acquire()
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            wait = self._next_start.get(host, 0.0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_start[host] = loop.time() + self.delay
+        return semaphore
+
+
+class CatalogCrawler:
+    """
+    Crawls the paginated place listing concurrently: pooled async HTTP with a
+    per-host politeness budget, conditional requests for pages seen before,
+    parsing in a process pool, records appended to a JSONL file as each page
+    completes and the frontier checkpointed so an interrupted run resumes.
+
+    A page whose records were written but not yet checkpointed is fetched
+    again on resume; the catalog loader upserts by url, so the duplicates
+    are harmless.
+    """
+
+    def __init__(self, output: str, state_path: str, start_url: str = START_URL, base_url: str = BASE_URL,
+                 max_pages: int = 5, concurrency: int = 4, per_host: int = 2, host_delay: float = 0.5,
+                 parse_workers: Optional[int] = None, timeout: float = 10, retries: int = 2,
+                 recrawl: bool = False, checkpoint_every: int = 10):
+        self.output = output
+        self.state = CrawlState(state_path).load()
+        self.start_url = start_url
+        self.base_url = base_url
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+        self.limiter = HostLimiter(per_host, host_delay)
+        self.parse_workers = parse_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.recrawl = recrawl
+        self.checkpoint_every = checkpoint_every
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "skipped": 0, "records": 0}
+        self._seen_urls = set()
+        self._since_checkpoint = 0
+
+    async def _fetch(self, client, url: str) -> Tuple[int, Optional[str], Dict]:
+        """
+        (status, body, validators) with conditional headers from the last crawl.
+        """
+        known = self.state.pages.get(url, {})
+        headers = {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            semaphore = await self.limiter.acquire(host)
+            try:
+                response = await client.get(url, headers=headers)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(f"Retrying {url} after {type(e).__name__}: {e}")
+                retry_after = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    validators = {
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                    }
+                    body = response.text if response.status_code == 200 else None
+                    return response.status_code, body, validators
+                retry_after = response.headers.get("retry-after")
+            finally:
+                semaphore.release()
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+            await asyncio.sleep(delay)
+
+    def _write(self, out, records: List[Dict]) -> int:
+        written = 0
+        for record in records:
+            if record["url"] in self._seen_urls:
+                continue
+            self._seen_urls.add(record["url"])
+            record["scraped_at"] = time.time()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            written += 1
+        out.flush()
+        return written
+
+    def _checkpoint(self, force: bool = False):
+        self._since_checkpoint += 1
+        if force or self._since_checkpoint >= self.checkpoint_every:
+            self.state.save()
+            self._since_checkpoint = 0
+
+    def _end_at(self, page: int):
+        if self.state.last_page is None or page < self.state.last_page:
+            self.state.last_page = page
+
+    async def _crawl_page(self, client, pool, out, page: int, url: str):
+        if self.state.last_page is not None and page > self.state.last_page:
+            self.stats["skipped"] += 1 # Past the end of the listing
+            return
+        try:
+            status, body, validators = await self._fetch(client, url)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            self.state.pages[url] = {**self.state.pages.get(url, {}), "status": "failed", "error": str(e)}
+            self.stats["failed"] += 1
+            return
+
+        entry = {"fetched_at": time.time(), **{k: v for k, v in validators.items() if v}}
+        if status == 304:
+            known = self.state.pages.get(url, {})
+            self.state.pages[url] = {**known, **entry, "status": "done"}
+            self.stats["not_modified"] += 1
+            if known.get("records") == 0:
+                self._end_at(page) # Still the empty page past the end
+        elif status == 200:
+            loop = asyncio.get_running_loop()
+            records = await loop.run_in_executor(pool, parse_listing, body, self.base_url)
+            if not records:
+                print(f"No more cards found at page {page}.")
+                self._end_at(page)
+            written = self._write(out, records)
+            self.state.pages[url] = {**entry, "status": "done", "records": len(records)}
+            self.stats["fetched"] += 1
+            self.stats["records"] += written
+        else:
+            print(f"Failed to fetch {url} - Status: {status}")
+            self.state.pages[url] = {**self.state.pages.get(url, {}), "status": "failed", "error": f"HTTP {status}"}
+            self.stats["failed"] += 1
+        self._checkpoint()
+
+    async def run(self) -> Dict:
+        import httpx
+
+        frontier = [(page, listing_url(self.start_url, page)) for page in range(self.max_pages)]
+        if self.recrawl:
+            self.state.last_page = None
+            for url in self.state.pages:
+                self.state.pages[url]["status"] = "stale"
+        else:
+            skipped = len(frontier)
+            frontier = self.state.pending(frontier)
+            skipped -= len(frontier)
+            if skipped:
+                print(f"Resuming: {skipped} pages already crawled")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for item in frontier:
+            queue.put_nowait(item)
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(self.output) or ".", exist_ok=True)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        try:
+            with open(self.output, "a", encoding="utf-8") as out, \
+                    ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+                async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=self.timeout,
+                                             limits=limits, follow_redirects=True) as client:
+                    async def worker():
+                        while True:
+                            try:
+                                page, url = queue.get_nowait()
+                            except asyncio.QueueEmpty:
+                                return
+                            await self._crawl_page(client, pool, out, page, url)
+
+                    await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            # Also on Ctrl-C / errors: whatever finished is kept for the resume
+            self.state.save()
+
+        elapsed = time.perf_counter() - start
+        pages = self.stats["fetched"] + self.stats["not_modified"]
+        return {
+            **self.stats,
+            "seconds": round(elapsed, 2),
+            "pages_per_second": round(pages / elapsed, 1) if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,350 @@
+import json
+import os
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from sqlalchemy import bindparam, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app.database import DuplicateRowsError
+from app.models.place import Place
+from app.recommender.result_cache import record_catalog_change
+from app.recommender.season import parse_best_time
+
+# Columns written by the loader; url is the natural key
+PLACE_FIELDS = ("name", "state", "description", "url", "best_time", "best_months",
+                "min_budget", "latitude", "longitude", "content_hash")
+NATURAL_KEY = "url"
+# Written as given rather than coalesced: a load without a fingerprint clears
+# it, so the next pipeline run reprocesses the place
+FINGERPRINT_FIELD = "content_hash"
+
+# Places columns added after the table was first created
+ADDED_PLACE_COLUMNS = ("best_time", "best_months", "weather_updated_at", "content_hash")
+
+# Accepted source names for each column, first match wins
+FIELD_ALIASES = {
+    "min_budget": ("min_budget", "budget"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lng", "lon"),
+}
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_json_array(f, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """
+    Yields the elements of a top-level JSON array without reading the whole
+    file: the text is decoded element by element from a rolling buffer.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    while True:
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+        if not started:
+            buffer = buffer.lstrip()
+            if not buffer:
+                if eof:
+                    return
+                continue
+            if buffer[0] != "[":
+                raise ValueError("Expected a JSON array of records")
+            pos, started = 1, True
+
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos >= len(buffer):
+                break
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                break # Element continues in the next chunk
+            yield record
+        if eof:
+            raise ValueError("Unexpected end of file inside the JSON array")
+
+
+def iter_records(path: str) -> Iterator[Dict]:
+    """
+    Streams records from a .json array or a .jsonl/.ndjson file (one object per line).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def place_row(record: Dict) -> Optional[Dict]:
+    """
+    Maps a source record to Place columns. Fields missing from the record are
+    None (upserts keep the stored value for those). Returns None for records
+    without a name or url.
+    """
+    if not record.get("name") or not record.get(NATURAL_KEY):
+        return None
+
+    def pick(field):
+        for key in FIELD_ALIASES.get(field, (field,)):
+            if record.get(key) not in (None, ""):
+                return record[key]
+        return None
+
+    best_time = pick("best_time")
+    best_months = record["best_months"] if "best_months" in record else parse_best_time(best_time)
+    return {
+        "name": record["name"],
+        "state": pick("state"),
+        "description": pick("description"),
+        "url": record[NATURAL_KEY],
+        "best_time": best_time,
+        # Bulk statements skip ORM events, so the month mask is computed here
+        # (unless the pipeline's best_time stage already did)
+        "best_months": best_months,
+        "min_budget": _number(pick("min_budget")),
+        "latitude": _number(pick("latitude")),
+        "longitude": _number(pick("longitude")),
+        "content_hash": None,
+    }
+
+
+def upsert_statement(dialect_name: str):
+    """
+    INSERT ... ON CONFLICT (url) DO UPDATE (ON DUPLICATE KEY UPDATE on MySQL),
+    executed with a list of rows. Columns the incoming record doesn't have
+    (None) keep their stored value, so a partial feed never blanks out data.
+    """
+    table = Place.__table__
+    update_fields = [f for f in PLACE_FIELDS if f not in (NATURAL_KEY, FINGERPRINT_FIELD)]
+    if dialect_name in ("sqlite", "postgresql"):
+        if dialect_name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(Place)
+        set_ = {f: func.coalesce(stmt.excluded[f], table.c[f]) for f in update_fields}
+        set_[FINGERPRINT_FIELD] = stmt.excluded[FINGERPRINT_FIELD]
+        return stmt.on_conflict_do_update(index_elements=[table.c[NATURAL_KEY]], set_=set_)
+    if dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        stmt = dialect_insert(Place)
+        set_ = {f: func.coalesce(stmt.inserted[f], table.c[f]) for f in update_fields}
+        set_[FINGERPRINT_FIELD] = stmt.inserted[FINGERPRINT_FIELD]
+        return stmt.on_duplicate_key_update(set_)
+    raise ValueError(f"Unsupported database for upserts: {dialect_name}")
+
+
+def ensure_place_columns(engine) -> List[str]:
+    """
+    Brings a places table created by an older version up to date, since
+    create_all doesn't alter existing tables: adds missing columns and
+    non-unique indexes, and fills best_months from best_time when that column
+    is new (the ORM event only covers later writes). The unique url index is
+    left to ensure_place_indexes. Returns the columns added.
+    """
+    table = Place.__table__
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return [] # create_all will add them with the table
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    added = [name for name in ADDED_PLACE_COLUMNS if name not in existing]
+    if added:
+        with engine.begin() as conn:
+            for name in added:
+                column_type = table.c[name].type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+        print(f"Added columns to {table.name}: {', '.join(added)}")
+
+    indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    for index in sorted(table.indexes, key=lambda ix: ix.name):
+        if not index.unique and index.name not in indexes:
+            index.create(bind=engine, checkfirst=True)
+            print(f"Added index {index.name}")
+
+    if "best_months" in added:
+        backfill_best_months(engine)
+    return added
+
+
+def backfill_best_months(engine, batch_size: int = 5000) -> int:
+    """
+    Sets best_months for rows that have a best_time but no mask. Returns the
+    number of rows updated.
+    """
+    table = Place.__table__
+    updated = 0
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(table.c.id, table.c.best_time)
+            .where(table.c.best_months.is_(None), table.c.best_time.isnot(None))
+        ).all()
+        for start in range(0, len(rows), batch_size):
+            batch = [
+                {"place_id": place_id, "mask": parse_best_time(best_time)}
+                for place_id, best_time in rows[start:start + batch_size]
+            ]
+            conn.execute(
+                table.update().where(table.c.id == bindparam("place_id")).values(best_months=bindparam("mask")),
+                batch,
+            )
+            updated += len(batch)
+        if updated:
+            record_catalog_change(conn)
+    if updated:
+        print(f"Filled best_months for {updated} places")
+    return updated
+
+
+def duplicate_place_urls():
+    """(url, count) of every url shared by more than one place."""
+    return (
+        select(Place.url, func.count())
+        .where(Place.url.isnot(None))
+        .group_by(Place.url)
+        .having(func.count() > 1)
+    )
+
+
+def ensure_place_indexes(engine) -> bool:
+    """
+    Adds the unique url index to catalogs created before it existed. Returns
+    whether it was added. Never deletes rows: if places share a url, raises
+    DuplicateRowsError so they can be reviewed and removed with
+    scripts/remove_duplicates.py.
+    """
+    index = next(ix for ix in Place.__table__.indexes if ix.unique and NATURAL_KEY in ix.columns)
+    inspector = inspect(engine)
+    if not inspector.has_table(Place.__tablename__):
+        return False
+    if any(ix["name"] == index.name for ix in inspector.get_indexes(Place.__tablename__)):
+        return False
+
+    with engine.connect() as conn:
+        duplicates = conn.execute(duplicate_place_urls()).all()
+    if duplicates:
+        rows = sum(count - 1 for _, count in duplicates)
+        raise DuplicateRowsError(
+            f"Cannot add {index.name}: {len(duplicates)} urls are shared by more than one place "
+            f"({rows} extra places). Review them with `python scripts/remove_duplicates.py places` "
+            f"and remove with --apply."
+        )
+    index.create(bind=engine, checkfirst=True)
+    print(f"Added index {index.name}")
+    return True
+
+
+class LoadCheckpoint:
+    """
+    Number of source records committed so far, tied to the source file's path,
+    size and mtime so a checkpoint is never applied to a different file.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        stat = os.stat(source)
+        self.source = {"source": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> int:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        if any(data.get(k) != v for k, v in self.source.items()):
+            return 0
+        return int(data.get("records", 0))
+
+    def save(self, records: int):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self.source, "records": records}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_catalog(db: Session, source: str, batch_size: int = 5000, checkpoint: Optional[LoadCheckpoint] = None,
+                 report_every: float = 5.0, changed_urls: Optional[Set[str]] = None) -> Dict[str, float]:
+    """
+    Streams `source` into the places table in batched upserts, one commit per
+    batch. With a checkpoint, records committed by an earlier (failed) run are
+    skipped. The urls of the inserted and updated rows are added to
+    `changed_urls`, if given. Returns counts and throughput.
+    """
+    dialect = db.get_bind().dialect.name
+    statement = upsert_statement(dialect)
+    start_count = db.scalar(select(func.count(Place.id)))
+
+    resume_from = checkpoint.load() if checkpoint else 0
+    if resume_from:
+        print(f"Resuming after {resume_from} records committed by a previous run")
+
+    seen = written = skipped = 0
+    batch: List[Dict] = []
+    start = last_report = time.perf_counter()
+
+    def flush():
+        nonlocal written, batch
+        if batch:
+            # Postgres rejects a multi-row upsert that touches the same key twice
+            batch = list({row[NATURAL_KEY]: row for row in batch}.values())
+            db.execute(statement, batch)
+            record_catalog_change(db)
+            db.commit()
+            written += len(batch)
+            if changed_urls is not None:
+                changed_urls.update(row[NATURAL_KEY] for row in batch)
+            batch = []
+        if checkpoint:
+            checkpoint.save(seen)
+
+    for record in iter_records(source):
+        seen += 1
+        if seen <= resume_from:
+            continue
+        row = place_row(record)
+        if row is None:
+            skipped += 1
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            now = time.perf_counter()
+            if now - last_report >= report_every:
+                print(f"  {seen} records read, {written} upserted, {written / (now - start):.0f} rows/s")
+                last_report = now
+    flush()
+
+    elapsed = time.perf_counter() - start
+    inserted = db.scalar(select(func.count(Place.id))) - start_count
+    if checkpoint:
+        checkpoint.clear()
+    return {
+        "records": seen,
+        "resumed_from": resume_from,
+        "upserted": written,
+        "inserted": inserted,
+        "updated": written - inserted,
+        "skipped": skipped,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,415 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.place import Place
+from app.recommender.result_cache import record_catalog_change
+from app.recommender.season import parse_best_time
+from app.services.catalog_loader import NATURAL_KEY, iter_records, place_row, upsert_statement
+
+INDIAN_STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+)
+# Stored with a " (UT)" suffix, as in the processed catalog
+UNION_TERRITORIES = (
+    "Andaman and Nicobar Islands", "Chandigarh", "Dadra and Nagar Haveli and Daman and Diu", "Delhi",
+    "Jammu and Kashmir", "Ladakh", "Lakshadweep", "Puducherry",
+)
+# Old or informal names seen in scraped data
+STATE_ALIASES = {
+    "orissa": "Odisha",
+    "pondicherry": "Puducherry",
+    "uttaranchal": "Uttarakhand",
+    "new delhi": "Delhi",
+    "nct of delhi": "Delhi",
+    "j&k": "Jammu and Kashmir",
+    "jammu & kashmir": "Jammu and Kashmir",
+    "andaman & nicobar islands": "Andaman and Nicobar Islands",
+    "andaman": "Andaman and Nicobar Islands",
+}
+# Values the listing uses when it doesn't know the state
+_NO_STATE = {"", "unknown", "n/a", "na", "none", "india"}
+_UT_SUFFIX = re.compile(r"\s*\(UT\)$", re.IGNORECASE)
+_STATE_NAMES = {
+    **{state.lower(): state for state in INDIAN_STATES},
+    **{territory.lower(): f"{territory} (UT)" for territory in UNION_TERRITORIES},
+}
+_STATE_NAMES.update({alias: _STATE_NAMES[name.lower()] for alias, name in STATE_ALIASES.items()})
+_STATE_PATTERN = "|".join(re.escape(name) for name in sorted(_STATE_NAMES, key=len, reverse=True))
+_IN_STATE = re.compile(rf"\bin (?:the state of )?({_STATE_PATTERN})\b", re.IGNORECASE)
+_ANY_STATE = re.compile(rf"\b({_STATE_PATTERN})\b", re.IGNORECASE)
+
+_NUMBERING = re.compile(r"^\d+\.\s*")
+_READ_MORE = re.compile(r"\s*Read More\s*$", re.IGNORECASE)
+# Listing counters ("1 out of 100Places to visit in India55Tourist attractions")
+# that older scrapes picked up instead of the description
+_LISTING_COUNTER = re.compile(r"^\d+ out of \d+\s*Places to visit", re.IGNORECASE)
+
+
+def clean_name(record: Dict) -> Optional[Dict]:
+    # Remove leading numbering like "1. "; records without a name are dropped
+    record["name"] = _NUMBERING.sub("", record.get("name") or "").strip()
+    return record if record["name"] else None
+
+
+def canonical_state(value) -> Optional[str]:
+    if not value:
+        return None
+    text = " ".join(str(value).replace("Located in:", "").split())
+    key = _UT_SUFFIX.sub("", text).lower()
+    if key in _NO_STATE:
+        return None
+    return _STATE_NAMES.get(key, text)
+
+
+def normalize_state(record: Dict) -> Dict:
+    record["state"] = canonical_state(record.get("state"))
+    return record
+
+
+def clean_description(record: Dict) -> Dict:
+    """
+    Keeps the scraped description, minus the "Read More" link text; listing
+    counters and empty text become None, so the stored description is kept.
+    """
+    text = " ".join((record.get("description") or "").split())
+    text = _READ_MORE.sub("", text)
+    record["description"] = None if not text or _LISTING_COUNTER.match(text) else text
+    return record
+
+
+def parse_best_time_stage(record: Dict) -> Dict:
+    best_time = _READ_MORE.sub("", record.get("best_time") or "").strip() or None
+    record["best_time"] = best_time
+    record["best_months"] = parse_best_time(best_time)
+    return record
+
+
+def enrich(record: Dict) -> Dict:
+    """
+    Fills a missing state: places that are themselves a state or territory
+    ("Ladakh"), else from the description ("a hill station in Kerala"),
+    preferring an "in <state>" mention over any other.
+    """
+    if record.get("state"):
+        return record
+    key = record["name"].lower()
+    if key in _STATE_NAMES:
+        record["state"] = _STATE_NAMES[key]
+    elif record.get("description"):
+        match = _IN_STATE.search(record["description"]) or _ANY_STATE.search(record["description"])
+        if match:
+            record["state"] = canonical_state(match.group(1))
+    return record
+
+
+# Record -> record stages in their default order; any may be left out
+RECORD_STAGES: Dict[str, Callable[[Dict], Optional[Dict]]] = {
+    "clean_name": clean_name,
+    "normalize_state": normalize_state,
+    "clean_description": clean_description,
+    "parse_best_time": parse_best_time_stage,
+    "enrich": enrich,
+}
+
+
+def row_fingerprint(row: Dict) -> str:
+    """
+    Hash of a place row's content (everything the loader writes).
+    """
+    payload = {k: v for k, v in row.items() if k != "content_hash"}
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class Fingerprint:
+    """
+    Turns records into place rows and drops the ones whose content matches
+    what the last run loaded (places.content_hash), plus repeats of a url
+    earlier in the same run. Stored hashes are read per batch of records, so
+    only the urls passed on in this run are kept in memory.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.unchanged = 0
+        self.invalid = 0
+        self._passed: Dict[str, str] = {} # url -> hash of the row passed on this run
+
+    def _stored_hashes(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        stored = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for i in range(0, len(urls), 500):
+            stored.update(self.db.execute(
+                select(Place.url, Place.content_hash).where(Place.url.in_(urls[i:i + 500]))
+            ).all())
+        return stored
+
+    def batch(self, records: List[Dict]) -> List[Dict]:
+        rows = []
+        for record in records:
+            row = place_row(record)
+            if row is None:
+                self.invalid += 1
+                continue
+            row["content_hash"] = row_fingerprint(row)
+            rows.append(row)
+
+        stored = self._stored_hashes(list({row[NATURAL_KEY] for row in rows} - self._passed.keys()))
+        changed = []
+        for row in rows:
+            url = row[NATURAL_KEY]
+            known = self._passed[url] if url in self._passed else stored.get(url)
+            if known == row["content_hash"]:
+                self.unchanged += 1
+                continue
+            self._passed[url] = row["content_hash"]
+            changed.append(row)
+        return changed
+
+
+class Load:
+    """
+    Batched upsert of changed rows, one commit per batch. Remembers the urls
+    written so only those places are re-indexed.
+    """
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.statement = upsert_statement(db.get_bind().dialect.name)
+        self.changed_urls: Set[str] = set()
+        self._batch: List[Dict] = []
+
+    def __call__(self, row: Dict) -> Dict:
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        return row
+
+    def flush(self):
+        if self._batch:
+            self.db.execute(self.statement, self._batch)
+            record_catalog_change(self.db)
+            self.db.commit()
+            self.changed_urls.update(row[NATURAL_KEY] for row in self._batch)
+            self._batch = []
+
+
+class WriteRecords:
+    """
+    Sink writing records to a .jsonl file, or a .json array, as they arrive.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._array = not path.endswith((".jsonl", ".ndjson"))
+        self._first = True
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        if self._array:
+            self._file.write("[")
+
+    def __call__(self, record: Dict) -> Dict:
+        if self._file is None:
+            self._open()
+        text = json.dumps(record, ensure_ascii=False)
+        if self._array:
+            text = ("\n  " if self._first else ",\n  ") + text
+        else:
+            text += "\n"
+        self._file.write(text)
+        self._first = False
+        return record
+
+    def flush(self):
+        if self._file is None:
+            self._open() # No records; still leave a valid, empty file
+        if self._array:
+            self._file.write("\n]\n")
+        self._file.close()
+
+
+class Stage:
+    """
+    A named pipeline step over a stream of records. `fn` maps one record to
+    the next (None drops it), or, if it has a `batch` method, is given lists
+    of up to its batch_size records and returns the ones to pass on. A
+    `flush` method on it, if any, runs once the input is exhausted. Only time
+    spent in the step itself is counted.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Dict], Optional[Dict]]):
+        self.name = name
+        self.fn = fn
+        self.records_in = 0
+        self.records_out = 0
+        self.seconds = 0.0
+
+    def _run_batch(self, batch: Callable[[List[Dict]], List[Dict]], records: List[Dict]) -> List[Dict]:
+        start = time.perf_counter()
+        results = batch(records) if records else []
+        self.seconds += time.perf_counter() - start
+        self.records_in += len(records)
+        self.records_out += len(results)
+        return results
+
+    def run(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        fn = self.fn
+        batch = getattr(fn, "batch", None)
+        if batch is not None:
+            pending = []
+            for record in records:
+                pending.append(record)
+                if len(pending) >= fn.batch_size:
+                    yield from self._run_batch(batch, pending)
+                    pending = []
+            yield from self._run_batch(batch, pending)
+        else:
+            for record in records:
+                start = time.perf_counter()
+                result = fn(record)
+                self.seconds += time.perf_counter() - start
+                self.records_in += 1
+                if result is not None:
+                    self.records_out += 1
+                    yield result
+        flush = getattr(fn, "flush", None)
+        if flush is not None:
+            start = time.perf_counter()
+            flush()
+            self.seconds += time.perf_counter() - start
+
+    def stats(self) -> Dict:
+        return {
+            "stage": self.name,
+            "in": self.records_in,
+            "out": self.records_out,
+            "dropped": self.records_in - self.records_out,
+            "seconds": round(self.seconds, 3),
+            "records_per_second": round(self.records_in / self.seconds, 1) if self.seconds > 0 else 0.0,
+        }
+
+
+class CatalogPipeline:
+    """
+    Streams records through the stages one at a time: nothing is held in
+    memory beyond the fingerprint and loader batches (and the urls passed on).
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = list(stages)
+        self.read = Stage("read", None)
+
+    def _source(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        iterator = iter(records)
+        while True:
+            start = time.perf_counter()
+            try:
+                record = next(iterator)
+            except StopIteration:
+                self.read.seconds += time.perf_counter() - start
+                return
+            self.read.seconds += time.perf_counter() - start
+            self.read.records_in += 1
+            self.read.records_out += 1
+            yield record
+
+    def run(self, records: Iterable[Dict]) -> Dict:
+        start = time.perf_counter()
+        stream = self._source(records)
+        for stage in self.stages:
+            stream = stage.run(stream)
+        out = sum(1 for _ in stream)
+        elapsed = time.perf_counter() - start
+        return {
+            "records": self.read.records_in,
+            "out": out,
+            "seconds": round(elapsed, 2),
+            "records_per_second": round(self.read.records_in / elapsed, 1) if elapsed > 0 else 0.0,
+            "stages": [stage.stats() for stage in [self.read, *self.stages]],
+        }
+
+
+def record_stages(skip: Iterable[str] = ()) -> List[Stage]:
+    skip = set(skip)
+    unknown = skip - set(RECORD_STAGES)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))} (have {', '.join(RECORD_STAGES)})")
+    return [Stage(name, fn) for name, fn in RECORD_STAGES.items() if name not in skip]
+
+
+def run_catalog_pipeline(db: Session, source: str, skip: Iterable[str] = (), batch_size: int = 1000,
+                         reindex: bool = True) -> Dict:
+    """
+    Raw dump -> places table: the record stages, then fingerprinting and
+    batched upserts of changed places only, then re-indexing those places.
+    Returns counts and per-stage throughput.
+    """
+    fingerprint = Fingerprint(db, batch_size)
+    load = Load(db, batch_size)
+    start_count = db.scalar(select(func.count(Place.id)))
+    pipeline = CatalogPipeline([*record_stages(skip), Stage("fingerprint", fingerprint), Stage("load", load)])
+    stats = pipeline.run(iter_records(source))
+    inserted = db.scalar(select(func.count(Place.id))) - start_count
+
+    indexed = 0
+    if reindex and load.changed_urls:
+        from app.recommender.text_index import update_catalog_index
+
+        urls = sorted(load.changed_urls)
+        index_stage = Stage("index", None)
+        start = time.perf_counter()
+
+        def changed_places():
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(urls), 500):
+                yield from db.query(Place.id, Place.name, Place.state, Place.best_time, Place.description) \
+                    .filter(Place.url.in_(urls[i:i + 500])).all()
+
+        indexed = update_catalog_index(db, changed_places(), replace=True)
+        index_stage.seconds = time.perf_counter() - start
+        index_stage.records_in = index_stage.records_out = indexed
+        stats["stages"].append(index_stage.stats())
+
+    return {
+        **stats,
+        "loaded": len(load.changed_urls),
+        "inserted": inserted,
+        "updated": len(load.changed_urls) - inserted,
+        "unchanged": fingerprint.unchanged,
+        "invalid": fingerprint.invalid,
+        "indexed": indexed,
+    }
+
+
+def write_clean_records(source: str, output: str, skip: Iterable[str] = ()) -> Dict:
+    """
+    Runs only the record stages and writes the result to a file, without
+    touching the database.
+    """
+    pipeline = CatalogPipeline([*record_stages(skip), Stage("write", WriteRecords(output))])
+    return pipeline.run(iter_records(source))
+
+
+def format_stage_stats(stats: Dict) -> str:
+    lines = [f"{'stage':<18}{'in':>9}{'out':>9}{'seconds':>10}{'rec/s':>12}"]
+    for stage in stats["stages"]:
+        lines.append(
+            f"{stage['stage']:<18}{stage['in']:>9}{stage['out']:>9}"
+            f"{stage['seconds']:>10.3f}{stage['records_per_second']:>12.0f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,172 @@
+import threading
+import time
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.place import Place
+from app.recommender.result_cache import record_catalog_change
+from app.services.weather_service import rain_condition
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+CLIMATE_VARIABLES = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum"]
+DAYS_IN_MONTH = (31, 28.25, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+class ClimatologyService:
+    """
+    Typical monthly weather per place, precomputed offline from the Open-Meteo
+    archive and stored in Place.weather_cache as three 12-value lists:
+    average daily max/min temperature and total precipitation per month.
+    """
+
+    @staticmethod
+    def _reference_years() -> Tuple[int, int]:
+        # Last N complete calendar years
+        last = datetime.now().year - 1
+        return last - settings.CLIMATOLOGY_YEARS + 1, last
+
+    @staticmethod
+    def _by_month(values: np.ndarray, months: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        valid = ~np.isnan(values)
+        sums = np.bincount(months[valid], weights=values[valid], minlength=12)
+        counts = np.bincount(months[valid], minlength=12)
+        return sums, counts
+
+    @staticmethod
+    def _monthly(response, n_years: int) -> Dict[str, List[Optional[float]]]:
+        daily = response.Daily()
+        times = np.arange(daily.Time(), daily.TimeEnd(), daily.Interval()).astype("datetime64[s]")
+        months = times.astype("datetime64[M]").astype(np.int64) % 12
+
+        climate = {}
+        for name, i in (("max_temp", 0), ("min_temp", 1)):
+            sums, counts = ClimatologyService._by_month(daily.Variables(i).ValuesAsNumpy(), months)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                climate[name] = np.where(counts > 0, sums / counts, np.nan)
+
+        sums, counts = ClimatologyService._by_month(daily.Variables(2).ValuesAsNumpy(), months)
+        climate["precipitation"] = np.where(counts > 0, sums / n_years, np.nan)
+
+        return {
+            name: [None if np.isnan(v) else round(float(v), 1) for v in values]
+            for name, values in climate.items()
+        }
+
+    @staticmethod
+    def fetch(coords: Sequence[Tuple[float, float]]) -> List[Optional[dict]]:
+        """
+        Computes the 12-month climatology for each coordinate, aligned to the
+        input. Coordinates are packed into multi-location archive requests.
+        """
+        from app.services.weather_service import get_openmeteo_client
+
+        first, last = ClimatologyService._reference_years()
+        n_years = last - first + 1
+        openmeteo = get_openmeteo_client()
+        results: List[Optional[dict]] = [None] * len(coords)
+
+        chunk_size = settings.CLIMATOLOGY_CHUNK_SIZE
+        for offset in range(0, len(coords), chunk_size):
+            chunk = coords[offset:offset + chunk_size]
+            params = {
+                "latitude": [lat for lat, _ in chunk],
+                "longitude": [lon for _, lon in chunk],
+                "start_date": f"{first}-01-01",
+                "end_date": f"{last}-12-31",
+                "daily": CLIMATE_VARIABLES
+            }
+            try:
+                responses = openmeteo.weather_api(ARCHIVE_URL, params=params)
+                for i, response in enumerate(responses[:len(chunk)]):
+                    climate = ClimatologyService._monthly(response, n_years)
+                    climate["years"] = f"{first}-{last}"
+                    results[offset + i] = climate
+            except Exception as e:
+                print(f"Climatology API Error: {e}")
+
+        return results
+
+    @staticmethod
+    def refresh(db: Session, max_age_days: Optional[int] = None, limit: Optional[int] = None) -> int:
+        """
+        Fills the climatology of geocoded places that have none yet (newly
+        loaded places first) or whose data is older than max_age_days.
+        Commits after every chunk. Returns the number of places updated.
+        """
+        max_age_days = max_age_days if max_age_days is not None else settings.CLIMATOLOGY_MAX_AGE_DAYS
+        cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+
+        query = db.query(Place.id).filter(
+            Place.latitude.isnot(None),
+            Place.longitude.isnot(None),
+            or_(Place.weather_updated_at.is_(None), Place.weather_updated_at < cutoff)
+        ).order_by(Place.weather_updated_at.isnot(None), Place.weather_updated_at, Place.id)
+        if limit:
+            query = query.limit(limit)
+        place_ids = [row[0] for row in query]
+
+        updated = 0
+        chunk_size = settings.CLIMATOLOGY_CHUNK_SIZE
+        for offset in range(0, len(place_ids), chunk_size):
+            places = db.query(Place).filter(Place.id.in_(place_ids[offset:offset + chunk_size])).all()
+            climates = ClimatologyService.fetch([(p.latitude, p.longitude) for p in places])
+            now = datetime.utcnow()
+            for place, climate in zip(places, climates):
+                if climate:
+                    place.weather_cache = climate
+                    place.weather_updated_at = now
+                    updated += 1
+            if any(climates):
+                record_catalog_change(db)
+            db.commit()
+
+        print(f"Climatology refreshed for {updated}/{len(place_ids)} places")
+        return updated
+
+    @staticmethod
+    def for_month(place: Place, month: int) -> Optional[dict]:
+        """
+        Weather summary for `month` (1-12) in the get_forecast format, read from
+        the stored climatology. None if the place has none.
+        """
+        climate = place.weather_cache
+        if not isinstance(climate, dict) or "precipitation" not in climate:
+            return None
+
+        i = month - 1
+        total_precip = climate["precipitation"][i]
+        if total_precip is None:
+            return None
+        # Monthly total; the daily rate is what ranking compares with live lookups
+        per_day = total_precip / DAYS_IN_MONTH[i]
+        return {
+            "avg_max_temp": climate["max_temp"][i],
+            "avg_min_temp": climate["min_temp"][i],
+            "total_precipitation": total_precip,
+            "precipitation_mm_per_day": round(per_day, 2),
+            "condition_summary": rain_condition(per_day),
+            "source": "climatology"
+        }
+
+
+def start_climatology_refresher(session_factory, interval_hours: float):
+    """
+    Runs ClimatologyService.refresh in a daemon thread every interval_hours.
+    """
+    def run():
+        while True:
+            db = session_factory()
+            try:
+                ClimatologyService.refresh(db)
+            except Exception as e:
+                print(f"Climatology refresh failed: {e}")
+            finally:
+                db.close()
+            time.sleep(interval_hours * 3600)
+
+    thread = threading.Thread(target=run, name="climatology-refresh", daemon=True)
+    thread.start()
+    return thread
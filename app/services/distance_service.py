@@ -1,62 +1,220 @@
+import json
+import os
+import sqlite3
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from app.config import settings
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+# Distance Matrix API limits per request
+MAX_ORIGINS = 25
+MAX_DESTINATIONS = 25
+MAX_ELEMENTS = 100
+
+Pair = Tuple[str, str]
+
+
+def _normalize(location: str) -> str:
+    return " ".join(location.lower().split())
+
+
+class PairCache:
+    """
+    Persistent TTL cache of Distance Matrix elements, one row per
+    (origin, destination) pair, in a local SQLite file.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS distance_pairs ("
+            " origin TEXT NOT NULL, destination TEXT NOT NULL,"
+            " element TEXT NOT NULL, expires_at REAL NOT NULL,"
+            " PRIMARY KEY (origin, destination))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, pairs: Sequence[Pair]) -> Dict[Pair, dict]:
+        found = {}
+        now = time.time()
+        with self._lock:
+            for origin, destination in pairs:
+                row = self._conn.execute(
+                    "SELECT element, expires_at FROM distance_pairs WHERE origin = ? AND destination = ?",
+                    (_normalize(origin), _normalize(destination))
+                ).fetchone()
+                if row and row[1] > now:
+                    found[(origin, destination)] = json.loads(row[0])
+        return found
+
+    def put_many(self, elements: Dict[Pair, dict]):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO distance_pairs (origin, destination, element, expires_at) VALUES (?, ?, ?, ?)",
+                [(_normalize(o), _normalize(d), json.dumps(e), expires_at) for (o, d), e in elements.items()]
+            )
+            self._conn.commit()
+
 
 class DistanceService:
+    _session: Optional[requests.Session] = None
+    _executor: Optional[ThreadPoolExecutor] = None
+    _cache: Optional[PairCache] = None
+    _init_lock = threading.Lock()
+
+    @classmethod
+    def _resources(cls) -> Tuple[requests.Session, ThreadPoolExecutor, PairCache]:
+        if cls._session is None:
+            with cls._init_lock:
+                if cls._session is None:
+                    session = requests.Session()
+                    session.mount("https://", HTTPAdapter(
+                        pool_connections=1,
+                        pool_maxsize=settings.DISTANCE_MAX_WORKERS,
+                        max_retries=2
+                    ))
+                    cls._cache = PairCache(settings.DISTANCE_CACHE_PATH, settings.DISTANCE_CACHE_TTL_SECONDS)
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.DISTANCE_MAX_WORKERS,
+                        thread_name_prefix="distance"
+                    )
+                    cls._session = session
+        return cls._session, cls._executor, cls._cache
+
     @staticmethod
-    def get_distance_matrix(origins: list, destinations: list):
+    def _tiles(origins: List[str], destinations: List[str]) -> List[Tuple[List[str], List[str]]]:
         """
-        Calculates distance and duration between origins and destinations using Google Maps API.
-        origins: list of strings (e.g. ["Mumbai", "Delhi"])
-        destinations: list of strings (e.g. ["Goa", "Manali"])
+        Splits origins x destinations into request-sized tiles
+        (<= 25 origins, <= 25 destinations, <= 100 elements each).
         """
-        if not settings.GOOGLE_MAPS_API_KEY:
-            print("WARNING: Google Maps API Key not set.")
-            return None
+        tiles = []
+        for o in range(0, len(origins), MAX_ORIGINS):
+            origin_tile = origins[o:o + MAX_ORIGINS]
+            step = max(1, min(MAX_DESTINATIONS, MAX_ELEMENTS // len(origin_tile)))
+            for d in range(0, len(destinations), step):
+                tiles.append((origin_tile, destinations[d:d + step]))
+        return tiles
 
-        url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-        
-        # Prepare pipe-separated strings
-        origins_str = "|".join(origins)
-        destinations_str = "|".join(destinations)
-        
+    @staticmethod
+    def _fetch_tile(session: requests.Session, origins: List[str], destinations: List[str]) -> Dict[Pair, dict]:
         params = {
-            "origins": origins_str,
-            "destinations": destinations_str,
+            "origins": "|".join(origins),
+            "destinations": "|".join(destinations),
             "key": settings.GOOGLE_MAPS_API_KEY
         }
-        
         try:
-            response = requests.get(url, params=params)
+            response = session.get(DISTANCE_MATRIX_URL, params=params, timeout=settings.DISTANCE_TIMEOUT_SECONDS)
             data = response.json()
-            
+
             if data['status'] != 'OK':
                 print(f"Google Maps API Error: {data.get('error_message', data['status'])}")
-                return None
-                
-            return data
+                return {}
+
+            elements = {}
+            for origin, row in zip(origins, data['rows']):
+                for destination, element in zip(destinations, row['elements']):
+                    elements[(origin, destination)] = element
+            return elements
         except Exception as e:
             print(f"Distance Function Error: {e}")
+            return {}
+
+    @staticmethod
+    def get_elements(origins: Sequence[str], destinations: Sequence[str]) -> Dict[Pair, dict]:
+        """
+        Distance Matrix elements for every (origin, destination) pair.
+        Cached pairs are served locally; the rest are fetched in API-sized
+        tiles concurrently and cached. Pairs that could not be fetched are
+        missing from the result.
+        """
+        if not settings.GOOGLE_MAPS_API_KEY:
+            print("WARNING: Google Maps API Key not set.")
+            return {}
+
+        origins = list(dict.fromkeys(origins))
+        destinations = list(dict.fromkeys(destinations))
+        session, executor, cache = DistanceService._resources()
+
+        pairs = [(o, d) for o in origins for d in destinations]
+        elements = cache.get_many(pairs)
+        missing = [p for p in pairs if p not in elements]
+        if not missing:
+            return elements
+
+        # Only request what's missing: origins that lack the same destinations
+        # share tiles, so a cold full matrix is still tiled as one block.
+        missing_by_origin: Dict[str, List[str]] = {}
+        for o, d in missing:
+            missing_by_origin.setdefault(o, []).append(d)
+        blocks: Dict[Tuple[str, ...], List[str]] = {}
+        for o, dests in missing_by_origin.items():
+            blocks.setdefault(tuple(dests), []).append(o)
+        tiles = []
+        for dests, block_origins in blocks.items():
+            tiles.extend(DistanceService._tiles(block_origins, list(dests)))
+
+        fetched: Dict[Pair, dict] = {}
+        for result in executor.map(lambda t: DistanceService._fetch_tile(session, *t), tiles):
+            fetched.update(result)
+
+        if fetched:
+            cache.put_many(fetched)
+        elements.update(fetched)
+        return elements
+
+    @staticmethod
+    def get_distance_matrix(origins: list, destinations: list):
+        """
+        Calculates distance and duration between origins and destinations using Google Maps API.
+        origins: list of strings (e.g. ["Mumbai", "Delhi"])
+        destinations: list of strings (e.g. ["Goa", "Manali"])
+
+        Returns a Distance Matrix shaped response assembled from cached and
+        freshly fetched pairs, or None if nothing could be resolved.
+        """
+        elements = DistanceService.get_elements(origins, destinations)
+        if not elements:
             return None
 
+        return {
+            "status": "OK",
+            "origin_addresses": list(origins),
+            "destination_addresses": list(destinations),
+            "rows": [
+                {"elements": [elements.get((o, d), {"status": "UNKNOWN_ERROR"}) for d in destinations]}
+                for o in origins
+            ]
+        }
+
+    @staticmethod
+    def filter_reachable(origin: str, destinations: Sequence[str], max_hours: float) -> List[str]:
+        """
+        Destinations reachable from origin within max_hours, in input order.
+        The whole list is resolved with the fewest Distance Matrix round-trips.
+        """
+        elements = DistanceService.get_elements([origin], destinations)
+        reachable = []
+        for destination in destinations:
+            element = elements.get((origin, destination))
+            if not element or element.get('status') != 'OK':
+                continue # Fail safe
+            hours = element['duration']['value'] / 3600
+            if hours <= max_hours:
+                reachable.append(destination)
+        return reachable
+
     @staticmethod
     def is_reachable(origin: str, destination: str, max_hours: int) -> bool:
         """
         Simple check if a destination is reachable within max_hours.
         """
-        data = DistanceService.get_distance_matrix([origin], [destination])
-        if not data:
-            return False # Fail safe
-            
-        try:
-            element = data['rows'][0]['elements'][0]
-            if element['status'] != 'OK':
-                return False
-                
-            duration_text = element['duration']['text'] # e.g. "5 hours 10 mins"
-            duration_value_seconds = element['duration']['value']
-            
-            hours = duration_value_seconds / 3600
-            return hours <= max_hours
-        except Exception:
-            return False
+        return bool(DistanceService.filter_reachable(origin, [destination], max_hours))
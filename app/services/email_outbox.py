@@ -0,0 +1,198 @@
+import random
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.outbox import EmailOutbox
+from app.services.email_service import EmailService, SMTPConnection, smtp_configured
+
+# SMTP errors that mean the server or session is unusable, not that this message is bad
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                     smtplib.SMTPAuthenticationError, smtplib.SMTPHeloError, smtplib.SMTPNotSupportedError)
+
+
+def is_connection_error(error: Exception) -> bool:
+    # SMTPException subclasses OSError, so plain socket errors are told apart explicitly
+    if isinstance(error, smtplib.SMTPException):
+        return isinstance(error, CONNECTION_ERRORS)
+    return isinstance(error, OSError)
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Exponential backoff with jitter: base * 2^(attempts-1), capped, scaled by 0.5-1.0.
+    """
+    delay = min(settings.EMAIL_RETRY_MAX_SECONDS, settings.EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def is_permanent(error: Exception) -> bool:
+    """
+    5xx replies and refused recipients won't succeed on retry. Neither will
+    errors that are neither SMTP nor network errors: they come from the
+    configuration or the message itself, not from a transient failure.
+    """
+    if isinstance(error, (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)):
+        return True
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    # SMTPException subclasses OSError, so this covers the remaining SMTP errors too
+    return not isinstance(error, OSError)
+
+
+class OutboxWorker:
+    """
+    Drains email_outbox over one long-lived SMTP connection. Rows are claimed
+    with a lease (status 'sending', next_attempt_at = lease expiry), so several
+    workers can share the table and a crashed worker's rows are picked up again
+    once the lease runs out; delivery is therefore at-least-once.
+    """
+
+    def __init__(self, session_factory, connection: Optional[SMTPConnection] = None):
+        self.session_factory = session_factory
+        self.connection = connection or SMTPConnection()
+        self.worker_id = uuid.uuid4().hex
+        self.wakeup = threading.Event()
+        self._next_send = 0.0
+        self._warned = False
+
+    def claim(self, db: Session) -> List[EmailOutbox]:
+        now = datetime.utcnow()
+        due = (EmailOutbox.status.in_(("pending", "sending")), EmailOutbox.next_attempt_at <= now)
+        ids = db.scalars(
+            select(EmailOutbox.id).where(*due).order_by(EmailOutbox.next_attempt_at).limit(settings.EMAIL_BATCH_SIZE)
+        ).all()
+        if not ids:
+            return []
+        # The WHERE is re-checked per row, so a row another worker just claimed is skipped
+        db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), *due)
+            .values(status="sending", claimed_by=self.worker_id,
+                    next_attempt_at=now + timedelta(seconds=settings.EMAIL_LEASE_SECONDS))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), EmailOutbox.claimed_by == self.worker_id, EmailOutbox.status == "sending")
+            .order_by(EmailOutbox.id)
+        ).all()
+
+    def _throttle(self):
+        if settings.EMAIL_RATE_PER_SECOND <= 0:
+            return
+        wait = self._next_send - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_send = max(self._next_send, time.monotonic()) + 1.0 / settings.EMAIL_RATE_PER_SECOND
+
+    @staticmethod
+    def _reschedule(row: EmailOutbox, error: Exception):
+        row.attempts += 1
+        row.last_error = f"{type(error).__name__}: {error}"[:2000]
+        row.claimed_by = None
+        if is_permanent(error) or row.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            row.status = "failed"
+        else:
+            row.status = "pending"
+            row.next_attempt_at = datetime.utcnow() + timedelta(seconds=retry_delay(row.attempts))
+
+    def drain_once(self) -> Dict[str, int]:
+        """
+        Claims and sends one batch, writing each outcome back as it happens.
+        Returns counts of sent, retrying and failed rows.
+        """
+        stats = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+        if not smtp_configured():
+            if not self._warned:
+                print("WARNING: SMTP not configured (server, sender or credentials missing). Invites stay in the outbox.")
+                self._warned = True
+            return stats
+
+        db = self.session_factory()
+        try:
+            rows = self.claim(db)
+            stats["claimed"] = len(rows)
+            for i, row in enumerate(rows):
+                self._throttle()
+                try:
+                    message = EmailService.build_message(row.to_email, row.subject, row.body)
+                    self.connection.send(row.to_email, message)
+                except Exception as e:
+                    self._reschedule(row, e)
+                    stats["failed" if row.status == "failed" else "retrying"] += 1
+                    print(f"ERROR: Failed to send email {row.id} to {row.to_email}: {e}")
+                    if is_connection_error(e):
+                        # Server is unreachable; hand the rest of the batch back
+                        # for the same retry time instead of failing each one
+                        self.connection.close()
+                        for rest in rows[i + 1:]:
+                            rest.status, rest.claimed_by = "pending", None
+                            rest.next_attempt_at = row.next_attempt_at
+                        db.commit()
+                        break
+                else:
+                    row.status, row.sent_at, row.claimed_by = "sent", datetime.utcnow(), None
+                    row.attempts += 1
+                    row.last_error = None
+                    stats["sent"] += 1
+                db.commit()
+        finally:
+            db.close()
+        if stats["claimed"]:
+            print(f"Email outbox: {stats}")
+        return stats
+
+    def drain(self) -> Dict[str, int]:
+        """
+        Sends batches until nothing is due.
+        """
+        total = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0}
+        while True:
+            stats = self.drain_once()
+            for key, value in stats.items():
+                total[key] += value
+            if stats["claimed"] < settings.EMAIL_BATCH_SIZE or stats["sent"] == 0:
+                return total
+
+    def run_forever(self, poll_seconds: float):
+        while True:
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Email outbox worker failed: {e}")
+            self.connection.close_if_idle(settings.SMTP_IDLE_SECONDS)
+            self.wakeup.wait(poll_seconds)
+            self.wakeup.clear()
+
+
+_worker: Optional[OutboxWorker] = None
+
+
+def notify_outbox():
+    """
+    Wakes the in-process worker so a new invite goes out without waiting for the next poll.
+    """
+    if _worker is not None:
+        _worker.wakeup.set()
+
+
+def start_outbox_worker(session_factory, poll_seconds: float):
+    """
+    Runs an OutboxWorker in a daemon thread, polling every poll_seconds or when notified.
+    """
+    global _worker
+    _worker = OutboxWorker(session_factory)
+    thread = threading.Thread(target=_worker.run_forever, args=(poll_seconds,), name="email-outbox", daemon=True)
+    thread.start()
+    return thread
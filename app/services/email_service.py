@@ -1,25 +1,82 @@
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Optional, Tuple
 from app.config import settings
 
-class EmailService:
-    @staticmethod
-    def send_invite(to_email: str, group_name: str, survey_link: str):
+
+def smtp_configured() -> bool:
+    # A sender is needed even without login (SMTP_AUTH=false): set SMTP_FROM then
+    return bool(settings.SMTP_SERVER and sender_address()) and (
+        not settings.SMTP_AUTH or bool(settings.SMTP_USERNAME and settings.SMTP_PASSWORD)
+    )
+
+
+def sender_address() -> Optional[str]:
+    return settings.SMTP_FROM or settings.SMTP_USERNAME
+
+
+class SMTPConnection:
+    """
+    One SMTP session reused across messages: connect, STARTTLS and login happen
+    once, and the session is re-opened only if the server dropped it.
+    """
+
+    def __init__(self):
+        self.server: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+
+    def _connect(self):
+        print(f"Connecting to SMTP {settings.SMTP_SERVER}:{settings.SMTP_PORT}")
+        server = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_STARTTLS:
+                server.starttls()
+            if settings.SMTP_AUTH:
+                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+
+    def send(self, to_email: str, message: str):
         """
-        Sends an email invite to a participant with the survey link.
+        Sends one message, reconnecting once if the session was closed by the
+        server (idle timeout). SMTP errors are raised to the caller.
         """
-        if not settings.SMTP_USERNAME or not settings.SMTP_PASSWORD:
-            print("WARNING: SMTP credentials not set. Skipping email.")
-            return False
+        if self.server is None:
+            self._connect()
+        try:
+            self.server.sendmail(sender_address(), to_email, message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connect()
+            self.server.sendmail(sender_address(), to_email, message)
+        self.last_used = time.monotonic()
+
+    def close_if_idle(self, idle_seconds: float):
+        if self.server is not None and time.monotonic() - self.last_used > idle_seconds:
+            self.close()
 
+    def close(self):
+        if self.server is None:
+            return
         try:
-            msg = MIMEMultipart()
-            msg["From"] = settings.SMTP_USERNAME
-            msg["To"] = to_email
-            msg["Subject"] = f"PackVote Invite: Join '{group_name}' Trip Planning!"
+            self.server.quit()
+        except Exception:
+            self.server.close()
+        self.server = None
 
-            body = f"""
+
+class EmailService:
+    @staticmethod
+    def build_invite(group_name: str, survey_link: str) -> Tuple[str, str]:
+        """
+        Subject and HTML body of the invite for a group.
+        """
+        subject = f"PackVote Invite: Join '{group_name}' Trip Planning!"
+        body = f"""
             <html>
             <body>
                 <h2>You've been invited to plan a trip!</h2>
@@ -32,20 +89,49 @@ class EmailService:
             </body>
             </html>
             """
-            msg.attach(MIMEText(body, "html"))
+        return subject, body
 
-            print(f"DEBUG: Connecting to SMTP {settings.SMTP_SERVER}:{settings.SMTP_PORT}...")
-            with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-                server.set_debuglevel(1) # Enable library level debug
-                server.starttls()
-                print("DEBUG: SMTP StartTLS Success. Logging in...")
-                server.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
-                print(f"DEBUG: SMTP Login Success as {settings.SMTP_USERNAME}. Sending mail...")
-                server.sendmail(settings.SMTP_USERNAME, to_email, msg.as_string())
-            
+    @staticmethod
+    def build_message(to_email: str, subject: str, body: str) -> str:
+        msg = MIMEMultipart()
+        msg["From"] = sender_address() or ""
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "html"))
+        return msg.as_string()
+
+    @staticmethod
+    def enqueue_invite(db, to_email: str, group_name: str, survey_link: str, participant_id: Optional[str] = None):
+        """
+        Adds the invite to the outbox in the caller's transaction (works with a
+        Session or an AsyncSession); the outbox worker delivers it after commit.
+        """
+        from app.models.outbox import EmailOutbox
+
+        subject, body = EmailService.build_invite(group_name, survey_link)
+        row = EmailOutbox(participant_id=participant_id, to_email=to_email, subject=subject, body=body)
+        db.add(row)
+        return row
+
+    @staticmethod
+    def send_invite(to_email: str, group_name: str, survey_link: str):
+        """
+        Sends an email invite to a participant with the survey link, right away
+        and on its own connection. The API queues invites with enqueue_invite.
+        """
+        if not smtp_configured():
+            print("WARNING: SMTP credentials not set. Skipping email.")
+            return False
+
+        connection = SMTPConnection()
+        try:
+            subject, body = EmailService.build_invite(group_name, survey_link)
+            connection.send(to_email, EmailService.build_message(to_email, subject, body))
             print(f"SUCCESS: Email sent to {to_email}")
             return True
 
         except Exception as e:
             print(f"ERROR: Failed to send email to {to_email}: {e}")
             return False
+        finally:
+            connection.close()
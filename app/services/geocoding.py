@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import requests
+from typing import Dict, Optional, Tuple
+from app.config import settings
+
+# Common start cities, so most groups never need a geocoding call
+KNOWN_CITIES: Dict[str, Tuple[float, float]] = {
+    "mumbai": (19.0760, 72.8777),
+    "delhi": (28.7041, 77.1025),
+    "new delhi": (28.6139, 77.2090),
+    "bangalore": (12.9716, 77.5946),
+    "bengaluru": (12.9716, 77.5946),
+    "hyderabad": (17.3850, 78.4867),
+    "chennai": (13.0827, 80.2707),
+    "kolkata": (22.5726, 88.3639),
+    "pune": (18.5204, 73.8567),
+    "ahmedabad": (23.0225, 72.5714),
+    "jaipur": (26.9124, 75.7873),
+    "lucknow": (26.8467, 80.9462),
+    "chandigarh": (30.7333, 76.7794),
+    "kochi": (9.9312, 76.2673),
+    "goa": (15.2993, 74.1240),
+    "indore": (22.7196, 75.8577),
+    "bhopal": (23.2599, 77.4126),
+    "nagpur": (21.1458, 79.0882),
+    "surat": (21.1702, 72.8311),
+    "patna": (25.5941, 85.1376),
+    "guwahati": (26.1445, 91.7362),
+    "bhubaneswar": (20.2961, 85.8245),
+    "thiruvananthapuram": (8.5241, 76.9366),
+    "coimbatore": (11.0168, 76.9558),
+    "visakhapatnam": (17.6868, 83.2185),
+}
+
+
+class GeocodingService:
+    """
+    City name -> (latitude, longitude) with a local, persistent cache.
+    Lookups go: memory -> cache file -> built-in city table -> Google Geocoding API.
+    """
+    _cache: Optional[Dict[str, Optional[list]]] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(city: str) -> str:
+        return " ".join(city.lower().split())
+
+    @classmethod
+    def _load_cache(cls) -> Dict[str, Optional[list]]:
+        if cls._cache is None:
+            cache = {}
+            if os.path.exists(settings.GEOCODE_CACHE_PATH):
+                try:
+                    with open(settings.GEOCODE_CACHE_PATH, "r", encoding="utf-8") as f:
+                        cache = json.load(f)
+                except Exception as e:
+                    print(f"Geocode cache unreadable, starting empty: {e}")
+            cls._cache = cache
+        return cls._cache
+
+    @classmethod
+    def _save_cache(cls):
+        path = settings.GEOCODE_CACHE_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cls._cache, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _lookup_remote(city: str) -> Optional[Tuple[float, float]]:
+        """
+        None only when Google knows no such place (ZERO_RESULTS); timeouts,
+        quota and other API errors raise, so they aren't cached as misses.
+        """
+        response = requests.get(
+            "https://maps.googleapis.com/maps/api/geocode/json",
+            params={"address": city, "region": "in", "key": settings.GOOGLE_MAPS_API_KEY},
+            timeout=5
+        )
+        data = response.json()
+        if data.get("status") == "ZERO_RESULTS":
+            return None
+        if data.get("status") != "OK":
+            raise RuntimeError(data.get("error_message", data.get("status")))
+        location = data["results"][0]["geometry"]["location"]
+        return location["lat"], location["lng"]
+
+    @classmethod
+    def geocode(cls, city: Optional[str]) -> Optional[Tuple[float, float]]:
+        if not city:
+            return None
+        key = cls._normalize(city)
+
+        with cls._lock:
+            cache = cls._load_cache()
+            if key in cache:
+                cached = cache[key]
+                return tuple(cached) if cached else None
+
+        coords = KNOWN_CITIES.get(key)
+        if coords is None:
+            if not settings.GOOGLE_MAPS_API_KEY:
+                # Don't persist misses that only happened because no key is configured
+                return None
+            try:
+                coords = cls._lookup_remote(city)
+            except Exception as e:
+                # Transient (timeout, OVER_QUERY_LIMIT, ...): the next call tries again
+                print(f"Geocoding Error: {e}")
+                return None
+
+        with cls._lock:
+            cls._cache[key] = list(coords) if coords else None
+            try:
+                cls._save_cache()
+            except Exception as e:
+                print(f"Geocode cache write failed: {e}")
+        return coords
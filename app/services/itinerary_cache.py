@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+# Bumped when a prompt changes, so answers to the old prompt aren't served
+PROMPT_VERSION = 1
+# Response rows stored by sheet sync start with timestamp, name and email;
+# only the answers after them shape an itinerary
+ANSWERS_START = 3
+
+
+def _text(value: Any) -> str:
+    return " ".join(str(value).lower().split())
+
+
+def canonical_preferences(preferences: Any) -> List:
+    """
+    Order-independent form of a group's preferences: either the participants'
+    stored responses (a list of JSON rows) or a free-text string. Answers are
+    lowercased and whitespace-collapsed, identities are dropped and the result
+    is sorted, so the same answers in another group (or order) match.
+    """
+    if isinstance(preferences, str):
+        return sorted({part for part in (_text(p) for p in re.split(r"[,;\n]", preferences)) if part})
+
+    canonical = []
+    for item in preferences or []:
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError:
+                pass
+        if isinstance(item, list):
+            canonical.append([_text(answer) for answer in item[ANSWERS_START:]])
+        elif item:
+            canonical.append([_text(item)])
+    return sorted(canonical)
+
+
+def weather_bucket(weather_summary: Any) -> Any:
+    """
+    Coarse weather: temperatures to ITINERARY_CACHE_TEMP_BUCKET degrees and
+    rain to 25 mm, so small day-to-day changes in the forecast don't miss.
+    Free text is only normalized.
+    """
+    if isinstance(weather_summary, str):
+        try:
+            weather_summary = json.loads(weather_summary)
+        except ValueError:
+            return _text(weather_summary)
+    if not isinstance(weather_summary, dict):
+        return _text(weather_summary)
+
+    step = settings.ITINERARY_CACHE_TEMP_BUCKET
+    bucketed = {}
+    for key, value in weather_summary.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            size = 25.0 if "precip" in key else step
+            bucketed[key] = round(value / size) * size
+        else:
+            bucketed[key] = _text(value)
+    return bucketed
+
+
+def itinerary_key(kind: str, destination: str, duration: int, preferences: Any, weather_summary: Any = None) -> str:
+    """
+    Content address of an itinerary: hash of the output kind and model, the
+    normalized destination, duration, canonical preferences and bucketed weather.
+    """
+    payload = {
+        "kind": kind,
+        "model": f"{settings.ITINERARY_MODEL}:{settings.GEMINI_MODEL_NAME}",
+        "prompt_version": PROMPT_VERSION,
+        "destination": _text(destination or ""),
+        "duration": int(duration or 0),
+        "preferences": canonical_preferences(preferences),
+        "weather": weather_bucket(weather_summary),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ItineraryStore:
+    """
+    Persistent TTL tier: generated itineraries by key in a local SQLite file.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS itineraries ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM itineraries WHERE key = ?", (key,)
+            ).fetchone()
+        if row and row[1] > time.time():
+            return json.loads(row[0])
+        return None
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO itineraries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl_seconds)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM itineraries")
+            self._conn.commit()
+
+
+class ItineraryCache:
+    """
+    Two-tier cache of generated itineraries: an in-memory LRU in front of the
+    persistent store. Concurrent misses for the same key are coalesced
+    (single flight): one caller generates, the others wait for its result,
+    whether they are sync or async. Failures are not cached.
+    """
+
+    def __init__(self, store: Optional[ItineraryStore] = None, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.ITINERARY_CACHE_MAX_ENTRIES
+        self._store = store
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.counts = {"memory_hits": 0, "store_hits": 0, "misses": 0, "coalesced": 0}
+
+    @property
+    def store(self) -> ItineraryStore:
+        # Opened on first use so importing the module doesn't touch the disk
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = ItineraryStore(settings.ITINERARY_CACHE_PATH, settings.ITINERARY_CACHE_TTL_SECONDS)
+        return self._store
+
+    def _count(self, result: str):
+        from app.metrics import observe_itinerary_cache
+
+        self.counts[result] += 1
+        observe_itinerary_cache(result)
+
+    def _remember(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Cached value from either tier, or None. Counts as a hit or miss.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._count("memory_hits")
+                return self._entries[key]
+        value = self.store.get(key)
+        with self._lock:
+            if value is not None:
+                self._remember(key, value)
+                self._count("store_hits")
+            else:
+                self._count("misses")
+        return value
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether either tier has the key; not counted in the hit rate.
+        """
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.store.get(key) is not None
+
+    def put(self, key: str, value: Any):
+        self.store.put(key, value)
+        with self._lock:
+            self._remember(key, value)
+
+    def _lookup(self, key: str) -> Tuple[Optional[Any], Optional[Future], bool]:
+        """
+        (cached value, in-flight future, whether this caller must generate).
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._count("memory_hits")
+                return self._entries[key], None, False
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count("coalesced")
+                return None, future, False
+
+        value = self.store.get(key)
+        with self._lock:
+            if value is not None:
+                self._remember(key, value)
+                self._count("store_hits")
+                return value, None, False
+            # Re-check: another caller may have started while the store was read
+            future = self._inflight.get(key)
+            if future is not None:
+                self._count("coalesced")
+                return None, future, False
+            future = self._inflight[key] = Future()
+            # Running futures can't be cancelled, so no waiter can cancel it for the others
+            future.set_running_or_notify_cancel()
+            self._count("misses")
+            return None, future, True
+
+    def settle(self, key: str, future: Future, value: Any = None, error: Optional[BaseException] = None):
+        """
+        Completes a claimed key: caches the value (failures are not cached)
+        and hands the result to every waiter.
+        """
+        if error is None:
+            try:
+                self.put(key, value)
+            except Exception as e:
+                print(f"WARNING: Could not persist itinerary {key[:12]}: {e}")
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.done():
+            return
+        if error is None:
+            future.set_result(value)
+        else:
+            if isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+                # The leader's caller went away; waiters must not look cancelled themselves
+                error = RuntimeError("Itinerary generation was cancelled")
+            future.set_exception(error)
+
+    @staticmethod
+    async def _wait(future: Future) -> Any:
+        # Shielded: a waiter timing out or disconnecting leaves the shared future alone
+        return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), settings.GEMINI_TIMEOUT_SECONDS)
+
+    def get_or_generate(self, key: str, generate: Callable[[], Any]) -> Any:
+        value, future, leader = self._lookup(key)
+        if future is None:
+            return value
+        if not leader:
+            return future.result(timeout=settings.GEMINI_TIMEOUT_SECONDS)
+        try:
+            value = generate()
+        except BaseException as e:
+            self.settle(key, future, error=e)
+            raise
+        self.settle(key, future, value)
+        return value
+
+    async def aget_or_generate(self, key: str, generate: Callable[[], Awaitable[Any]]) -> Any:
+        # The first lookup may read the SQLite tier; it's a single indexed row
+        value, future, leader = self._lookup(key)
+        if future is None:
+            return value
+        if not leader:
+            return await self._wait(future)
+        try:
+            value = await generate()
+        except BaseException as e:
+            self.settle(key, future, error=e)
+            raise
+        self.settle(key, future, value)
+        return value
+
+    async def aclaim(self, key: str) -> Tuple[Optional[Any], Optional[Future]]:
+        """
+        Single flight for callers that produce the value themselves (e.g. while
+        streaming it): (value, None) if it is cached or another caller
+        generated it meanwhile, else (None, future) and the caller must
+        produce it and settle(key, future, ...) - also when it fails.
+        """
+        value, future, leader = self._lookup(key)
+        if future is None:
+            return value, None
+        if not leader:
+            return await self._wait(future), None
+        return None, future
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._entries)
+        hits = counts["memory_hits"] + counts["store_hits"] + counts["coalesced"]
+        lookups = hits + counts["misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            **counts,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_hit_rate": round(counts["memory_hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+itinerary_cache = ItineraryCache()
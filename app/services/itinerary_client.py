@@ -0,0 +1,212 @@
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+from app.config import settings
+
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+class _Text:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeItineraryModel:
+    """
+    Local stand-in for the Gemini model (ITINERARY_MODEL=fake): answers any
+    itinerary prompt with a canned plan for the requested destination and
+    number of days, streamed in small chunks with a delay, so routes and the
+    frontend can be exercised without an API key or network.
+    """
+
+    def __init__(self, chunk_delay: Optional[float] = None):
+        self.chunk_delay = settings.FAKE_MODEL_DELAY_SECONDS if chunk_delay is None else chunk_delay
+
+    @staticmethod
+    def respond(prompt: str) -> str:
+        days = re.search(r"(\d+)-day", prompt)
+        days = int(days.group(1)) if days else 3
+        place = re.search(r"(?:trip to|visiting) ([^.\n]+)", prompt)
+        place = place.group(1).strip() if place else "your destination"
+        if "JSON" not in prompt:
+            lines = [f"# {days} days in {place}"]
+            lines += [f"\n## Day {d}\n- Explore {place}, stop {d}\n- Dinner at a local favourite" for d in range(1, days + 1)]
+            return "\n".join(lines) + "\n"
+        plan = {
+            "title": f"Trip to {place}",
+            "summary": f"A {days}-day plan for {place}.",
+            "daily_plan": [{"day": d, "activities": f"Explore {place}, stop {d}"} for d in range(1, days + 1)],
+            "packing_tips": ["Comfortable shoes", "Water bottle"],
+        }
+        return "```json\n" + json.dumps(plan, indent=2) + "\n```"
+
+    def _chunks(self, text: str) -> Iterator[_Text]:
+        for start in range(0, len(text), 40):
+            time.sleep(self.chunk_delay)
+            yield _Text(text[start:start + 40])
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        text = self.respond(prompt)
+        if stream:
+            return self._chunks(text)
+        time.sleep(self.chunk_delay)
+        return _Text(text)
+
+
+class ItineraryClient:
+    """
+    Shared LLM client for itinerary generation. The model is configured once;
+    calls run on a dedicated pool of GEMINI_MAX_CONCURRENCY threads, so the
+    blocking SDK never runs on the event loop and at most that many
+    generations are in flight (the rest queue).
+    """
+
+    def __init__(self, model=None):
+        if model is None:
+            model = self._build_model()
+        self.model = model
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.GEMINI_MAX_CONCURRENCY,
+            thread_name_prefix="itinerary"
+        )
+
+    @staticmethod
+    def _build_model():
+        if settings.ITINERARY_MODEL == "fake":
+            return FakeItineraryModel()
+        if not settings.GEMINI_API_KEY:
+            return None
+        # Deferred: the SDK takes ~0.5s to import and only itinerary routes need it
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        return genai.GenerativeModel(settings.GEMINI_MODEL_NAME)
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    def _generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+    def generate(self, prompt: str) -> str:
+        """
+        Blocking generation for sync callers, still bounded by the shared pool.
+        """
+        return self._executor.submit(self._generate, prompt).result(timeout=settings.GEMINI_TIMEOUT_SECONDS)
+
+    async def agenerate(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._generate, prompt)
+        return await asyncio.wait_for(future, settings.GEMINI_TIMEOUT_SECONDS)
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yields text chunks as the model produces them. The SDK's blocking
+        stream is consumed on the pool and handed over through a queue; if the
+        consumer stops early (client disconnected), the producer stops too.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if stop.is_set():
+                        break
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(self._executor, produce)
+        deadline = loop.time() + settings.GEMINI_TIMEOUT_SECONDS
+        try:
+            while True:
+                item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+
+class DailyPlanStream:
+    """
+    Incremental reader for the itinerary JSON as it streams in: reports the
+    title/summary once they're complete and each daily_plan entry as soon as
+    its object closes, before the rest of the document has arrived.
+    """
+
+    _FIELD = r'"{}"\s*:\s*("(?:[^"\\]|\\.)*")'
+
+    def __init__(self):
+        self.text = ""
+        self._decoder = json.JSONDecoder()
+        self._pos: Optional[int] = None # Next element of daily_plan
+        self._plan_done = False
+        self._meta: Dict[str, str] = {}
+        self._meta_sent = False
+
+    def feed(self, chunk: str) -> List[tuple]:
+        """
+        Adds a chunk; returns new ("meta", {...}) and ("day", {...}) events.
+        """
+        self.text += chunk
+        events = []
+        if not self._meta_sent:
+            for field in ("title", "summary"):
+                if field not in self._meta:
+                    match = re.search(self._FIELD.format(field), self.text)
+                    if match:
+                        self._meta[field] = json.loads(match.group(1))
+            if len(self._meta) == 2:
+                events.append(("meta", dict(self._meta)))
+                self._meta_sent = True
+
+        if self._plan_done:
+            return events
+        if self._pos is None:
+            match = re.search(r'"daily_plan"\s*:\s*\[', self.text)
+            if not match:
+                return events
+            self._pos = match.end()
+        while True:
+            pos = _SEPARATORS.match(self.text, self._pos).end()
+            if pos >= len(self.text):
+                break
+            if self.text[pos] == "]":
+                self._plan_done = True
+                break
+            try:
+                day, end = self._decoder.raw_decode(self.text, pos)
+            except json.JSONDecodeError:
+                break # Entry still streaming
+            self._pos = end
+            events.append(("day", day))
+        return events
+
+
+_client: Optional[ItineraryClient] = None
+_client_lock = threading.Lock()
+
+
+def get_itinerary_client() -> ItineraryClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ItineraryClient()
+    return _client
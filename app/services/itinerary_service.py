@@ -1,20 +1,33 @@
-import google.generativeai as genai
-from app.config import settings
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 import json
 
+from app.services.itinerary_cache import itinerary_cache, itinerary_key
+from app.services.itinerary_client import DailyPlanStream, get_itinerary_client
+
 class ItineraryService:
     @staticmethod
-    def generate_itinerary(destination_name: str, duration: int, group_context: str, weather_summary: str):
+    def group_context(group) -> str:
         """
-        Generates a day-wise itinerary using Gemini.
+        Participants' raw preferences, joined into the prompt's group context.
         """
-        if not settings.GEMINI_API_KEY:
-             return {"error": "Gemini API Key missing"}
-             
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        model = genai.GenerativeModel('gemini-pro')
-        
-        prompt = f"""
+        return " ".join(str(p.preferences) for p in group.participants if p.preferences)
+
+    @staticmethod
+    def group_preferences(group) -> List:
+        """
+        Participants' stored responses, for the itinerary cache key.
+        """
+        return [p.preferences for p in group.participants if p.preferences]
+
+    @staticmethod
+    def cache_key(destination_name: str, duration: int, group_context: str, weather_summary: str,
+                  participant_preferences: Optional[Sequence] = None) -> str:
+        preferences = participant_preferences if participant_preferences is not None else group_context
+        return itinerary_key("plan", destination_name, duration, preferences, weather_summary)
+
+    @staticmethod
+    def prompt(destination_name: str, duration: int, group_context: str, weather_summary: str) -> str:
+        return f"""
         Act as a professional travel planner.
         Create a detailed {duration}-day itinerary for a group trip to {destination_name}.
         
@@ -27,17 +40,85 @@ class ItineraryService:
         - Include budget tips.
         - Format the response as JSON with keys: "title", "summary", "daily_plan" (list of objects with "day", "activities"), "packing_tips".
         """
+
+    @staticmethod
+    def parse(text: str) -> dict:
+        return json.loads(text.replace("```json", "").replace("```", ""))
+
+    @staticmethod
+    def fallback(destination_name: str, error: Exception) -> dict:
+        print(f"Gemini Error: {error}")
+        return {
+            "title": f"Trip to {destination_name}", 
+            "summary": "AI generation failed, but here is a basic outline.", 
+            "daily_plan": [],
+            "error": str(error)
+        }
+
+    @staticmethod
+    def generate_itinerary(destination_name: str, duration: int, group_context: str, weather_summary: str,
+                           participant_preferences: Optional[Sequence] = None):
+        """
+        Generates a day-wise itinerary using Gemini. Plans are cached by content
+        (see itinerary_cache), keyed on participant_preferences when given,
+        else on the group context text.
+        """
+        client = get_itinerary_client()
+        if not client.available:
+             return {"error": "Gemini API Key missing"}
         
+        key = ItineraryService.cache_key(destination_name, duration, group_context, weather_summary,
+                                         participant_preferences)
+        prompt = ItineraryService.prompt(destination_name, duration, group_context, weather_summary)
+        try:
+            # Parsed inside the generator so a malformed answer is never cached
+            return itinerary_cache.get_or_generate(key, lambda: ItineraryService.parse(client.generate(prompt)))
+        except Exception as e:
+            return ItineraryService.fallback(destination_name, e)
+
+    @staticmethod
+    async def stream_itinerary(destination_name: str, duration: int, group_context: str,
+                               weather_summary: str, participant_preferences: Optional[Sequence] = None
+                               ) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Yields ("meta", {title, summary}) and one ("day", {...}) per daily_plan
+        entry as soon as it has been generated, then ("done", full plan) -
+        the same dict generate_itinerary returns, fallback included. A cached
+        plan is replayed as the same events.
+        """
+        client = get_itinerary_client()
+        if not client.available:
+            yield "done", {"error": "Gemini API Key missing"}
+            return
+
+        key = ItineraryService.cache_key(destination_name, duration, group_context, weather_summary,
+                                         participant_preferences)
         try:
-            response = model.generate_content(prompt)
-            
-            text = response.text.replace("```json", "").replace("```", "")
-            return json.loads(text)
+            # Joins a generation already in flight for the same key instead of starting another
+            cached, future = await itinerary_cache.aclaim(key)
         except Exception as e:
-            print(f"Gemini Error: {e}")
-            return {
-                "title": f"Trip to {destination_name}", 
-                "summary": "AI generation failed, but here is a basic outline.", 
-                "daily_plan": [],
-                "error": str(e)
-            }
+            yield "done", ItineraryService.fallback(destination_name, e)
+            return
+        if future is None:
+            yield "meta", {"title": cached.get("title"), "summary": cached.get("summary")}
+            for day in cached.get("daily_plan") or []:
+                yield "day", day
+            yield "done", cached
+            return
+
+        reader = DailyPlanStream()
+        try:
+            async for chunk in client.astream(
+                ItineraryService.prompt(destination_name, duration, group_context, weather_summary)
+            ):
+                for event in reader.feed(chunk):
+                    yield event
+            plan = ItineraryService.parse(reader.text)
+        except BaseException as e:
+            itinerary_cache.settle(key, future, error=e)
+            if not isinstance(e, Exception):
+                raise
+            yield "done", ItineraryService.fallback(destination_name, e)
+            return
+        itinerary_cache.settle(key, future, plan)
+        yield "done", plan
@@ -0,0 +1,201 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.services.itinerary_cache import itinerary_cache
+from app.services.itinerary_client import get_itinerary_client
+from app.services.itinerary_service import ItineraryService
+
+# Terminal job states; anything else is in flight
+FINISHED = ("done", "cached", "failed", "cancelled", "over_budget")
+
+
+class PregenerationJob:
+    """
+    One speculative itinerary for a recommended destination.
+    """
+
+    def __init__(self, group_id: str, destination: str, key: str, rank: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.group_id = group_id
+        self.destination = destination
+        self.key = key
+        self.rank = rank
+        self.status = "queued" # queued -> running -> done | failed, or cancelled / cached / over_budget
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+
+    def finish(self, status: str, error: Optional[str] = None):
+        self.status, self.error, self.finished_at = status, error, time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "group_id": self.group_id,
+            "destination": self.destination,
+            "rank": self.rank,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class PregenerationQueue:
+    """
+    Generates itineraries for a group's top recommendations in the background
+    so the user's click is a cache hit. Plans land in the content-addressed
+    itinerary cache, so POST /groups/{id}/itinerary picks them up (or joins an
+    in-flight generation) without knowing about jobs.
+
+    Speculative work is kept in check three ways: a small dedicated pool
+    (ITINERARY_PREGENERATE_WORKERS, below GEMINI_MAX_CONCURRENCY so user
+    requests always have model slots), a per-group budget of generations per
+    rolling window, and cancellation of a group's queued jobs as soon as its
+    preferences change (ranking cache invalidation).
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.ITINERARY_PREGENERATE_WORKERS,
+            thread_name_prefix="pregenerate"
+        )
+        self._jobs: "OrderedDict[str, List[PregenerationJob]]" = OrderedDict()
+        self._spent: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _budget_left(self, group_id: str, now: float) -> int:
+        spent = self._spent.setdefault(group_id, deque())
+        while spent and spent[0] <= now - settings.ITINERARY_PREGENERATE_BUDGET_WINDOW_SECONDS:
+            spent.popleft()
+        return settings.ITINERARY_PREGENERATE_GROUP_BUDGET - len(spent)
+
+    def _history(self, group_id: str) -> List[PregenerationJob]:
+        jobs = self._jobs.setdefault(group_id, [])
+        self._jobs.move_to_end(group_id)
+        while len(self._jobs) > settings.ITINERARY_PREGENERATE_MAX_GROUPS:
+            self._jobs.popitem(last=False)
+        return jobs
+
+    def submit(self, group, places: List[Dict], top_n: int) -> List[Dict[str, Any]]:
+        """
+        Queues generation for the first top_n ranked places (dicts as returned
+        by the recommendation endpoint). Places already cached or already
+        queued for the same inputs are not generated again. Returns the jobs.
+        """
+        if not get_itinerary_client().available:
+            return []
+        context = ItineraryService.group_context(group)
+        preferences = ItineraryService.group_preferences(group)
+        created = []
+        now = time.time()
+        with self._lock:
+            jobs = self._history(group.id)
+            active = {job.key for job in jobs if job.status not in FINISHED}
+            for rank, place in enumerate(places[:top_n], start=1):
+                # Same weather string the group page sends with its itinerary request
+                weather = json.dumps(place.get("weather_summary") or {})
+                key = ItineraryService.cache_key(place["name"], group.duration, context, weather, preferences)
+                if key in active:
+                    continue
+                job = PregenerationJob(group.id, place["name"], key, rank)
+                jobs.append(job)
+                created.append(job)
+                if itinerary_cache.contains(key):
+                    job.finish("cached")
+                    continue
+                if self._budget_left(group.id, now) <= 0:
+                    job.finish("over_budget")
+                    continue
+                self._spent[group.id].append(now)
+                active.add(key)
+                job.future = self._executor.submit(
+                    self._run, job, place["name"], group.duration, context, weather, preferences
+                )
+            del jobs[:max(len(jobs) - settings.ITINERARY_PREGENERATE_HISTORY, 0)]
+        if created:
+            print(f"Pregeneration for {group.id}: {[job.status for job in created]}")
+        return [job.as_dict() for job in created]
+
+    def _run(self, job: PregenerationJob, destination: str, duration: int, context: str,
+             weather: str, preferences: List):
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status, job.started_at = "running", time.time()
+        plan = ItineraryService.generate_itinerary(
+            destination_name=destination,
+            duration=duration,
+            group_context=context,
+            weather_summary=weather,
+            participant_preferences=preferences,
+        )
+        with self._lock:
+            if job.status == "running":
+                if "error" in plan:
+                    job.finish("failed", plan["error"])
+                else:
+                    job.finish("done")
+
+    def cancel_group(self, group_id: str) -> int:
+        """
+        Cancels the group's queued jobs and marks running ones cancelled (the
+        model call can't be interrupted; its plan is keyed by the old inputs,
+        so it's never served for the new ones). Returns the number cancelled.
+        """
+        cancelled = 0
+        with self._lock:
+            for job in self._jobs.get(group_id, []):
+                if job.status in ("queued", "running"):
+                    if job.future is not None:
+                        job.future.cancel()
+                    job.finish("cancelled", "Group preferences changed")
+                    cancelled += 1
+        if cancelled:
+            print(f"Pregeneration for {group_id}: cancelled {cancelled} jobs")
+        return cancelled
+
+    def jobs(self, group_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.as_dict() for job in self._jobs.get(group_id, [])]
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Job counts by state and everything currently queued or running.
+        """
+        with self._lock:
+            jobs = [job for group_jobs in self._jobs.values() for job in group_jobs]
+        counts: Dict[str, int] = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": settings.ITINERARY_PREGENERATE_WORKERS,
+            "groups": len(self._jobs),
+            "counts": counts,
+            "in_flight": [job.as_dict() for job in jobs if job.status not in FINISHED],
+        }
+
+
+_queue: Optional[PregenerationQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_pregeneration_queue() -> PregenerationQueue:
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                from app.recommender.result_cache import ranking_cache
+
+                _queue = PregenerationQueue()
+                ranking_cache.on_invalidate(_queue.cancel_group)
+    return _queue
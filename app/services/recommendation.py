@@ -1,164 +1,284 @@
-from sqlalchemy.orm import Session
+import time
+from sqlalchemy.orm import Session, Query, load_only
 from app.models.place import Place
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict, Sequence, Tuple
+from app.config import settings
+from app.recommender.season import ALL_MONTHS, month_bit, month_index, parse_best_time
+from app.metrics import observe_candidates, stage
+from sqlalchemy import Select, or_, select
+
+# Rain penalty thresholds: the old 200 and 100 mm over the 15-day live window
+HEAVY_RAIN_MM_PER_DAY = 13.3
+RAIN_MM_PER_DAY = 6.7
+
+# Columns rank_places reads (plus what the API returns); skips embedding and bookkeeping columns
+RANK_COLUMNS = (
+    Place.id, Place.name, Place.state, Place.description, Place.url, Place.best_time,
+    Place.best_months, Place.min_budget, Place.latitude, Place.longitude, Place.weather_cache,
+)
 
 class RecommendationService:
     def __init__(self, db: Session):
         self.db = db
+        # False after rank_places if some weather lookups were still pending
+        self.weather_complete = True
 
     def filter_places(self, 
                       min_budget: Optional[float] = None, 
                       max_budget: Optional[float] = None,
-                      preferred_states: Optional[List[str]] = None) -> List[Place]:
+                      preferred_states: Optional[List[str]] = None,
+                      travel_month: Optional[str] = None) -> List[Place]:
         """
         Apply hard constraints to filter places.
+        If travel_month is given, off-season places are dropped in SQL via the
+        best_months bitmask (places with an unknown season are kept).
+        """
+        with stage("filter"):
+            places = self.filter_query(min_budget, max_budget, preferred_states, travel_month).all()
+        observe_candidates("filter", len(places))
+        return places
+
+    def filter_query(self,
+                     min_budget: Optional[float] = None,
+                     max_budget: Optional[float] = None,
+                     preferred_states: Optional[List[str]] = None,
+                     travel_month: Optional[str] = None,
+                     columns: Optional[Sequence] = None) -> Query:
+        """
+        Unexecuted, id-ordered query behind filter_places, so callers can
+        paginate, stream or restrict the loaded columns.
         """
-        query = self.db.query(Place)
+        query = self.db.query(Place).order_by(Place.id)
+        if columns:
+            query = query.options(load_only(*columns))
+        return query.filter(*self.filter_criteria(min_budget, max_budget, preferred_states, travel_month))
+
+    @staticmethod
+    def filter_statement(min_budget: Optional[float] = None,
+                         max_budget: Optional[float] = None,
+                         preferred_states: Optional[List[str]] = None,
+                         travel_month: Optional[str] = None,
+                         columns: Optional[Sequence] = None) -> Select:
+        """
+        Same filter as filter_query as a 2.0-style select, for AsyncSession.
+        """
+        statement = select(Place).order_by(Place.id)
+        if columns:
+            statement = statement.options(load_only(*columns))
+        return statement.where(*RecommendationService.filter_criteria(
+            min_budget, max_budget, preferred_states, travel_month
+        ))
+
+    @staticmethod
+    def filter_criteria(min_budget: Optional[float] = None,
+                        max_budget: Optional[float] = None,
+                        preferred_states: Optional[List[str]] = None,
+                        travel_month: Optional[str] = None) -> list:
+        criteria = []
         
         # Budget constraint (assuming we have cost data, otherwise we use dummy logic or skip)
         if max_budget:
             # Placeholder: In a real app, we'd have a 'cost' column. 
             # For now, we rely on the 'min_budget' field we added.
-            query = query.filter(Place.min_budget <= max_budget)
+            # Places with an unknown budget are kept, like unknown seasons
+            criteria.append(or_(Place.min_budget.is_(None), Place.min_budget <= max_budget))
 
         if preferred_states:
-             query = query.filter(Place.state.in_(preferred_states))
+             criteria.append(Place.state.in_(preferred_states))
+
+        month = month_index(travel_month)
+        if month is not None:
+            criteria.append(or_(
+                Place.best_months.is_(None),
+                Place.best_months.bitwise_and(month_bit(month)) != 0
+            ))
              
-        return query.all()
+        return criteria
 
     def check_season(self, travel_month: str, best_time: str) -> bool:
         """
         Parses 'October to March' or 'All year round' to check if travel_month is valid.
-        Simple heuristic for MVP.
+        Unknown months or unparseable best_time strings are allowed.
         """
-        if not best_time or "year" in best_time.lower():
-            return True
-            
-        months = ["january", "february", "march", "april", "may", "june", 
-                  "july", "august", "september", "october", "november", "december"]
-        
-        travel_month = travel_month.lower()
-        if travel_month not in months:
+        month = month_index(travel_month)
+        mask = parse_best_time(best_time)
+        if month is None or mask is None:
             return True # Default to allow if undecided
+        return bool(mask & month_bit(month))
 
-        # Simple logic: Check if month name appears in best_time string or strictly parse range
-        # For MVP: If the month is explicitly mentioned or it says "Oct - Mar"
-        # We'll just do a basic substring check for now or handle the range in a helper if needed.
-        # But for 'Constraint-Aware', let's try to be slightly smarter.
-        
-        # Expand ranges? 'October to March' -> Oct, Nov, Dec, Jan, Feb, Mar
-        # This is complex to perfect, keeping it simple:
-        # If best_time indicates a season (e.g. "Winter") and month maps to it?
-        # Let's rely on loose matching + OpenAI/Gemini later? 
-        # No, "Logic based".
-        
-        # Let's just return True for now to avoid over-filtering, 
-        # but penalize in scoring if we can't find match.
-        return True 
-
-    def rank_places(self, places: List[Place], group_prefs: dict) -> List[Place]:
+    def rank_places(self, places: List[Place], group_prefs: dict, limit: Optional[int] = None,
+                    after: Optional[Tuple[float, int]] = None,
+                    weather_deadline_at: Optional[float] = None) -> List[Place]:
         """
         Constraint-Aware Ranking Pipeline:
-        1. Filter/Score by Static Constraints (Budget, Season).
+        1. Filter/Score by Static Constraints (Budget, Season, Distance).
         2. Enrich with Dynamic Data (Weather).
         3. Rank by Preference (Text Similarity).
+
+        Features are scored as aligned arrays; only the top `limit` places
+        (all places if None) are returned, each with its score breakdown.
+        `after` is a (rank_score, id) keyset cursor: only places ranked after it
+        are returned. Places must be in id order for ties to paginate stably.
+        `weather_deadline_at` (time.monotonic()) bounds the live weather
+        lookups instead of WEATHER_DEADLINE_SECONDS from now; rank_in_batches
+        shares one across its batches.
         """
         if not places:
              return []
 
-        from app.services.weather_service import WeatherService
-        from app.services.distance_service import DistanceService
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        from sklearn.metrics.pairwise import cosine_similarity
+        import numpy as np
+        from app.recommender.enrichment import get_weather_enricher
+        from app.services.climatology import ClimatologyService
+        from app.services.geocoding import GeocodingService
+        from app.recommender.geo import coordinates, haversine_km, distance_scores as score_distances
+        from app.recommender.text_index import get_catalog_index
+        from app.recommender.embeddings import get_embedding_index
+        from app.recommender.scoring import ScoringEngine
         
         # Unpack prefs
         travel_month = group_prefs.get("travel_month", "December")
         start_city = group_prefs.get("start_city", "Mumbai")
         combined_text = group_prefs.get("combined_text", "")
-        
-        scored_places = []
+        max_distance_km = group_prefs.get("max_distance_km", settings.DISTANCE_MAX_RADIUS_KM)
         
         # --- Step 1: Filter & Initial Scoping ---
         # We assume 'places' passed in are already budget-filtered by 'filter_places'
         
-        candidates = []
-        for p in places:
-            # Seasonality Check (Soft Constraint)
-            is_good_season = self.check_season(travel_month, p.best_time)
-            season_score = 1.0 if is_good_season else 0.5
-            candidates.append({"place": p, "season_score": season_score})
+        # Distance: haversine from the (cached) start city geocode in one pass.
+        # Places beyond the optional radius are dropped before the expensive stages.
+        observe_candidates("rank", len(places))
+        with stage("distance"):
+            origin = GeocodingService.geocode(start_city)
+            if origin:
+                lats, lons = coordinates(places)
+                distances_km = haversine_km(origin[0], origin[1], lats, lons)
+                if max_distance_km:
+                    keep = np.flatnonzero(~(distances_km > max_distance_km))
+                    places = [places[i] for i in keep]
+                    distances_km = distances_km[keep]
+                distance_scores = score_distances(distances_km, settings.DISTANCE_SCALE_KM)
+            else:
+                # Unknown start city: neutral distance score
+                distances_km = np.full(len(places), np.nan)
+                distance_scores = np.ones(len(places))
+
+        n = len(places)
+        observe_candidates("in_radius", n)
+        if n == 0:
+            return []
+
+        # Seasonality Check (Soft Constraint): bitwise test of the precompiled
+        # best_months masks; unknown seasons count as in season.
+        with stage("season"):
+            month = month_index(travel_month)
+            if month is None:
+                season_scores = np.ones(n)
+            else:
+                masks = np.fromiter(
+                    (p.best_months if p.best_months is not None else ALL_MONTHS for p in places),
+                    dtype=np.int64, count=n
+                )
+                season_scores = np.where(masks & month_bit(month), 1.0, 0.5)
 
         # --- Step 2: Dynamic Data Enrichment (Weather) ---
-        # We can't do this for 1000 places, but for 50 it's fine.
-        month_idx = 12 # Default
-        try:
-            months = ["january", "february", "march", "april", "may", "june", 
-                      "july", "august", "september", "october", "november", "december"]
-            month_idx = months.index(travel_month.lower()) + 1
-        except:
-             pass
-
-        for item in candidates:
-            p = item["place"]
-            if p.latitude and p.longitude:
-                # Mock year 2024 for historical lookback
-                weather = WeatherService.get_forecast(p.latitude, p.longitude, 2024, month_idx)
+        month_idx = month + 1 if month is not None else 12 # Default
+
+        # Precomputed monthly climatology first (no network). Places without one
+        # fall back to live lookups bounded by WEATHER_DEADLINE_SECONDS; late or
+        # failed ones keep the neutral score and are refreshed in the background.
+        with stage("weather"):
+            precipitation = np.full(n, np.nan)
+            weather_info = {}
+            geocoded = []
+            for i, p in enumerate(places):
+                climate = ClimatologyService.for_month(p, month_idx)
+                if climate:
+                    precipitation[i] = climate['precipitation_mm_per_day']
+                    weather_info[i] = climate
+                elif p.latitude and p.longitude:
+                    geocoded.append(i)
+            observe_candidates("weather_live", len(geocoded))
+            deadline = None
+            if weather_deadline_at is not None:
+                deadline = max(0.0, weather_deadline_at - time.monotonic())
+            # Mock year 2024 for historical lookback
+            forecasts = get_weather_enricher().enrich(
+                [(places[i].latitude, places[i].longitude) for i in geocoded], 2024, month_idx, deadline
+            ) if geocoded else []
+            for i, weather in zip(geocoded, forecasts):
                 if weather:
-                    # Penalize Rain
-                    rain_penalty = 1.0
-                    if weather['total_precipitation'] > 100:
-                        rain_penalty = 0.6
-                    elif weather['total_precipitation'] > 200:
-                        rain_penalty = 0.3
-                    
-                    item["weather_score"] = rain_penalty
-                    item["weather_info"] = weather
-                else:
-                    item["weather_score"] = 0.8 # Default neutral
+                    precipitation[i] = weather['precipitation_mm_per_day']
+                    weather_info[i] = weather
+            self.weather_complete = all(forecasts)
+
+            # Penalize Rain (mm/day, so monthly climatology and the live
+            # window compare); places without weather get a neutral 0.8
+            weather_scores = np.select(
+                [np.isnan(precipitation), precipitation > HEAVY_RAIN_MM_PER_DAY, precipitation > RAIN_MM_PER_DAY],
+                [0.8, 0.3, 0.6],
+                default=1.0
+            )
+
+        # --- Step 3: Preference Matching (TF-IDF or embeddings) ---
+        # Uses a prebuilt index: only the query is transformed here.
+        with stage("text"):
+            if settings.RANKING_TEXT_MODEL == "embedding":
+                index = get_embedding_index()
             else:
-                 item["weather_score"] = 0.8
-                 
-        # --- Step 3: Distance Check (Limited to top 10 candidates to save quota?) ---
-        # For now, let's skip expensive Distance API calls for *ranking* 
-        # and just use it for the final detail view or top 3.
-        # Or use Haversine if we have lat/lon of start city (we'd need to geocode start city first).
-        # We'll just assign a neutral distance score.
-        for item in candidates:
-            item["distance_score"] = 1.0
-
-        # --- Step 4: Preference Matching (TF-IDF) ---
-        corpus = [item["place"].description if item["place"].description else "" for item in candidates]
-        if combined_text and corpus:
-            try:
-                vectorizer = TfidfVectorizer(stop_words='english')
-                # Add query to fit
-                tfidf_matrix = vectorizer.fit_transform(corpus + [combined_text])
-                query_vec = tfidf_matrix[-1]
-                doc_vecs = tfidf_matrix[:-1]
-                sim_scores = cosine_similarity(query_vec, doc_vecs).flatten()
-            except:
-                sim_scores = [0.0] * len(candidates)
-        else:
-             sim_scores = [0.0] * len(candidates)
-             
+                index = get_catalog_index(self.db)
+            missing = [p for p in places if p.id not in index]
+            if missing:
+                index.add_places(missing)
+            sim_scores = index.similarity(combined_text, [p.id for p in places])
+
         # --- Final Scoring ---
-        final_results = []
-        for i, item in enumerate(candidates):
-            # Weights
-            # Sim: 40%, Weather: 30%, Season: 20%, Distance: 10%
-            score = (
-                0.4 * sim_scores[i] +
-                0.3 * item["weather_score"] +
-                0.2 * item["season_score"] +
-                0.1 * item["distance_score"]
-            )
-            p = item["place"]
-            setattr(p, "match_score", round(score * 100, 1))
-            
-            
-            setattr(p, "weather_summary", item.get("weather_info", {}))
-            
-            final_results.append(p)
-            
-        final_results.sort(key=lambda x: getattr(x, "match_score", 0), reverse=True)
+        with stage("scoring"):
+            engine = ScoringEngine()
+            top, scores, breakdowns = engine.rank({
+                "similarity": sim_scores,
+                "weather": weather_scores,
+                "season": season_scores,
+                "distance": distance_scores,
+            }, k=limit, ids=np.fromiter((p.id for p in places), dtype=np.int64, count=n), after=after)
+
+            final_results = []
+            for i, score, breakdown in zip(top.tolist(), scores.tolist(), breakdowns):
+                p = places[i]
+                setattr(p, "rank_score", score)
+                setattr(p, "match_score", round(score * 100, 1))
+                setattr(p, "score_breakdown", breakdown)
+                setattr(p, "weather_summary", weather_info.get(i, {}))
+                setattr(p, "distance_km", None if np.isnan(distances_km[i]) else round(float(distances_km[i]), 1))
+                final_results.append(p)
+
         return final_results
+
+    def rank_in_batches(self, query: Query, group_prefs: dict, limit: int,
+                        batch_size: int) -> Iterator[Tuple[List[Place], List[Place]]]:
+        """
+        Ranks an id-ordered candidate query batch by batch, keeping a running
+        top `limit`. After each batch yields (places that just entered the
+        top, current top in order), so results can be streamed before the
+        whole catalog has been scored. Live weather lookups of all batches
+        share one WEATHER_DEADLINE_SECONDS; once it has passed, batches only
+        use cached weather (the rest is fetched in the background).
+        """
+        top: List[Place] = []
+        last_id = None
+        weather_deadline_at = time.monotonic() + settings.WEATHER_DEADLINE_SECONDS
+        weather_complete = True
+        while True:
+            batch_query = query if last_id is None else query.filter(Place.id > last_id)
+            batch = batch_query.limit(batch_size).all()
+            if not batch:
+                return
+            last_id = batch[-1].id
+
+            ranked = self.rank_places(batch, group_prefs, limit=limit, weather_deadline_at=weather_deadline_at)
+            weather_complete = weather_complete and self.weather_complete
+            self.weather_complete = weather_complete
+            merged = sorted(top + ranked, key=lambda p: (-p.rank_score, p.id))[:limit]
+            previous = {p.id for p in top}
+            entered = [p for p in merged if p.id not in previous]
+            top = merged
+            yield entered, top
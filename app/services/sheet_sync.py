@@ -1,74 +1,351 @@
 import os.path
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from app.config import settings
+from sqlalchemy import func, or_, select
 from sqlalchemy.orm import Session
 from app.models.group_schema import Participant
+from app.models.sync_state import SheetSyncPending, SheetSyncState
+from app.recommender.result_cache import ranking_cache
 import json
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
-SPREADSHEET_ID = "PLACEHOLDER_SHEET_ID" # TODO: User needs to provide this or we create one
+SPREADSHEET_ID = settings.SHEETS_SPREADSHEET_ID # TODO: User needs to provide this or we create one
+# Sheet row of the first response (row 1 is the header)
+FIRST_DATA_ROW = 2
+# Responses are read from column B onwards
+FIRST_COLUMN = "B"
+# Watermark scope of the one-pass sync over every group, and of the unmatched rows kept for retry
+ALL_GROUPS = "all"
+
+_clients = threading.local()
+
+
+@lru_cache(maxsize=1)
+def load_credentials():
+    """
+    Google credentials, read from disk once per process.
+    """
+    creds = None
+    if os.path.exists('token.json'):
+        from google.oauth2.credentials import Credentials
+        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+
+    # If no valid token, let's assume Service Account logic or manual auth flow (omitted for brevity in MVP)
+    # Using Service Account is better for server-side
+    if settings.GOOGLE_SERVICE_ACCOUNT_FILE:
+         from google.oauth2 import service_account
+         creds = service_account.Credentials.from_service_account_file(
+            settings.GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    return creds
+
+
+def sheets_client(creds):
+    """
+    Sheets API client, built once per thread (the underlying httplib2
+    connection isn't thread-safe) instead of once per request.
+    """
+    client = getattr(_clients, "client", None)
+    if client is None or _clients.creds is not creds:
+        from googleapiclient.discovery import build
+        client = build('sheets', 'v4', credentials=creds, cache_discovery=False)
+        _clients.client, _clients.creds = client, creds
+    return client
+
+
+def group_id_index() -> Optional[int]:
+    """
+    Position of the group-id answer within a response row, from SHEETS_GROUP_ID_COLUMN.
+    """
+    column = (settings.SHEETS_GROUP_ID_COLUMN or "").strip().upper()
+    if not column:
+        return None
+    if len(column) != 1 or not FIRST_COLUMN < column <= "Z":
+        raise ValueError(f"SHEETS_GROUP_ID_COLUMN must be a single column after {FIRST_COLUMN}, got {column!r}")
+    return ord(column) - ord(FIRST_COLUMN)
+
+
+def row_group(row: List[str], gid_index: Optional[int]) -> Optional[str]:
+    """
+    Group id answered in a response row, if the sheet has a group-id column.
+    """
+    if gid_index is not None and len(row) > gid_index:
+        return row[gid_index].strip() or None
+    return None
+
 
 class SheetSyncService:
     def __init__(self, db: Session):
         self.db = db
-        self.creds = None
-        if os.path.exists('token.json'):
-            self.creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-        
-        # If no valid token, let's assume Service Account logic or manual auth flow (omitted for brevity in MVP)
-        # Using Service Account is better for server-side
-        if settings.GOOGLE_SERVICE_ACCOUNT_FILE:
-             from google.oauth2 import service_account
-             self.creds = service_account.Credentials.from_service_account_file(
-                settings.GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-
-    def sync_responses(self, group_id: str):
-        if not self.creds:
-            print("No Google Credentials found.")
-            return
+        self.creds = load_credentials()
 
-        service = build('sheets', 'v4', credentials=self.creds)
+    def fetch_rows(self, start_row: int) -> List[List[str]]:
+        """
+        Response rows from sheet row `start_row` onwards (columns B:Z).
+        """
+        service = sheets_client(self.creds)
 
-        # Call the Sheets API
         # Range relies on the specific form layout
-        sheet = service.spreadsheets()
-        result = sheet.values().get(spreadsheetId=SPREADSHEET_ID, range="Form Responses 1!B2:Z").execute()
-        values = result.get('values', [])
+        sheet_range = f"{settings.SHEETS_RESPONSES_SHEET}!{FIRST_COLUMN}{start_row}:Z"
+        result = service.spreadsheets().values().get(spreadsheetId=SPREADSHEET_ID, range=sheet_range).execute()
+        return result.get('values', [])
+
+    @staticmethod
+    def _scoped(model, scope: str):
+        return (
+            model.spreadsheet_id == SPREADSHEET_ID,
+            model.sheet_name == settings.SHEETS_RESPONSES_SHEET,
+            model.scope == scope,
+        )
+
+    def _state(self, scope: str) -> SheetSyncState:
+        state = self.db.scalar(select(SheetSyncState).where(*self._scoped(SheetSyncState, scope)))
+        if state is None:
+            state = SheetSyncState(
+                spreadsheet_id=SPREADSHEET_ID,
+                sheet_name=settings.SHEETS_RESPONSES_SHEET,
+                scope=scope,
+                last_row=FIRST_DATA_ROW - 1,
+            )
+            self.db.add(state)
+        return state
+
+    def last_synced(self, scope: str = ALL_GROUPS) -> Optional[datetime]:
+        return self.db.scalar(select(SheetSyncState.synced_at).where(*self._scoped(SheetSyncState, scope)))
+
+    def _pending(self, scope: str, full: bool) -> Dict[int, SheetSyncPending]:
+        """
+        Unmatched rows kept for retry, by sheet row. Expired ones are dropped,
+        and all of them on a full re-read (which sees every row again).
+        """
+        cutoff = datetime.utcnow() - timedelta(days=settings.SHEETS_UNMATCHED_RETRY_DAYS)
+        pending = {}
+        for entry in self.db.scalars(select(SheetSyncPending).where(*self._scoped(SheetSyncPending, scope))):
+            if full or entry.first_seen < cutoff:
+                self.db.delete(entry)
+            else:
+                pending[entry.sheet_row] = entry
+        return pending
+
+    @staticmethod
+    def _rows(pending: Dict[int, SheetSyncPending], start_row: int,
+              values: List[List[str]]) -> List[Tuple[int, List[str]]]:
+        # (sheet row, values): the retried rows before the watermark, then the new ones
+        rows = [(sheet_row, entry.row) for sheet_row, entry in sorted(pending.items()) if sheet_row < start_row]
+        return rows + [(start_row + i, row) for i, row in enumerate(values)]
+
+    def _resolve(self, scope: str, pending: Dict[int, SheetSyncPending], sheet_row: int,
+                 row: List[str], matched: bool):
+        """
+        Keeps an unmatched row for the next sync, or forgets it once matched.
+        """
+        if matched:
+            entry = pending.pop(sheet_row, None)
+            if entry is not None:
+                self.db.delete(entry)
+        elif sheet_row not in pending:
+            pending[sheet_row] = SheetSyncPending(
+                spreadsheet_id=SPREADSHEET_ID, sheet_name=settings.SHEETS_RESPONSES_SHEET, scope=scope,
+                sheet_row=sheet_row, row=row, first_seen=datetime.utcnow(),
+            )
+            self.db.add(pending[sheet_row])
+
+    @staticmethod
+    def _apply(participant: Participant, row: List[str]) -> bool:
+        """
+        Stores the row on the participant; False if it was already applied.
+        """
+        # Store raw row as preferences for now
+        preferences = json.dumps(row)
+        if participant.has_responded and participant.preferences == preferences:
+            return False
+        participant.preferences = preferences
+        participant.has_responded = 1
+        return True
+
+    def _advance(self, state: SheetSyncState, start_row: int, values: List[List[str]]):
+        if values:
+            state.last_row = start_row + len(values) - 1
+            state.last_timestamp = str(values[-1][0]) if values[-1] else state.last_timestamp
+        state.synced_at = datetime.utcnow()
 
-        if not values:
-            print('No data found.')
-            return
+    def sync_responses(self, group_id: str, full: bool = False) -> Dict[str, int]:
+        """
+        Applies responses appended since the last sync to the group's
+        participants, in one transaction. `full` re-reads the sheet from the
+        first response (e.g. after responses were edited in place).
+        Rows matching no participant of any group (or naming this group in
+        their group-id answer without matching) are kept once for the whole
+        sheet, so sync_all and every group's sync retry them; a group sync
+        re-reads only those that now match one of its participants.
+        Returns row counts: read, synced, skipped (malformed or unchanged),
+        unmatched (no participant with that email in the group), retried
+        (earlier unmatched rows read again) and pending (rows of the sheet
+        still unmatched).
+        """
+        if not self.creds:
+            print("No Google Credentials found.")
+            return {"error": "No Google Credentials found."}
+
+        gid_index = group_id_index()
+        state = self._state(group_id)
+        start_row = FIRST_DATA_ROW if full else state.last_row + 1
+        values = self.fetch_rows(start_row)
+        # Shared with the other groups: a full re-read of this group doesn't clear it
+        pending = self._pending(ALL_GROUPS, full=False)
+
+        # One query for every participant of the group, matched by email in memory
+        participants = {
+            p.email.strip().lower(): p
+            for p in self.db.scalars(select(Participant).where(Participant.group_id == group_id))
+            if p.email
+        }
+        rows = [
+            (sheet_row, row) for sheet_row, row in self._rows(pending, start_row, values)
+            if sheet_row >= start_row
+            or (row_group(row, gid_index) in (None, group_id) and row[2].strip().lower() in participants)
+        ]
 
-        # Simple Logic: Match by Phone Number (Column C assumed) or ID if passed in URL
-        # For this MVP, let's look for a unique identifier column or just update based on phone match
-        
         # Structure: [Timestamp, Questions..., Participant_ID (if we injected it)]
-        # We need to define the Mapping strictly.
-        
-        for row in values:
-            if len(row) < 5: continue
-            
-            # Hypothetical Mapping based on User's Table
-            # 0: Timestamp
-            # 1: Name?
-            # 2: Email (Key to match)
-            # 3: Activities
-            # 4: Budget
-            # ...
-            
-            email_input = row[2] 
-            
-            participant = self.db.query(Participant).filter(
-                Participant.group_id == group_id, 
-                Participant.email == email_input
-            ).first()
-
-            if participant:
-                # Store raw row as preferences for now
-                participant.preferences = json.dumps(row)
-                participant.has_responded = 1
-                self.db.commit()
-                print(f"Updated preferences for {participant.name}")
+        # Hypothetical Mapping based on User's Table
+        # 0: Timestamp
+        # 1: Name?
+        # 2: Email (Key to match)
+        # 3: Activities
+        # 4: Budget
+        # ...
+        # Emails of other groups' participants: those rows are theirs, not unmatched
+        others = {row[2].strip().lower() for _, row in rows if len(row) >= 5} - participants.keys()
+        claimed = set(self.db.scalars(
+            select(func.lower(Participant.email)).where(func.lower(Participant.email).in_(others))
+        )) if others else set()
+
+        stats = {"read": len(values), "synced": 0, "skipped": 0, "unmatched": 0,
+                 "retried": len(rows) - len(values)}
+        for sheet_row, row in rows:
+            if len(row) < 5:
+                stats["skipped"] += 1
+                continue
+
+            email = row[2].strip().lower()
+            participant = participants.get(email)
+            gid = row_group(row, gid_index)
+            if gid == group_id or (gid is None and (participant is not None or email not in claimed)):
+                self._resolve(ALL_GROUPS, pending, sheet_row, row, participant is not None)
+            if participant is None:
+                stats["unmatched"] += 1
+                continue
+
+            if self._apply(participant, row):
+                stats["synced"] += 1
+            else:
+                stats["skipped"] += 1
+
+        self._advance(state, start_row, values)
+        self.db.commit()
+
+        stats["pending"] = len(pending)
+        if stats["synced"]:
+            ranking_cache.invalidate(group_id)
+        print(f"Sheet sync for {group_id}: {stats} (watermark row {state.last_row})")
+        stats["last_row"] = state.last_row
+        return stats
+
+    def sync_all(self, full: bool = False) -> Dict[str, int]:
+        """
+        Reads the new responses once and applies each row to the group named in
+        its group-id answer (SHEETS_GROUP_ID_COLUMN). Rows without one fall back
+        to the email, if it belongs to exactly one group. Unmatched rows are
+        retried on later syncs. Same counts as sync_responses, plus the number
+        of groups updated.
+        """
+        if not self.creds:
+            print("No Google Credentials found.")
+            return {"error": "No Google Credentials found."}
+
+        gid_index = group_id_index()
+        state = self._state(ALL_GROUPS)
+        start_row = FIRST_DATA_ROW if full else state.last_row + 1
+        values = self.fetch_rows(start_row)
+        pending = self._pending(ALL_GROUPS, full)
+        rows = [(sheet_row, row) for sheet_row, row in self._rows(pending, start_row, values) if len(row) >= 5]
+        group_ids = {gid for gid in (row_group(row, gid_index) for _, row in rows) if gid}
+        loose_emails = {row[2].strip().lower() for _, row in rows if not row_group(row, gid_index)}
+
+        # One query for the participants of every group (or email) the rows mention
+        by_group: Dict[tuple, Participant] = {}
+        by_email: Dict[str, List[Participant]] = {}
+        if group_ids or loose_emails:
+            criteria = []
+            if group_ids:
+                criteria.append(Participant.group_id.in_(group_ids))
+            if loose_emails:
+                criteria.append(func.lower(Participant.email).in_(loose_emails))
+            for p in self.db.scalars(select(Participant).where(or_(*criteria))):
+                if not p.email:
+                    continue
+                email = p.email.strip().lower()
+                by_group[(p.group_id, email)] = p
+                by_email.setdefault(email, []).append(p)
+
+        retried = sum(1 for sheet_row, _ in rows if sheet_row < start_row)
+        stats = {"read": len(values), "synced": 0, "skipped": len(values) - (len(rows) - retried),
+                 "unmatched": 0, "retried": retried}
+        updated = set()
+        for sheet_row, row in rows:
+            email = row[2].strip().lower()
+            gid = row_group(row, gid_index)
+            if gid:
+                participant = by_group.get((gid, email))
+            else:
+                # Without a group id the email is only trusted if it's unambiguous
+                candidates = by_email.get(email, [])
+                participant = candidates[0] if len(candidates) == 1 else None
+            self._resolve(ALL_GROUPS, pending, sheet_row, row, participant is not None)
+            if participant is None:
+                stats["unmatched"] += 1
+                continue
+
+            if self._apply(participant, row):
+                stats["synced"] += 1
+                updated.add(participant.group_id)
+            else:
+                stats["skipped"] += 1
+
+        self._advance(state, start_row, values)
+        self.db.commit()
+
+        for gid in updated:
+            ranking_cache.invalidate(gid)
+        stats["pending"] = len(pending)
+        stats["groups"] = len(updated)
+        print(f"Sheet sync for all groups: {stats} (watermark row {state.last_row})")
+        stats["last_row"] = state.last_row
+        return stats
+
+
+def start_sheet_sync_scheduler(session_factory, interval_seconds: float, jitter_seconds: float = 0):
+    """
+    Runs SheetSyncService.sync_all in a daemon thread every interval_seconds,
+    plus a random delay of up to jitter_seconds so several workers spread
+    their polls out.
+    """
+    def run():
+        time.sleep(random.uniform(0, jitter_seconds))
+        while True:
+            db = session_factory()
+            try:
+                SheetSyncService(db).sync_all()
+            except Exception as e:
+                print(f"Sheet sync poll failed: {e}")
+            finally:
+                db.close()
+            time.sleep(interval_seconds + random.uniform(0, jitter_seconds))
+
+    thread = threading.Thread(target=run, name="sheet-sync", daemon=True)
+    thread.start()
+    return thread
@@ -1,10 +1,80 @@
+import threading
+import numpy as np
 import openmeteo_requests
 import requests_cache
-import pandas as pd
+from requests.adapters import HTTPAdapter
 from retry_requests import retry
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Tuple
+from app.config import settings
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+DAILY_VARIABLES = ["temperature_2m_max", "temperature_2m_min", "precipitation_sum", "rain_sum", "snowfall_sum"]
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_openmeteo_client() -> openmeteo_requests.Client:
+    """
+    Process-wide Open-Meteo client: one cached, retrying session with a
+    connection pool sized for the weather enrichment workers.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
+                retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
+                retries = retry_session.get_adapter("https://").max_retries
+                retry_session.mount("https://", HTTPAdapter(
+                    max_retries=retries,
+                    pool_connections=1,
+                    pool_maxsize=settings.WEATHER_MAX_WORKERS
+                ))
+                _client = openmeteo_requests.Client(session=retry_session)
+    return _client
+
+# Average daily rain above which a period counts as rainy (about 50 mm over the
+# 15-day live window, or 100 mm in a month)
+RAINY_MM_PER_DAY = 3.3
+
+def rain_condition(precip_mm_per_day: float) -> str:
+    return "Rainy" if precip_mm_per_day > RAINY_MM_PER_DAY else "Sunny/Cloudy" # Simple heuristic
 
 class WeatherService:
+    @staticmethod
+    def _date_window(year: int, month: int) -> Tuple[str, str]:
+        # Construct dates. If month is in future, look at last year.
+        # Simple logic: start_date = YYYY-MM-01, end_date = YYYY-MM-15
+        # If YYYY-MM is > now, use (YYYY-1)-MM
+        now = datetime.now()
+        target_date = datetime(year, month, 1)
+        
+        if target_date > now:
+            fetch_year = year - 1
+        else:
+            fetch_year = year
+            
+        start_date = f"{fetch_year}-{month:02d}-01"
+        # Get ~15 days
+        end_date = f"{fetch_year}-{month:02d}-15"
+        return start_date, end_date
+
+    @staticmethod
+    def _summarize(response) -> Tuple[float, float, float, float]:
+        # Process daily data
+        daily = response.Daily()
+        daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
+        daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
+        daily_precipitation_sum = daily.Variables(2).ValuesAsNumpy()
+        
+        avg_max_temp = float(daily_temperature_2m_max.mean())
+        avg_min_temp = float(daily_temperature_2m_min.mean())
+        total_precip = float(daily_precipitation_sum.sum())
+        # The window is only part of a month; the daily rate compares with climatology
+        precip_per_day = float(daily_precipitation_sum.mean())
+        return avg_max_temp, avg_min_temp, total_precip, precip_per_day
+
     @staticmethod
     def get_forecast(latitude: float, longitude: float, year: int, month: int):
         """
@@ -14,57 +84,71 @@ class WeatherService:
         
         Using Open-Meteo Archive API for typical weather.
         """
-        try:
-            # Setup the Open-Meteo API client with cache and retry on error
-            cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-            retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-            openmeteo = openmeteo_requests.Client(session=retry_session)
+        bulk = WeatherService.get_forecast_bulk([(latitude, longitude)], year, month)
+        return WeatherService.summary_at(bulk, 0)
 
-            # Construct dates. If month is in future, look at last year.
-            # Simple logic: start_date = YYYY-MM-01, end_date = YYYY-MM-15
-            # If YYYY-MM is > now, use (YYYY-1)-MM
-            
-            now = datetime.now()
-            target_date = datetime(year, month, 1)
-            
-            if target_date > now:
-                fetch_year = year - 1
-            else:
-                fetch_year = year
-                
-            start_date = f"{fetch_year}-{month:02d}-01"
-            # Get ~15 days
-            end_date = f"{fetch_year}-{month:02d}-15"
+    @staticmethod
+    def get_forecast_bulk(coords: Sequence[Tuple[float, float]], year: int, month: int,
+                          chunk_size: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Same lookup as get_forecast for many locations at once.
+
+        Coordinates are packed into multi-location archive requests of up to
+        `chunk_size` pairs over the shared client. Returns float arrays aligned
+        to `coords` ("avg_max_temp", "avg_min_temp", "total_precipitation" over
+        the window, "precipitation_mm_per_day"); locations whose chunk failed
+        are NaN.
+        """
+        n = len(coords)
+        result = {
+            "avg_max_temp": np.full(n, np.nan),
+            "avg_min_temp": np.full(n, np.nan),
+            "total_precipitation": np.full(n, np.nan),
+            "precipitation_mm_per_day": np.full(n, np.nan),
+        }
+        if n == 0:
+            return result
 
-            url = "https://archive-api.open-meteo.com/v1/archive"
+        chunk_size = chunk_size or settings.WEATHER_BULK_CHUNK_SIZE
+        start_date, end_date = WeatherService._date_window(year, month)
+        openmeteo = get_openmeteo_client()
+
+        for offset in range(0, n, chunk_size):
+            chunk = coords[offset:offset + chunk_size]
             params = {
-                "latitude": latitude,
-                "longitude": longitude,
+                "latitude": [lat for lat, _ in chunk],
+                "longitude": [lon for _, lon in chunk],
                 "start_date": start_date,
                 "end_date": end_date,
-                "daily": ["temperature_2m_max", "temperature_2m_min", "precipitation_sum", "rain_sum", "snowfall_sum"]
-            }
-            
-            responses = openmeteo.weather_api(url, params=params)
-            response = responses[0]
-            
-            # Process daily data
-            daily = response.Daily()
-            daily_temperature_2m_max = daily.Variables(0).ValuesAsNumpy()
-            daily_temperature_2m_min = daily.Variables(1).ValuesAsNumpy()
-            daily_precipitation_sum = daily.Variables(2).ValuesAsNumpy()
-            
-            avg_max_temp = float(daily_temperature_2m_max.mean())
-            avg_min_temp = float(daily_temperature_2m_min.mean())
-            total_precip = float(daily_precipitation_sum.sum())
-            
-            return {
-                "avg_max_temp": round(avg_max_temp, 1),
-                "avg_min_temp": round(avg_min_temp, 1),
-                "total_precipitation": round(total_precip, 1),
-                "condition_summary": "Rainy" if total_precip > 50 else "Sunny/Cloudy" # Simple heuristic
+                "daily": DAILY_VARIABLES
             }
+            try:
+                responses = openmeteo.weather_api(ARCHIVE_URL, params=params)
+                # One response per location, in request order
+                for i, response in enumerate(responses[:len(chunk)]):
+                    row = offset + i
+                    (result["avg_max_temp"][row],
+                     result["avg_min_temp"][row],
+                     result["total_precipitation"][row],
+                     result["precipitation_mm_per_day"][row]) = WeatherService._summarize(response)
+            except Exception as e:
+                print(f"Weather API Error: {e}")
+
+        return result
 
-        except Exception as e:
-            print(f"Weather API Error: {e}")
+    @staticmethod
+    def summary_at(bulk: Dict[str, np.ndarray], i: int) -> Optional[dict]:
+        """
+        Per-place weather dict (the get_forecast format) from a bulk result row.
+        """
+        total_precip = float(bulk["total_precipitation"][i])
+        if np.isnan(total_precip):
             return None
+        per_day = float(bulk["precipitation_mm_per_day"][i])
+        return {
+            "avg_max_temp": round(float(bulk["avg_max_temp"][i]), 1),
+            "avg_min_temp": round(float(bulk["avg_min_temp"][i]), 1),
+            "total_precipitation": round(total_precip, 1),
+            "precipitation_mm_per_day": round(per_day, 2),
+            "condition_summary": rain_condition(per_day)
+        }
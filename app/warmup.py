@@ -0,0 +1,69 @@
+import time
+from typing import Callable, Dict
+
+from app.config import settings
+
+# Integrations that must stay out of the boot path; they load on first use of their routes
+LAZY_MODULES = (
+    "google.generativeai",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "openmeteo_requests",
+)
+
+
+def _step(timings: Dict[str, float], name: str, fn: Callable):
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception as e:
+        print(f"WARNING: Warmup step '{name}' failed: {e}")
+    timings[name] = round((time.perf_counter() - start) * 1000.0, 1)
+
+
+def warm_up(db) -> Dict[str, float]:
+    """
+    Preloads everything the ranking hot path would otherwise pay for on the
+    first request: numpy/scipy/sklearn, the catalog (and embedding) index,
+    the geocode cache, a pooled DB connection, and one tiny scoring pass.
+    Returns per-step timings in ms.
+    """
+    timings: Dict[str, float] = {}
+
+    def libraries():
+        import numpy  # noqa: F401
+        import scipy.sparse  # noqa: F401
+        import sklearn.feature_extraction.text  # noqa: F401
+
+    def database():
+        from sqlalchemy import text
+        db.execute(text("SELECT 1"))
+
+    def catalog_index():
+        from app.recommender.text_index import get_catalog_index
+        index = get_catalog_index(db)
+        index.similarity("beach hill temple", [])
+
+    def embedding_index():
+        from app.recommender.embeddings import get_embedding_index
+        get_embedding_index().similarity("beach hill temple", [])
+
+    def ranking():
+        import numpy as np
+        from app.recommender.enrichment import get_weather_enricher
+        from app.recommender.scoring import ScoringEngine
+        from app.services.climatology import ClimatologyService  # noqa: F401
+        from app.services.geocoding import GeocodingService
+
+        GeocodingService.geocode("Mumbai")
+        get_weather_enricher()
+        columns = {f: np.linspace(0.0, 1.0, 8) for f in ("similarity", "weather", "season", "distance")}
+        ScoringEngine().rank(columns, k=3, ids=np.arange(8), after=(0.5, 0))
+
+    _step(timings, "libraries", libraries)
+    _step(timings, "database", database)
+    _step(timings, "catalog_index", catalog_index)
+    if settings.RANKING_TEXT_MODEL == "embedding":
+        _step(timings, "embedding_index", embedding_index)
+    _step(timings, "ranking", ranking)
+    return timings
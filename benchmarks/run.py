@@ -0,0 +1,283 @@
+"""
+Benchmark suite for the ranking pipeline and the FastAPI endpoints.
+
+Runs against a throwaway SQLite database filled with a synthetic catalog.
+Weather, distance, email and Gemini calls are replaced with local stubs, so
+timings measure our code rather than the network.
+
+    python -m benchmarks.run --sizes 1000,10000
+    python -m benchmarks.run --sizes 1000,10000 --save-baseline
+    python -m benchmarks.run --sizes 1000,10000 --baseline benchmarks/baseline.json
+
+Exits with status 1 when any benchmark's median is slower than the baseline
+by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def configure_environment(workdir: str):
+    # Must run before any app module is imported: settings are read at import time
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["CATALOG_INDEX_PATH"] = os.path.join(workdir, "catalog_tfidf.joblib")
+    os.environ["EMBEDDING_INDEX_PATH"] = os.path.join(workdir, "place_embeddings")
+    os.environ["GEOCODE_CACHE_PATH"] = os.path.join(workdir, "geocode_cache.json")
+    os.environ["DISTANCE_CACHE_PATH"] = os.path.join(workdir, "distance_cache.sqlite")
+    os.environ["ITINERARY_CACHE_PATH"] = os.path.join(workdir, "itinerary_cache.sqlite")
+    os.environ["GOOGLE_MAPS_API_KEY"] = "benchmark"
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ["SMTP_USERNAME"] = ""
+    os.environ["EMAIL_WORKER_ENABLED"] = "false"
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def install_stubs():
+    """
+    Replaces every outbound integration with a deterministic local stub.
+    """
+    import numpy as np
+    from app.recommender import enrichment
+    from app.services import distance_service, email_service, itinerary_service, ai_itinerary
+
+    def weather_bulk(coords, year, month):
+        lats = np.asarray([lat for lat, _ in coords], dtype=np.float64)
+        total = (lats * 37.0 + month * 11.0) % 250.0 # Over a 15-day window
+        return {
+            "avg_max_temp": 35.0 - (lats - 8.0) * 0.6,
+            "avg_min_temp": 22.0 - (lats - 8.0) * 0.6,
+            "total_precipitation": total,
+            "precipitation_mm_per_day": total / 15.0,
+        }
+
+    def distance_elements(origins, destinations):
+        return {
+            (o, d): {"status": "OK", "duration": {"value": (len(o) * 997 + len(d) * 131) % 72000}}
+            for o in origins for d in destinations
+        }
+
+    def itinerary(destination_name, duration, group_context, weather_summary, participant_preferences=None):
+        return {"title": f"Trip to {destination_name}", "summary": "stub", "daily_plan": [], "packing_tips": []}
+
+    async def ai_itinerary_stub(self, place_name, duration, preferences):
+        return f"{duration}-day plan for {place_name}"
+
+    enrichment._enricher = enrichment.WeatherEnricher(fetch_bulk=weather_bulk)
+    distance_service.DistanceService.get_elements = staticmethod(distance_elements)
+    email_service.EmailService.send_invite = staticmethod(lambda to_email, group_name, survey_link: True)
+    itinerary_service.ItineraryService.generate_itinerary = staticmethod(itinerary)
+    ai_itinerary.ItineraryService.generate_itinerary = ai_itinerary_stub
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+        "repeat": len(samples),
+    }
+
+
+def measure(fn: Callable, repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return summarize(samples)
+
+
+class Suite:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, result: Dict[str, float]):
+        self.results[name] = result
+        print(f"  {name:<48} median {result['median_ms']:>10.3f} ms   p95 {result['p95_ms']:>10.3f} ms")
+
+    def bench(self, name: str, fn: Callable, repeat: Optional[int] = None, warmup: int = 1):
+        self.record(name, measure(fn, repeat or self.repeat, warmup))
+
+    def bench_stages(self, name: str, tag: str, fn: Callable, suffix: str = "",
+                     repeat: Optional[int] = None, warmup: int = 1):
+        """
+        Times fn and, from the same calls, each pipeline stage it runs as
+        reported by app.metrics.stage: `name` gets the total and
+        stage.<stage><suffix> each stage.
+        """
+        from app.metrics import start_request_timings
+
+        for _ in range(warmup):
+            fn()
+        totals: List[float] = []
+        stages: Dict[str, List[float]] = {}
+        for _ in range(repeat or self.repeat):
+            timings = start_request_timings()
+            start = time.perf_counter()
+            fn()
+            totals.append((time.perf_counter() - start) * 1000.0)
+            for stage, ms in timings.items():
+                stages.setdefault(stage, []).append(ms)
+        for stage, samples in stages.items():
+            self.record(f"stage.{stage}{suffix}{tag}", summarize(samples))
+        self.record(f"{name}{tag}", summarize(totals))
+
+    def once(self, name: str, fn: Callable):
+        self.bench(name, fn, repeat=1, warmup=0)
+
+
+def bench_catalog(suite: Suite, size: int, participants: int, seed: int):
+    from sqlalchemy import delete
+    from fastapi.testclient import TestClient
+
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.models import Group, Participant, Place
+    from app.recommender import enrichment
+    from app.recommender.result_cache import ranking_cache
+    from app.recommender.text_index import build_catalog_index
+    from app.services.recommendation import RecommendationService
+    from benchmarks.synthetic import insert_group, insert_places
+
+    tag = f"[n={size}]"
+    print(f"\nCatalog of {size} places")
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for model in (Participant, Group, Place):
+            db.execute(delete(model))
+        db.commit()
+
+        suite.once(f"setup.insert_places{tag}", lambda: insert_places(db, size, seed))
+        suite.once(f"setup.build_text_index{tag}", lambda: build_catalog_index(db))
+        group = insert_group(db, participants, seed)
+        group_id = group.id
+
+        service = RecommendationService(db)
+        query = "beach nightlife seafood temples trekking"
+        prefs = {"travel_month": group.travel_month, "start_city": group.start_city, "combined_text": query}
+
+        def rank():
+            # The recommendation path: budget filter, then every ranking stage
+            places = service.filter_places(max_budget=group.max_budget)
+            service.rank_places(places, prefs, limit=5)
+
+        # A fresh enricher, so the first run pays for the (stubbed) weather lookups
+        enrichment._enricher = enrichment.WeatherEnricher(fetch_bulk=enrichment.get_weather_enricher().fetch_bulk)
+        suite.bench_stages("rank.cold", tag, rank, suffix="_cold", repeat=1, warmup=0)
+        suite.bench_stages("rank.full", tag, rank)
+    finally:
+        db.close()
+
+    with TestClient(app) as client:
+        def recommend_cold():
+            ranking_cache.invalidate(group_id)
+            client.post(f"/api/v1/groups/{group_id}/recommendations").raise_for_status()
+
+        counter = iter(range(10 ** 9))
+
+        def add_participant():
+            i = next(counter)
+            client.post(
+                f"/api/v1/groups/{group_id}/participants",
+                json={"name": f"Bench {i}", "email": f"bench{i}@example.invalid"}
+            ).raise_for_status()
+
+        suite.bench(f"api.group_recommendations_cold{tag}", recommend_cold)
+        suite.bench(f"api.group_recommendations_cached{tag}",
+                    lambda: client.post(f"/api/v1/groups/{group_id}/recommendations").raise_for_status())
+        suite.bench(f"api.get_group{tag}", lambda: client.get(f"/api/v1/groups/{group_id}").raise_for_status())
+        suite.bench(f"api.list_recommendations{tag}",
+                    lambda: client.get("/api/v1/recommendations", params={"limit": 20}).raise_for_status())
+        suite.bench(f"api.ranked_recommendations{tag}",
+                    lambda: client.get("/api/v1/recommendations", params={"limit": 20, "query": query}).raise_for_status())
+        suite.bench(f"api.add_participant{tag}", add_participant)
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> int:
+    regressions = 0
+    print(f"\nComparison against baseline (threshold +{threshold:.0%})")
+    for name, current in sorted(results.items()):
+        base = baseline.get(name)
+        if not base or not base.get("median_ms"):
+            continue
+        ratio = current["median_ms"] / base["median_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "faster"
+        print(f"  {name:<48} {base['median_ms']:>10.3f} -> {current['median_ms']:>10.3f} ms  x{ratio:5.2f} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PackVote ranking and API benchmarks")
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated catalog sizes (1k-500k)")
+    parser.add_argument("--participants", type=int, default=8, help="Participants in the benchmark group")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed repetitions per benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "latest.json"))
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat)
+    with tempfile.TemporaryDirectory(prefix="packvote-bench-") as workdir:
+        configure_environment(workdir)
+        os.environ["SQL_ECHO"] = "false"
+        install_stubs()
+
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            bench_catalog(suite, size, args.participants, args.seed)
+
+        from app.database import engine
+        engine.dispose() # Release the database file before the directory is removed
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+        },
+        "results": suite.results,
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(suite.results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
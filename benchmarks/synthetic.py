@@ -0,0 +1,142 @@
+"""
+Synthetic catalogs and groups for benchmarking.
+
+Everything is generated from a seeded RNG, so the same (size, seed) always
+produces the same catalog and benchmark runs are comparable.
+"""
+import json
+import random
+import uuid
+from typing import Dict, Iterator, List
+
+from sqlalchemy import insert
+
+from app.models import Group, Participant, Place
+from app.recommender.season import MONTHS, parse_best_time
+
+STATES = [
+    "Kerala", "Goa", "Rajasthan", "Himachal Pradesh", "Uttarakhand", "Sikkim",
+    "Karnataka", "Tamil Nadu", "Maharashtra", "Jammu and Kashmir (UT)", "Ladakh (UT)",
+    "Meghalaya", "West Bengal", "Madhya Pradesh", "Gujarat", "Odisha", "Assam",
+]
+FEATURES = [
+    "beach", "backwaters", "hill station", "tea gardens", "temples", "fort", "palace",
+    "trekking", "wildlife", "national park", "waterfalls", "lake", "houseboat", "desert",
+    "camel safari", "snow", "skiing", "monastery", "river rafting", "paragliding",
+    "nightlife", "seafood", "heritage walk", "caves", "spice plantation", "yoga", "surfing",
+]
+ADJECTIVES = ["serene", "bustling", "scenic", "historic", "remote", "vibrant", "misty", "sunny"]
+BEST_TIME_TEMPLATES = [
+    "{a} to {b}", "{a} - {b}", "Throughout the year", "{a} - {b}; {c} - {d}", "Mid {a} to Mid {b}",
+]
+ACTIVITY_ANSWERS = [
+    "Beaches, Nightlife", "Trekking, Adventure sports", "Temples, Heritage", "Wildlife, Nature",
+    "Food, Shopping", "Hill stations, Snow", "Relaxing, Spa", "Backwaters, Houseboats",
+]
+# Rough bounding box of India
+LAT_RANGE = (8.0, 34.0)
+LON_RANGE = (68.0, 95.0)
+
+
+def _best_time(rng: random.Random) -> str:
+    template = rng.choice(BEST_TIME_TEMPLATES)
+    a, b, c, d = (rng.choice(MONTHS).title() for _ in range(4))
+    return template.format(a=a, b=b, c=c, d=d)
+
+
+def generate_places(n: int, seed: int = 42) -> Iterator[Dict]:
+    """
+    Yields n place records shaped like the processed holidify data, plus
+    coordinates and budgets.
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        state = rng.choice(STATES)
+        features = rng.sample(FEATURES, 4)
+        description = (
+            f"A {rng.choice(ADJECTIVES)} destination in {state} known for "
+            f"{features[0]}, {features[1]} and {features[2]}. Visitors enjoy {features[3]}."
+        )
+        yield {
+            "name": f"Place {i} {features[0].title()}",
+            "state": state,
+            "description": description,
+            "url": f"https://example.invalid/places/{i}/",
+            "best_time": _best_time(rng),
+            "min_budget": float(rng.randrange(1000, 50000, 500)),
+            "latitude": round(rng.uniform(*LAT_RANGE), 4),
+            "longitude": round(rng.uniform(*LON_RANGE), 4),
+        }
+
+
+def insert_places(db, n: int, seed: int = 42, batch_size: int = 5000) -> int:
+    """
+    Bulk-inserts a synthetic catalog. Returns the number of rows written.
+    """
+    batch: List[Dict] = []
+    written = 0
+    for record in generate_places(n, seed):
+        # Bulk inserts skip ORM events, so the month mask is set explicitly
+        record["best_months"] = parse_best_time(record["best_time"])
+        batch.append(record)
+        if len(batch) >= batch_size:
+            db.execute(insert(Place), batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(Place), batch)
+        written += len(batch)
+    db.commit()
+    return written
+
+
+def participant_preferences(rng: random.Random, name: str, email: str) -> str:
+    """
+    A response row as SheetSyncService stores it: JSON of
+    [timestamp, name, email, activities, budget, month, notes].
+    """
+    row = [
+        "2025-01-01 10:00:00",
+        name,
+        email,
+        rng.choice(ACTIVITY_ANSWERS),
+        str(rng.randrange(5000, 60000, 5000)),
+        rng.choice(MONTHS).title(),
+        " ".join(rng.sample(FEATURES, 3)),
+    ]
+    return json.dumps(row)
+
+
+def insert_group(db, n_participants: int, seed: int = 7, responded: float = 0.8) -> Group:
+    """
+    Creates a group with n_participants, of which roughly `responded` have
+    preference rows.
+    """
+    rng = random.Random(seed)
+    group = Group(
+        id=str(uuid.UUID(int=rng.getrandbits(128))),
+        name=f"Benchmark group {seed}",
+        creator_email="organizer@example.invalid",
+        start_city=rng.choice(["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata"]),
+        max_budget=float(rng.randrange(20000, 60000, 5000)),
+        travel_month=rng.choice(MONTHS).title(),
+        duration=rng.randint(3, 10),
+        group_size=n_participants,
+        status="collecting",
+    )
+    db.add(group)
+    for i in range(n_participants):
+        name = f"Member {i}"
+        email = f"member{i}.{seed}@example.invalid"
+        has_responded = rng.random() < responded
+        db.add(Participant(
+            id=str(uuid.UUID(int=rng.getrandbits(128))),
+            group_id=group.id,
+            name=name,
+            email=email,
+            survey_link="https://forms.example.invalid",
+            has_responded=1 if has_responded else 0,
+            preferences=participant_preferences(rng, name, email) if has_responded else None,
+        ))
+    db.commit()
+    return group
@@ -84,11 +84,40 @@ export default function GroupDashboard() {
         setLoadingPlan(true);
         setItinerary(null);
         try {
-            const res = await axios.post(`http://127.0.0.1:8000/api/v1/groups/${groupId}/itinerary`, {
-                destination: place.name,
-                weather_summary: JSON.stringify(place.weather_summary || {})
+            // Server-Sent Events: title/summary first, then each day as soon as it's generated
+            const res = await fetch(`http://127.0.0.1:8000/api/v1/groups/${groupId}/itinerary/stream`, {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({
+                    destination: place.name,
+                    weather_summary: JSON.stringify(place.weather_summary || {})
+                })
             });
-            setItinerary(res.data);
+            if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+                const messages = buffer.split("\n\n");
+                buffer = messages.pop() || "";
+                for (const message of messages) {
+                    const event = message.match(/^event: (.*)$/m)?.[1];
+                    const data = message.match(/^data: (.*)$/m)?.[1];
+                    if (!event || !data) continue;
+                    const payload = JSON.parse(data);
+                    if (event === "meta") {
+                        setItinerary((prev: any) => ({ daily_plan: [], ...prev, ...payload }));
+                    } else if (event === "day") {
+                        setItinerary((prev: any) => ({ ...prev, daily_plan: [...(prev?.daily_plan || []), payload] }));
+                    } else if (event === "done") {
+                        setItinerary(payload);
+                    }
+                }
+            }
         } catch (e) {
             console.error(e);
             alert("Failed to generate plan");
@@ -202,7 +231,7 @@ export default function GroupDashboard() {
                                         {/* Inline Itinerary View if Selected */}
                                         {selectedPlace?.name === place.name && (
                                             <div className="bg-gray-50 p-4 rounded-xl border border-gray-200 mt-2">
-                                                {loadingPlan ? (
+                                                {loadingPlan && !itinerary ? (
                                                     <div className="flex items-center gap-2 text-gray-500">
                                                         <Clock className="w-4 h-4 animate-spin" />
                                                         Generating AI Plan...
@@ -217,6 +246,12 @@ export default function GroupDashboard() {
                                                                     <span className="font-bold">Day {day.day}:</span> {day.activities}
                                                                 </div>
                                                             ))}
+                                                            {loadingPlan && (
+                                                                <div className="flex items-center gap-2 text-sm text-gray-500">
+                                                                    <Clock className="w-4 h-4 animate-spin" />
+                                                                    Planning the next day...
+                                                                </div>
+                                                            )}
                                                         </div>
                                                     </div>
                                                 ) : null}
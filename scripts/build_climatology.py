@@ -0,0 +1,26 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal, engine, Base
+from app.models import Place
+from app.services.climatology import ClimatologyService
+
+def build_climatology(max_age_days=None, limit=None):
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        ClimatologyService.refresh(db, max_age_days=max_age_days, limit=limit)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute monthly climatology for geocoded places")
+    parser.add_argument("--max-age-days", type=int, default=None, help="Refresh entries older than this (default: CLIMATOLOGY_MAX_AGE_DAYS)")
+    parser.add_argument("--limit", type=int, default=None, help="Max places to refresh in this run")
+    args = parser.parse_args()
+    build_climatology(args.max_age_days, args.limit)
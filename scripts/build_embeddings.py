@@ -0,0 +1,25 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal, engine, Base
+from app.models import Place
+from app.recommender.embeddings import build_embedding_index
+
+def build_embeddings(rebuild=False):
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        build_embedding_index(db, rebuild=rebuild)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed places into the memory-mapped vector index")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed every place instead of only new ones")
+    args = parser.parse_args()
+    build_embeddings(args.rebuild)
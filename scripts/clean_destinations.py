@@ -1,49 +1,29 @@
-import json
-import re
-from pathlib import Path
+import argparse
 import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.catalog_pipeline import RECORD_STAGES, format_stage_stats, write_clean_records
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 RAW_FILE = os.path.join(BASE_DIR, "data", "raw", "holidify_india_places_all.json")
 
 CLEAN_FILE = "data/processed/holidify_india_places_clean.json"
 
-def clean_name(name):
-    # Remove leading numbering like "1. "
-    return re.sub(r"^\d+\.\s*", "", name).strip()
-
-def clean_description(desc):
-    if not desc:
-        return "Popular tourist destination in India"
-    return "Popular tourist destination in India"
-
-def clean_best_time(best_time):
-    if not best_time:
-        return None
-    return best_time.replace("Read More", "").strip()
-
-def clean_dataset():
-    with open(RAW_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    cleaned = []
-
-    for item in data:
-        cleaned.append({
-            "name": clean_name(item.get("name")),
-            "state": None,  # will be enriched later
-            "best_time": clean_best_time(item.get("best_time")),
-            "description": clean_description(item.get("description")),
-            "url": item.get("url")
-        })
-
-    Path(CLEAN_FILE).parent.mkdir(parents=True, exist_ok=True)
-
-    with open(CLEAN_FILE, "w", encoding="utf-8") as f:
-        json.dump(cleaned, f, indent=2, ensure_ascii=False)
-
-    print(f"Cleaned dataset saved to {CLEAN_FILE}")
-    print(f"Total destinations cleaned: {len(cleaned)}")
+def clean_dataset(raw_file=RAW_FILE, clean_file=CLEAN_FILE, skip=()):
+    # Same stages as scripts/update_catalog.py, written to a file instead of the database
+    stats = write_clean_records(raw_file, clean_file, skip)
+    print(format_stage_stats(stats))
+    print(f"Cleaned dataset saved to {clean_file}")
+    print(f"Total destinations cleaned: {stats['out']}")
 
 if __name__ == "__main__":
-    clean_dataset()
+    parser = argparse.ArgumentParser(description="Run the catalog cleaning stages over a raw dump")
+    parser.add_argument("input", nargs="?", default=RAW_FILE)
+    parser.add_argument("--output", default=CLEAN_FILE, help=".json array or .jsonl output")
+    parser.add_argument("--skip", action="append", default=[], choices=list(RECORD_STAGES),
+                        help="Leave out a stage (repeatable)")
+    args = parser.parse_args()
+    clean_dataset(args.input, args.output, args.skip)
@@ -0,0 +1,113 @@
+"""
+Local fixture site for exercising scrapin.py / CatalogCrawler without
+hitting the real listing. Serves `--pages` listing pages of `--per-page`
+place cards (pageNum past the end returns a page without cards), with
+ETag and Last-Modified support so re-crawls get 304s.
+
+    python scripts/crawl_fixture_server.py --port 8089 &
+    python scrapin.py --start-url http://127.0.0.1:8089/places.html \
+        --base-url http://127.0.0.1:8089 --max-pages 30 --delay 0
+
+--latency adds a delay per response and --fail-every N answers 503 to
+every Nth request (the crawler retries those).
+"""
+
+import argparse
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STARTED = formatdate(time.time(), usegmt=True)
+
+
+def listing_page(page: int, pages: int, per_page: int) -> str:
+    if page >= pages:
+        return "<html><body><p>No results</p></body></html>"
+    cards = []
+    for i in range(per_page):
+        n = page * per_page + i + 1
+        cards.append(
+            f'<div class="content-card"><a href="/places/place-{n}.html"><h3>{n}. Fixture Place {n}</h3></a>'
+            f'<span>Located in: State {n % 28}</span><p class="card-text">Description of place {n}.</p></div>'
+        )
+    return "<html><body>" + "".join(cards) + "</body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            count = server.requests
+        if server.latency:
+            time.sleep(server.latency)
+        if server.fail_every and count % server.fail_every == 0:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        parts = urlsplit(self.path)
+        page = int(parse_qs(parts.query).get("pageNum", ["0"])[0])
+        body = listing_page(page, server.pages, server.per_page).encode()
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", STARTED)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages=20, per_page=24, latency=0.0, fail_every=0):
+        super().__init__(address, FixtureHandler)
+        self.pages, self.per_page = pages, per_page
+        self.latency, self.fail_every = latency, fail_every
+        self.requests = self.not_modified = 0
+        self.lock = threading.Lock()
+
+
+def start_fixture_server(host="127.0.0.1", port=0, **options) -> FixtureServer:
+    """
+    Starts the fixture site in a background thread (port 0 picks a free port).
+    """
+    server = FixtureServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local listing site for crawler tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--pages", type=int, default=20, help="Listing pages with cards")
+    parser.add_argument("--per-page", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer 503 to every Nth request")
+    args = parser.parse_args()
+
+    server = FixtureServer((args.host, args.port), pages=args.pages, per_page=args.per_page,
+                           latency=args.latency, fail_every=args.fail_every)
+    print(f"Fixture site on http://{args.host}:{args.port}/places.html ({args.pages} pages)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.requests} requests, {server.not_modified} not modified")
@@ -0,0 +1,80 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# Add project root to path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from app.config import settings
+
+def measure_import(module, runs):
+    """
+    Imports `module` in fresh interpreters under -X importtime.
+    Returns (median total ms, per-module cumulative ms of the median run,
+    lazy modules that were loaded anyway).
+    """
+    probe = (
+        f"import {module}; import sys; "
+        "from app.warmup import LAZY_MODULES; "
+        "print(','.join(m for m in LAZY_MODULES if m in sys.modules))"
+    )
+    samples = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        cumulative = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cum, name = line[len("import time:"):].split("|")
+            if cum.strip().isdigit():
+                # Keep the outermost entry for a module (first import wins)
+                cumulative.setdefault(name.strip(), int(cum) / 1000.0)
+        eager = [m for m in proc.stdout.strip().split(",") if m]
+        samples.append((cumulative.get(module, 0.0), cumulative, eager))
+
+    samples.sort(key=lambda s: s[0])
+    _, cumulative, eager = samples[len(samples) // 2]
+    return statistics.median(s[0] for s in samples), cumulative, eager
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the import time of the app against its budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreter runs; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=settings.IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    args = parser.parse_args()
+
+    total, cumulative, eager = measure_import(args.module, args.runs)
+    print(f"import {args.module}: {total:.0f} ms (median of {args.runs}), budget {args.budget_ms:.0f} ms")
+
+    # Top-level packages only, so nested modules aren't double counted
+    packages = {}
+    for name, ms in cumulative.items():
+        root = name.split(".")[0]
+        if root != args.module.split(".")[0] and name == root:
+            packages[root] = ms
+    print("\nSlowest packages:")
+    for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    app_modules = {n: ms for n, ms in cumulative.items() if n.startswith("app.")}
+    print("\nSlowest app modules (cumulative):")
+    for name, ms in sorted(app_modules.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: lazy integrations imported at boot: {', '.join(eager)}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"\nFAIL: import time over budget by {total - args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    sys.exit(1 if failed else 0)
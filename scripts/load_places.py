@@ -1,49 +1,74 @@
-import json
+import argparse
 import os
 import sys
 
 # Add project root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine, Base
 from app.models import Place, Group, Participant 
+from app.recommender.text_index import get_catalog_index, update_catalog_index
+from app.services.catalog_loader import (
+    LoadCheckpoint, backfill_best_months, ensure_place_columns, ensure_place_indexes, load_catalog
+)
 
-def load_places():
+DEFAULT_INPUT = os.path.join("data", "processed", "holidify_india_places_final.json")
+DEFAULT_CHECKPOINT = os.path.join("data", "index", "load_places.checkpoint.json")
+
+def load_places(input_file=DEFAULT_INPUT, batch_size=5000, checkpoint_path=DEFAULT_CHECKPOINT, restart=False):
     # Create tables if they don't exist
     Base.metadata.create_all(bind=engine)
-    
-    db = SessionLocal()
-    input_file = os.path.join("data", "processed", "holidify_india_places_final.json")
+    ensure_place_columns(engine)
+    ensure_place_indexes(engine)
     
     if not os.path.exists(input_file):
         print(f"File not found: {input_file}")
         return
 
-    with open(input_file, "r", encoding="utf-8") as f:
-        places_data = json.load(f)
+    checkpoint = LoadCheckpoint(checkpoint_path, input_file)
+    if restart:
+        checkpoint.clear()
 
-    print(f"Found {len(places_data)} places to load...")
-    
-    for item in places_data:
-        # Check if exists
-        exists = db.query(Place).filter(Place.name == item["name"]).first()
-        if exists:
-            continue
-            
-        new_place = Place(
-            name=item["name"],
-            state=item.get("state"),
-            description=item.get("description"),
-            url=item.get("url"),
-            # Default values for now
-            min_budget=1000.0, 
+    db = SessionLocal()
+    try:
+        # Highest id already indexed; everything above it is new
+        index = get_catalog_index(db)
+        last_indexed = int(index.place_ids.max()) if len(index) else 0
+
+        print(f"Loading places from {input_file}...")
+        changed_urls = set()
+        stats = load_catalog(db, input_file, batch_size=batch_size, checkpoint=checkpoint, changed_urls=changed_urls)
+        print(
+            f"Read {stats['records']} records in {stats['seconds']}s ({stats['rows_per_second']:.0f} rows/s): "
+            f"{stats['inserted']} new, {stats['updated']} updated, {stats['skipped']} skipped (no name/url)"
         )
-        db.add(new_place)
-    
-    db.commit()
-    print("Data loading complete!")
-    db.close()
+
+        # Backfill month masks for places loaded before best_months existed
+        backfill_best_months(engine)
+
+        # Re-index what this load inserted or updated, plus anything a failed
+        # earlier run added; the saved vocabulary is reused
+        columns = (Place.id, Place.name, Place.state, Place.best_time, Place.description)
+        urls = sorted(changed_urls)
+
+        def changed_places():
+            yield from db.query(*columns).filter(Place.id > last_indexed).order_by(Place.id).yield_per(10000)
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(urls), 500):
+                yield from db.query(*columns) \
+                    .filter(Place.url.in_(urls[i:i + 500]), Place.id <= last_indexed).all()
+
+        indexed = update_catalog_index(db, changed_places(), replace=True)
+        print(f"Catalog index updated with {indexed} new or changed places")
+        print("Data loading complete!")
+    finally:
+        db.close()
 
 if __name__ == "__main__":
-    load_places()
+    parser = argparse.ArgumentParser(description="Stream a JSON/JSONL place catalog into the database")
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="JSON array or JSONL file of places")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per upsert/commit")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Progress file used to resume a failed load")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and load from the start")
+    args = parser.parse_args()
+    load_places(args.input, args.batch_size, args.checkpoint, args.restart)
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, update
+
+from app.database import SessionLocal, engine, Base
+from app.models import Participant, EmailOutbox, Place
+from app.recommender.result_cache import record_catalog_change
+from app.repositories import duplicate_participants, ensure_group_indexes
+from app.services.catalog_loader import duplicate_place_urls, ensure_place_columns, ensure_place_indexes
+
+BACKUP_DIR = os.path.join("data", "backups")
+
+# Duplicates block the unique indexes the app relies on; startup refuses to
+# remove them itself. Without --apply nothing is changed, only listed.
+
+def backup_file(table):
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    return os.path.join(BACKUP_DIR, f"{table}-duplicates-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+
+def row_dict(row):
+    return {column.name: getattr(row, column.key) for column in row.__table__.columns}
+
+def remove_duplicate_participants(apply=False):
+    """
+    Per (group, email), keeps the participant that responded (else the lowest
+    id), moves the others' outbox rows to it and deletes them. Every removed
+    row is logged and written to a backup file first.
+    """
+    db = SessionLocal()
+    removed = 0
+    backup = None
+    try:
+        duplicates = db.execute(duplicate_participants()).all()
+        if not duplicates:
+            print("No duplicate participants")
+        for group_id, email, count in duplicates:
+            rows = db.scalars(
+                select(Participant)
+                .where(Participant.group_id == group_id, Participant.email == email)
+                .order_by(Participant.has_responded.desc(), Participant.id)
+            ).all()
+            keep, extra = rows[0], rows[1:]
+            print(f"Group {group_id}, {email}: keeping participant {keep.id} (responded={keep.has_responded})")
+            for row in extra:
+                invites = db.scalars(select(EmailOutbox.id).where(EmailOutbox.participant_id == row.id)).all()
+                print(
+                    f"  {'removing' if apply else 'would remove'} participant {row.id} "
+                    f"(responded={row.has_responded}, preferences={json.dumps(row.preferences)}, "
+                    f"outbox rows {invites} -> {keep.id})"
+                )
+                if not apply:
+                    continue
+                if backup is None:
+                    backup = open(backup_file(Participant.__tablename__), "w", encoding="utf-8")
+                backup.write(json.dumps({**row_dict(row), "merged_into": keep.id, "outbox_ids": invites}, default=str) + "\n")
+                backup.flush()
+                db.execute(update(EmailOutbox).where(EmailOutbox.participant_id == row.id).values(participant_id=keep.id))
+                db.delete(row)
+                removed += 1
+        if apply:
+            db.commit()
+    finally:
+        db.close()
+        if backup is not None:
+            backup.close()
+            print(f"Removed rows backed up to {backup.name}")
+
+    if apply:
+        print(f"Removed {removed} duplicate participants")
+        ensure_group_indexes(engine)
+    elif duplicates:
+        print("Dry run; re-run with --apply to merge them")
+
+def remove_duplicate_places(apply=False):
+    """
+    Per url, keeps the lowest place id and deletes the others. Every removed
+    row is logged and written to a backup file first.
+    """
+    db = SessionLocal()
+    removed = 0
+    backup = None
+    try:
+        duplicates = db.execute(duplicate_place_urls()).all()
+        if not duplicates:
+            print("No places share a url")
+        for url, count in duplicates:
+            rows = db.scalars(select(Place).where(Place.url == url).order_by(Place.id)).all()
+            keep, extra = rows[0], rows[1:]
+            print(f"{url}: keeping place {keep.id} ({keep.name})")
+            for row in extra:
+                print(f"  {'removing' if apply else 'would remove'} place {row.id} ({row.name}, {row.state})")
+                if not apply:
+                    continue
+                if backup is None:
+                    backup = open(backup_file(Place.__tablename__), "w", encoding="utf-8")
+                backup.write(json.dumps({**row_dict(row), "kept": keep.id}, default=str) + "\n")
+                backup.flush()
+                db.delete(row)
+                removed += 1
+        if apply:
+            if removed:
+                record_catalog_change(db)
+            db.commit()
+    finally:
+        db.close()
+        if backup is not None:
+            backup.close()
+            print(f"Removed rows backed up to {backup.name}")
+
+    if apply:
+        print(f"Removed {removed} duplicate places")
+        ensure_place_indexes(engine)
+    elif duplicates:
+        print("Dry run; re-run with --apply to remove them")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List, and with --apply remove, rows that block a unique index")
+    parser.add_argument("table", choices=["participants", "places"], help="Which duplicates to resolve")
+    parser.add_argument("--apply", action="store_true", help="Delete the duplicates (a backup is written first)")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if args.table == "participants":
+        remove_duplicate_participants(args.apply)
+    else:
+        ensure_place_columns(engine)
+        remove_duplicate_places(args.apply)
@@ -0,0 +1,110 @@
+"""
+Local stand-in SMTP server for exercising the email outbox without a real
+mail provider. Accepts mail without TLS or login and prints each message.
+Point the app at it with:
+
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_AUTH=false \
+    SMTP_FROM=packvote@localhost
+
+SMTP_FROM is required here: without a login there is no SMTP_USERNAME to
+send as.
+
+--reject-domain answers 550 for recipients at that domain (permanent failure)
+and --fail-every N answers 451 to every Nth message (retried with backoff).
+"""
+
+import argparse
+import socketserver
+import threading
+import time
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 packvote-sink ESMTP")
+        recipients, sender = [], None
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            command = raw.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250 packvote-sink")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command[8:].strip().strip("<>")
+                if server.reject_domain and address.lower().endswith("@" + server.reject_domain):
+                    self.reply("550 Mailbox unavailable")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line in (b".\r\n", b".\n"):
+                        break
+                    lines.append(line)
+                server.messages += 1
+                if server.fail_every and server.messages % server.fail_every == 0:
+                    self.reply("451 Try again later")
+                    continue
+                server.delivered += 1
+                subject = next((l.decode(errors="replace").strip() for l in lines if l.startswith(b"Subject:")), "")
+                print(f"[{time.strftime('%H:%M:%S')}] {sender} -> {', '.join(recipients)} | {subject}")
+                self.reply("250 Queued")
+            elif verb == "RSET":
+                recipients, sender = [], None
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, reject_domain=None, fail_every=0):
+        super().__init__(address, SinkHandler)
+        self.reject_domain = reject_domain.lower() if reject_domain else None
+        self.fail_every = fail_every
+        self.connections = self.messages = self.delivered = 0
+
+
+def start_sink(host="127.0.0.1", port=1025, **options) -> SinkServer:
+    """
+    Starts the sink in a background thread (port 0 picks a free port).
+    """
+    server = SinkServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP server that prints the mail it receives")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--reject-domain", help="Answer 550 for recipients at this domain")
+    parser.add_argument("--fail-every", type=int, default=0, help="Answer 451 to every Nth message")
+    args = parser.parse_args()
+
+    server = SinkServer((args.host, args.port), reject_domain=args.reject_domain, fail_every=args.fail_every)
+    print(f"SMTP sink listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{server.delivered} delivered over {server.connections} connections")
@@ -0,0 +1,47 @@
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal, engine, Base
+from app.models import Place, Group, Participant
+from app.services.catalog_loader import ensure_place_columns, ensure_place_indexes
+from app.services.catalog_pipeline import RECORD_STAGES, format_stage_stats, run_catalog_pipeline
+
+DEFAULT_INPUT = os.path.join("data", "raw", "holidify_dump.jsonl")
+
+def update_catalog(input_file=DEFAULT_INPUT, skip=(), batch_size=1000, reindex=True):
+    Base.metadata.create_all(bind=engine)
+    ensure_place_columns(engine)
+    ensure_place_indexes(engine)
+
+    if not os.path.exists(input_file):
+        print(f"File not found: {input_file}")
+        return
+
+    db = SessionLocal()
+    try:
+        print(f"Processing {input_file}...")
+        stats = run_catalog_pipeline(db, input_file, skip=skip, batch_size=batch_size, reindex=reindex)
+        print(format_stage_stats(stats))
+        print(
+            f"Read {stats['records']} records in {stats['seconds']}s ({stats['records_per_second']:.0f} records/s): "
+            f"{stats['inserted']} new, {stats['updated']} updated, {stats['unchanged']} unchanged, "
+            f"{stats['invalid']} skipped (no name/url); {stats['indexed']} places re-indexed"
+        )
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Clean, enrich and load a raw place dump; only changed places are written and re-indexed"
+    )
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="JSON array or JSONL file from scrapin.py")
+    parser.add_argument("--skip", action="append", default=[], choices=list(RECORD_STAGES),
+                        help="Leave out a stage (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per upsert/commit")
+    parser.add_argument("--no-index", action="store_true", help="Don't update the catalog text index")
+    args = parser.parse_args()
+    update_catalog(args.input, args.skip, args.batch_size, not args.no_index)
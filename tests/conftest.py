@@ -0,0 +1,51 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="packvote-tests-")
+
+# Settings are read when app modules are imported, so the environment is set
+# first: a throwaway database and caches, no real Gemini/SMTP, no background jobs
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORKDIR, 'test.db')}",
+    "CATALOG_INDEX_PATH": os.path.join(WORKDIR, "catalog_tfidf.joblib"),
+    "EMBEDDING_INDEX_PATH": os.path.join(WORKDIR, "place_embeddings"),
+    "GEOCODE_CACHE_PATH": os.path.join(WORKDIR, "geocode_cache.json"),
+    "DISTANCE_CACHE_PATH": os.path.join(WORKDIR, "distance_cache.sqlite"),
+    "ITINERARY_CACHE_PATH": os.path.join(WORKDIR, "itinerary_cache.sqlite"),
+    "GEMINI_API_KEY": "",
+    "ITINERARY_MODEL": "fake",
+    "FAKE_MODEL_DELAY_SECONDS": "0",
+    "SMTP_USERNAME": "",
+    "SMTP_PASSWORD": "",
+    "EMAIL_WORKER_ENABLED": "false",
+    "WARMUP_ON_STARTUP": "false",
+})
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from app.database import Base, engine
+    import app.models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    yield
+    engine.dispose()
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    from app.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
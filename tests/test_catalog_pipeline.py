@@ -0,0 +1,33 @@
+import json
+
+from app.models import Place
+from app.services.catalog_pipeline import run_catalog_pipeline
+
+
+def write_dump(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records))
+    return str(path)
+
+
+def record(slug, description):
+    return {"name": slug.title(), "state": "Goa", "url": f"https://example.com/pipeline/{slug}",
+            "description": description, "best_time": "November to February"}
+
+
+def test_rerun_only_loads_changed_places(db, tmp_path):
+    records = [record(f"beach-{i}", f"Beach number {i}") for i in range(7)]
+    first = run_catalog_pipeline(db, write_dump(tmp_path / "a.jsonl", records), batch_size=3, reindex=False)
+    assert first["loaded"] == 7 and first["unchanged"] == 0
+
+    records[4] = record("beach-4", "Beach number 4, now with shacks")
+    # A url repeated with the same content is dropped, a changed repeat wins
+    records += [record("beach-1", "Beach number 1"), record("beach-5", "Quieter beach")]
+    second = run_catalog_pipeline(db, write_dump(tmp_path / "b.jsonl", records), batch_size=3, reindex=False)
+
+    assert second["loaded"] == 2
+    assert second["unchanged"] == 7
+    fingerprint = next(stage for stage in second["stages"] if stage["stage"] == "fingerprint")
+    assert (fingerprint["in"], fingerprint["out"]) == (9, 2)
+    descriptions = dict(db.query(Place.url, Place.description).filter(Place.url.like("%/pipeline/%")).all())
+    assert descriptions["https://example.com/pipeline/beach-4"] == "Beach number 4, now with shacks"
+    assert descriptions["https://example.com/pipeline/beach-5"] == "Quieter beach"
@@ -0,0 +1,24 @@
+import json
+
+from app.recommender.result_cache import catalog_stamp
+from app.services.catalog_loader import load_catalog
+
+
+def write_catalog(path, description):
+    path.write_text(json.dumps([
+        {"name": "Stamp Falls", "state": "Kerala", "url": "https://example.com/stamp-falls",
+         "description": description, "best_time": "October to March"},
+    ]))
+    return str(path)
+
+
+def test_in_place_update_changes_the_stamp(db, tmp_path):
+    load_catalog(db, write_catalog(tmp_path / "v1.json", "A waterfall"))
+    before = catalog_stamp(db)
+
+    # Same url: no row is added, only the content of the existing one differs
+    load_catalog(db, write_catalog(tmp_path / "v2.json", "A waterfall with a new trek"))
+    after = catalog_stamp(db)
+
+    assert after[0] == before[0]
+    assert after[1] == before[1] + 1
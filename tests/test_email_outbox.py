@@ -0,0 +1,144 @@
+import smtplib
+import socket
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.models.outbox import EmailOutbox
+from app.services.email_outbox import OutboxWorker, is_connection_error, is_permanent
+from app.services.email_service import EmailService, smtp_configured
+from smtp_sink import start_sink
+
+
+@pytest.fixture
+def outbox(db):
+    db.query(EmailOutbox).delete()
+    db.commit()
+    yield
+    db.query(EmailOutbox).delete()
+    db.commit()
+
+
+@pytest.fixture
+def sink(monkeypatch, outbox):
+    server = start_sink(port=0, reject_domain="rejected.example")
+    monkeypatch.setattr(settings, "SMTP_SERVER", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", server.server_address[1])
+    monkeypatch.setattr(settings, "SMTP_STARTTLS", False)
+    monkeypatch.setattr(settings, "SMTP_AUTH", False)
+    monkeypatch.setattr(settings, "SMTP_FROM", "packvote@localhost")
+    monkeypatch.setattr(settings, "EMAIL_RATE_PER_SECOND", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def enqueue(db, *emails):
+    rows = [EmailService.enqueue_invite(db, email, "Goa trip", "http://survey") for email in emails]
+    db.commit()
+    return [row.id for row in rows]
+
+
+def outbox_rows(db):
+    db.expire_all()
+    return {row.to_email: row for row in db.query(EmailOutbox)}
+
+
+def test_batch_goes_out_over_one_connection(db, sink):
+    from app.database import SessionLocal
+
+    enqueue(db, "a@ok.example", "b@ok.example", "c@ok.example")
+    worker = OutboxWorker(SessionLocal)
+    stats = worker.drain()
+    worker.connection.close()
+
+    assert stats["sent"] == 3
+    assert sink.delivered == 3
+    assert sink.connections == 1
+    assert all(row.status == "sent" and row.attempts == 1 for row in outbox_rows(db).values())
+
+
+def test_rejected_recipient_fails_without_retry(db, sink):
+    from app.database import SessionLocal
+
+    enqueue(db, "ok@ok.example", "nobody@rejected.example")
+    stats = OutboxWorker(SessionLocal).drain()
+
+    rows = outbox_rows(db)
+    assert stats == {"claimed": 2, "sent": 1, "retrying": 0, "failed": 1}
+    assert rows["ok@ok.example"].status == "sent"
+    rejected = rows["nobody@rejected.example"]
+    assert rejected.status == "failed"
+    assert rejected.attempts == 1
+    assert "550" in rejected.last_error
+
+
+def test_temporary_failure_is_retried_with_backoff(db, sink):
+    from app.database import SessionLocal
+
+    sink.fail_every = 2 # Second message gets 451
+    enqueue(db, "a@ok.example", "b@ok.example")
+    worker = OutboxWorker(SessionLocal)
+    stats = worker.drain_once()
+
+    retrying = outbox_rows(db)["b@ok.example"]
+    assert stats["sent"] == 1 and stats["retrying"] == 1
+    assert retrying.status == "pending"
+    assert retrying.attempts == 1
+    assert retrying.next_attempt_at > datetime.utcnow()
+
+    # Due again: goes out on the next round
+    sink.fail_every = 0
+    retrying.next_attempt_at = datetime.utcnow()
+    db.commit()
+    assert worker.drain_once()["sent"] == 1
+    assert outbox_rows(db)["b@ok.example"].status == "sent"
+    worker.connection.close()
+
+
+def test_unreachable_server_hands_the_batch_back(db, sink, monkeypatch):
+    from app.database import SessionLocal
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        closed_port = s.getsockname()[1]
+    monkeypatch.setattr(settings, "SMTP_PORT", closed_port)
+    enqueue(db, "a@ok.example", "b@ok.example", "c@ok.example")
+    stats = OutboxWorker(SessionLocal).drain_once()
+
+    rows = outbox_rows(db)
+    assert stats["retrying"] == 1 and stats["failed"] == 0
+    assert all(row.status == "pending" for row in rows.values())
+    # Only the row that hit the error spends an attempt
+    assert sorted(row.attempts for row in rows.values()) == [0, 0, 1]
+
+
+def test_missing_sender_keeps_invites_queued(db, sink, monkeypatch):
+    from app.database import SessionLocal
+
+    monkeypatch.setattr(settings, "SMTP_FROM", None)
+    enqueue(db, "a@ok.example")
+
+    assert not smtp_configured()
+    assert OutboxWorker(SessionLocal).drain()["claimed"] == 0
+    assert outbox_rows(db)["a@ok.example"].status == "pending"
+    assert sink.connections == 0
+
+
+@pytest.mark.parametrize("error, permanent, connection", [
+    (smtplib.SMTPRecipientsRefused({"x@y": (550, b"no")}), True, False),
+    (smtplib.SMTPSenderRefused(553, b"bad sender", "x@y"), True, False),
+    (smtplib.SMTPDataError(554, b"rejected"), True, False),
+    (smtplib.SMTPDataError(451, b"try later"), False, False),
+    (smtplib.SMTPAuthenticationError(535, b"bad login"), False, True),
+    (smtplib.SMTPServerDisconnected("gone"), False, True),
+    (ConnectionRefusedError(), False, True),
+    (socket.timeout(), False, True),
+    # Not SMTP or network: configuration or the message itself
+    (AttributeError("'NoneType' object has no attribute 'strip'"), True, False),
+    (UnicodeEncodeError("ascii", "é", 0, 1, "no"), True, False),
+])
+def test_error_classification(error, permanent, connection):
+    assert is_permanent(error) is permanent
+    assert is_connection_error(error) is connection
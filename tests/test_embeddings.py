@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.recommender.embeddings import EmbeddingIndex
+
+
+def place(place_id, name, description):
+    return SimpleNamespace(id=place_id, name=name, state="Kerala", best_time=None, description=description)
+
+
+PLACES = [
+    place(1, "Varkala", "cliff beach and surfing"),
+    place(2, "Munnar", "tea gardens in the hills"),
+    place(3, "Thekkady", "wildlife sanctuary and spice plantations"),
+]
+
+
+def test_write_streams_batches_and_appends_to_existing(tmp_path):
+    path = str(tmp_path / "embeddings")
+    index = EmbeddingIndex.write(iter(PLACES[:2]), path=path, batch_size=1)
+    assert index.place_ids.tolist() == [1, 2]
+
+    index = EmbeddingIndex.write(iter(PLACES), path=path, existing=index, batch_size=2)
+    assert index.place_ids.tolist() == [1, 2, 3]
+    ids, _ = index.search("tea hills", k=1)
+    assert ids.tolist() == [2]
+
+
+def test_places_added_after_the_build_are_scored(tmp_path):
+    path = str(tmp_path / "embeddings")
+    index = EmbeddingIndex.write(PLACES[:2], path=path)
+    fresh = place(4, "Kovalam", "beach resorts and surfing")
+    assert index.similarity("surfing beach", [4])[0] == 0
+
+    assert index.add_places([fresh, PLACES[0]]) == 1
+    scores = index.similarity("surfing beach", [1, 2, 4])
+    assert scores[2] > scores[1] and scores[0] > scores[1]
+    assert index.search("beach resorts", k=1)[0].tolist() == [4]
+
+    # The next write keeps the added rows
+    rewritten = EmbeddingIndex.write([], path=path, existing=index)
+    assert rewritten.place_ids.tolist() == [1, 2, 4]
+    assert np.allclose(rewritten.similarity("surfing beach", [1, 2, 4]), scores)
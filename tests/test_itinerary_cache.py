@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.services.itinerary_cache import ItineraryCache, ItineraryStore, itinerary_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ItineraryCache(ItineraryStore(str(tmp_path / "itineraries.db"), ttl_seconds=60), max_entries=2)
+
+
+def response(name, email, *answers):
+    return json.dumps(["2024-01-01", name, email, *answers])
+
+
+def test_key_ignores_identity_order_case_and_small_weather_changes():
+    a = [response("Asha", "asha@example.com", "Beaches", "Medium"), response("Ravi", "ravi@example.com", "Hills", "Low")]
+    b = [response("R", "r@example.com", " hills ", "low"), response("A", "a@example.com", "BEACHES", "medium")]
+    weather = {"avg_temp_c": 28.4, "total_precipitation": 110}
+    similar = {"avg_temp_c": 29.1, "total_precipitation": 104}
+
+    assert itinerary_key("plan", "Goa ", 3, a, weather) == itinerary_key("plan", "goa", 3, b, similar)
+    assert itinerary_key("plan", "Goa", 3, a, weather) != itinerary_key("plan", "Goa", 4, a, weather)
+    assert itinerary_key("plan", "Goa", 3, a, weather) != itinerary_key("markdown", "Goa", 3, a, weather)
+    assert itinerary_key("plan", "Goa", 3, "food, history") == itinerary_key("plan", "goa", 3, "History;food")
+
+
+def test_memory_then_store_hits(cache, tmp_path):
+    assert cache.get("a") is None
+    cache.put("a", {"plan": 1})
+    assert cache.get("a") == {"plan": 1}
+
+    # A fresh process only has the persistent tier
+    reopened = ItineraryCache(ItineraryStore(str(tmp_path / "itineraries.db"), ttl_seconds=60))
+    assert reopened.get("a") == {"plan": 1}
+    assert reopened.get("a") == {"plan": 1}
+    assert cache.counts["misses"] == 1 and cache.counts["memory_hits"] == 1
+    assert reopened.counts["store_hits"] == 1 and reopened.counts["memory_hits"] == 1
+
+
+def test_memory_tier_is_bounded(cache):
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+    assert cache.stats()["entries"] == 2
+    assert cache.get("a") == "a" # Evicted from memory, still in the store
+    assert cache.counts["store_hits"] == 1
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = ItineraryCache(ItineraryStore(str(tmp_path / "ttl.db"), ttl_seconds=-1))
+    cache.store.put("a", "old")
+    assert cache.get("a") is None
+
+
+def test_concurrent_misses_generate_once(cache):
+    calls = []
+    started = threading.Event()
+
+    def generate():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return {"days": 3}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_generate("k", generate))) for _ in range(8)]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"days": 3}] * 8
+    assert cache.counts["misses"] == 1
+    assert cache.counts["coalesced"] == 7
+    assert cache.get_or_generate("k", generate) == {"days": 3}
+    assert len(calls) == 1
+
+
+def test_concurrent_async_misses_generate_once(cache):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "plan"
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_generate("k", generate) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["plan"] * 5
+    assert len(calls) == 1
+    assert cache.counts["coalesced"] == 4
+
+
+def test_failures_are_shared_but_not_cached(cache):
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(1)
+        raise RuntimeError("model down")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get_or_generate("k", fail)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=call)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert errors == ["model down", "model down"]
+    assert cache.get_or_generate("k", lambda: "recovered") == "recovered"
+
+
+def test_cancelled_follower_leaves_the_others_waiting(cache):
+    async def generate():
+        await asyncio.sleep(0.2)
+        return "plan"
+
+    async def run():
+        leader = asyncio.ensure_future(cache.aget_or_generate("k", generate))
+        await asyncio.sleep(0.01)
+        followers = [asyncio.ensure_future(cache.aget_or_generate("k", generate)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        followers[0].cancel() # e.g. the client disconnected
+        return await asyncio.gather(leader, followers[1], followers[0], return_exceptions=True)
+
+    leader, follower, cancelled = asyncio.run(run())
+    assert (leader, follower) == ("plan", "plan")
+    assert isinstance(cancelled, asyncio.CancelledError)
+    assert cache.get("k") == "plan"
+
+
+def test_follower_timeout_does_not_cancel_the_leader(cache, monkeypatch):
+    from app.services import itinerary_cache as module
+
+    async def generate():
+        await asyncio.sleep(0.2)
+        return "plan"
+
+    async def run():
+        leader = asyncio.ensure_future(cache.aget_or_generate("k", generate))
+        await asyncio.sleep(0.01)
+        monkeypatch.setattr(module.settings, "GEMINI_TIMEOUT_SECONDS", 0.05)
+        follower = asyncio.ensure_future(cache.aget_or_generate("k", generate))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader, follower = asyncio.run(run())
+    assert leader == "plan"
+    assert isinstance(follower, asyncio.TimeoutError)
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Group, Participant
+from app.services.ai_itinerary import ItineraryService as MarkdownItineraryService
+from app.services.itinerary_cache import itinerary_cache
+from app.services.itinerary_client import DailyPlanStream, FakeItineraryModel
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager: startup hooks (warmup, workers) stay off
+    itinerary_cache.clear()
+    yield TestClient(app)
+    itinerary_cache.clear()
+
+
+def sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_itinerary_stream_sends_chunks_then_the_full_text(client):
+    request = {"place_name": "Hampi", "duration": 3, "preferences": "history, food"}
+    response = client.post("/api/v1/itinerary/stream", json=request)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    chunks = [data["text"] for event, data in events if event == "chunk"]
+    assert len(chunks) > 1 # Streamed, not one blob
+    assert events[-1][0] == "done"
+
+    expected = FakeItineraryModel.respond(MarkdownItineraryService.prompt("Hampi", 3, "history, food"))
+    assert "".join(chunks) == expected
+    assert events[-1][1]["itinerary"] == expected
+    assert "## Day 3" in expected
+
+
+def test_itinerary_stream_replays_a_cached_plan(client):
+    request = {"place_name": "Coorg", "duration": 2, "preferences": "coffee"}
+    first = sse_events(client.post("/api/v1/itinerary/stream", json=request).text)
+    second = sse_events(client.post("/api/v1/itinerary/stream", json=request).text)
+
+    assert second[-1] == first[-1]
+    assert [event for event, _ in second] == ["chunk", "done"]
+    assert itinerary_cache.stats()["memory_hits"] >= 1
+
+
+def test_concurrent_streams_share_one_model_call(client, monkeypatch):
+    service = MarkdownItineraryService()
+    calls = []
+    astream = service.client.astream
+
+    def counting_astream(prompt):
+        calls.append(prompt)
+        return astream(prompt)
+
+    monkeypatch.setattr(service.client, "astream", counting_astream)
+
+    async def read():
+        return "".join([chunk async for chunk in service.stream_itinerary("Pondicherry", 2, "cafes")])
+
+    async def both():
+        return await asyncio.gather(read(), read())
+
+    coalesced = itinerary_cache.stats()["coalesced"]
+    leader, follower = asyncio.run(both())
+
+    assert len(calls) == 1
+    assert leader == follower == FakeItineraryModel.respond(MarkdownItineraryService.prompt("Pondicherry", 2, "cafes"))
+    assert itinerary_cache.stats()["coalesced"] == coalesced + 1
+
+def test_group_itinerary_stream_sends_each_day(client, db):
+    group_id = str(uuid.uuid4())
+    db.add(Group(id=group_id, name="Stream test", duration=4))
+    row = json.dumps(["2024-01-01", "Asha", "asha@example.com", "Beaches", "Medium", "March", ""])
+    db.add(Participant(id=str(uuid.uuid4()), group_id=group_id, email="asha@example.com", preferences=row))
+    db.commit()
+
+    response = client.post(f"/api/v1/groups/{group_id}/itinerary/stream",
+                           json={"destination": "Gokarna", "weather_summary": "{}"})
+
+    events = sse_events(response.text)
+    kinds = [event for event, _ in events]
+    assert kinds == ["meta", "day", "day", "day", "day", "done"]
+    assert events[0][1]["title"] == "Trip to Gokarna"
+    assert [data["day"] for event, data in events if event == "day"] == [1, 2, 3, 4]
+    plan = events[-1][1]
+    assert [day["day"] for day in plan["daily_plan"]] == [1, 2, 3, 4]
+
+
+def test_group_itinerary_stream_unknown_group(client):
+    response = client.post("/api/v1/groups/missing/itinerary/stream", json={"destination": "Goa"})
+    assert response.status_code == 404
+
+
+def test_daily_plan_stream_reports_days_before_the_document_ends():
+    text = FakeItineraryModel.respond("Create a 3-day trip to Ooty. Respond in JSON.")
+    reader = DailyPlanStream()
+    seen_at = []
+    for i, char in enumerate(text):
+        for event, data in reader.feed(char):
+            seen_at.append((event, data.get("day"), i))
+
+    assert [(event, day) for event, day, _ in seen_at] == [("meta", None), ("day", 1), ("day", 2), ("day", 3)]
+    # The last day is out before packing_tips has streamed
+    assert seen_at[-1][2] < text.index("packing_tips")
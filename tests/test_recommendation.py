@@ -0,0 +1,104 @@
+import time
+
+from app.config import settings
+from app.models import Place
+from app.recommender import enrichment
+from app.services.recommendation import RecommendationService
+
+
+class SlowEnricher:
+    """Never finds weather; each lookup uses up its whole deadline (at most 0.2s)."""
+
+    def __init__(self):
+        self.deadlines = []
+
+    def enrich(self, coords, year, month, deadline=None):
+        self.deadlines.append(deadline)
+        time.sleep(min(deadline, 0.2))
+        return [None] * len(coords)
+
+
+def test_batches_share_one_weather_deadline(db, monkeypatch):
+    db.add_all([
+        Place(name=f"Deadline {i}", state="Deadline", url=f"https://example.com/deadline/{i}",
+              description="hill fort", latitude=18.5 + i / 100, longitude=73.8)
+        for i in range(8)
+    ])
+    db.commit()
+    enricher = SlowEnricher()
+    monkeypatch.setattr(enrichment, "get_weather_enricher", lambda: enricher)
+    monkeypatch.setattr(settings, "WEATHER_DEADLINE_SECONDS", 0.3)
+
+    service = RecommendationService(db)
+    query = db.query(Place).filter(Place.state == "Deadline").order_by(Place.id)
+    prefs = {"travel_month": "December", "start_city": "Mumbai", "combined_text": "fort", "max_distance_km": None}
+    start = time.monotonic()
+    batches = list(service.rank_in_batches(query, prefs, limit=5, batch_size=2))
+    elapsed = time.monotonic() - start
+
+    assert len(batches) == 4
+    assert len(batches[-1][1]) == 5
+    assert enricher.deadlines[0] <= 0.3
+    assert enricher.deadlines[2:] == [0.0, 0.0]
+    assert elapsed < 0.3 + 0.2 # One deadline in total, not one per batch
+    assert service.weather_complete is False
+
+
+class LiveEnricher:
+    """Live lookups return a 15-day window with 150 mm of rain (10 mm/day)."""
+
+    def enrich(self, coords, year, month, deadline=None):
+        import numpy as np
+        from app.services.weather_service import WeatherService
+
+        bulk = {
+            "avg_max_temp": np.full(len(coords), 30.0),
+            "avg_min_temp": np.full(len(coords), 20.0),
+            "total_precipitation": np.full(len(coords), 150.0),
+            "precipitation_mm_per_day": np.full(len(coords), 10.0),
+        }
+        return [WeatherService.summary_at(bulk, i) for i in range(len(coords))]
+
+
+def test_climatology_and_live_rain_are_scored_per_day(db, monkeypatch):
+    climate = {"max_temp": [30.0] * 12, "min_temp": [20.0] * 12, "precipitation": [310.0] * 12}
+    monthly = Place(name="Monthly", state="Rain", url="https://example.com/rain/monthly",
+                    latitude=18.6, longitude=73.8, weather_cache=climate)
+    live = Place(name="Live", state="Rain", url="https://example.com/rain/live", latitude=18.7, longitude=73.8)
+    db.add_all([monthly, live])
+    db.commit()
+    monkeypatch.setattr(enrichment, "get_weather_enricher", lambda: LiveEnricher())
+
+    prefs = {"travel_month": "December", "start_city": "Mumbai", "combined_text": "", "max_distance_km": None}
+    ranked = RecommendationService(db).rank_places([monthly, live], prefs)
+
+    # 310 mm in December and 150 mm over 15 days are both 10 mm/day
+    assert {p.name: p.weather_summary["precipitation_mm_per_day"] for p in ranked} == {"Monthly": 10.0, "Live": 10.0}
+    assert [p.score_breakdown["weather"]["value"] for p in ranked] == [0.6, 0.6]
+
+
+class NoWeather:
+    def enrich(self, coords, year, month, deadline=None):
+        return [None] * len(coords)
+
+
+def test_stream_ranked_sends_at_most_limit_places(db, monkeypatch):
+    import json
+    from app.api import routes
+
+    db.add_all([
+        Place(name=f"Stream {i}", state="Streamed", url=f"https://example.com/stream/{i}",
+              description="hill fort" if i == 1 else "beach", latitude=15.0, longitude=74.0)
+        for i in range(5)
+    ])
+    db.commit()
+    monkeypatch.setattr(enrichment, "get_weather_enricher", lambda: NoWeather())
+    monkeypatch.setattr(routes, "STREAM_BATCH_SIZE", 2)
+
+    filters = {"preferred_states": ["Streamed"], "columns": routes.RANK_COLUMNS}
+    lines = [json.loads(line) for line in routes.stream_ranked(filters, {"combined_text": "fort"}, 1)]
+    places = [line["place"]["id"] for line in lines if line["event"] == "place"]
+
+    # The second ranked row only makes the cursor
+    assert places == lines[-1]["order"]
+    assert lines[-1]["next_cursor"] is not None
@@ -0,0 +1,103 @@
+import json
+import uuid
+
+import pytest
+
+from app.models import Group, Participant, SheetSyncPending
+from app.services import sheet_sync
+from app.services.sheet_sync import SheetSyncService
+
+
+def response(email, activity="Beaches"):
+    return ["2024-01-01 10:00:00", "Name", email, activity, "20000", "March"]
+
+
+class FakeSheet:
+    def __init__(self):
+        self.rows = []
+
+    def fetch(self, start_row):
+        return self.rows[start_row - sheet_sync.FIRST_DATA_ROW:]
+
+
+@pytest.fixture
+def sheet(monkeypatch, db):
+    db.query(SheetSyncPending).delete()
+    db.commit()
+    fake = FakeSheet()
+    monkeypatch.setattr(sheet_sync, "load_credentials", lambda: object())
+    monkeypatch.setattr(SheetSyncService, "fetch_rows", lambda self, start_row: fake.fetch(start_row))
+    return fake
+
+
+def add_group(db, *emails):
+    group_id = str(uuid.uuid4())
+    db.add(Group(id=group_id, name="Sync test"))
+    for email in emails:
+        db.add(Participant(id=str(uuid.uuid4()), group_id=group_id, email=email))
+    db.commit()
+    return group_id
+
+
+def add_participant(db, group_id, email):
+    db.add(Participant(id=str(uuid.uuid4()), group_id=group_id, email=email))
+    db.commit()
+
+
+def test_unmatched_rows_are_retried_after_the_watermark_passes_them(db, sheet):
+    group_id = add_group(db, "asha@example.com")
+    sheet.rows = [response("asha@example.com"), response("late@example.com", "Hills")]
+
+    first = SheetSyncService(db).sync_responses(group_id)
+    assert (first["synced"], first["unmatched"], first["pending"], first["last_row"]) == (1, 1, 1, 3)
+
+    # The organizer adds the participant after they answered the form
+    add_participant(db, group_id, "Late@example.com")
+    second = SheetSyncService(db).sync_responses(group_id)
+
+    assert (second["read"], second["retried"], second["synced"], second["pending"]) == (0, 1, 1, 0)
+    late = db.query(Participant).filter_by(group_id=group_id, email="Late@example.com").one()
+    assert late.has_responded and json.loads(late.preferences)[3] == "Hills"
+    assert db.query(SheetSyncPending).count() == 0
+
+
+def test_sync_all_retries_unmatched_rows(db, sheet, monkeypatch):
+    monkeypatch.setattr(sheet_sync.settings, "SHEETS_GROUP_ID_COLUMN", "H")
+    group_id = add_group(db, "ravi@example.com")
+    sheet.rows = [response("ravi@example.com") + [group_id], response("new@example.com") + [group_id]]
+
+    first = SheetSyncService(db).sync_all()
+    assert (first["synced"], first["unmatched"], first["pending"]) == (1, 1, 1)
+
+    sheet.rows.append(response("ravi@example.com", "Temples") + [group_id])
+    add_participant(db, group_id, "new@example.com")
+    second = SheetSyncService(db).sync_all()
+    assert (second["read"], second["retried"], second["synced"], second["pending"]) == (1, 1, 2, 0)
+
+
+def test_expired_unmatched_rows_are_dropped(db, sheet, monkeypatch):
+    group_id = add_group(db)
+    sheet.rows = [response("nobody@example.com")]
+    assert SheetSyncService(db).sync_responses(group_id)["pending"] == 1
+
+    monkeypatch.setattr(sheet_sync.settings, "SHEETS_UNMATCHED_RETRY_DAYS", 0)
+    stats = SheetSyncService(db).sync_responses(group_id)
+    assert (stats["retried"], stats["pending"]) == (0, 0)
+
+
+def test_unmatched_rows_are_kept_once_across_groups(db, sheet):
+    first_group = add_group(db, "asha@example.com")
+    second_group = add_group(db, "ravi@example.com")
+    sheet.rows = [response("asha@example.com"), response("ravi@example.com"), response("meera@example.com")]
+
+    SheetSyncService(db).sync_responses(first_group)
+    stats = SheetSyncService(db).sync_responses(second_group)
+    assert (stats["synced"], stats["unmatched"], stats["pending"]) == (1, 2, 1)
+    assert SheetSyncService(db).sync_all()["pending"] == 1
+    assert db.query(SheetSyncPending).count() == 1
+
+    # sync_all has passed the row too, and picks it up once its participant exists
+    add_participant(db, second_group, "meera@example.com")
+    retry = SheetSyncService(db).sync_all()
+    assert (retry["read"], retry["retried"], retry["synced"], retry["pending"]) == (0, 1, 1, 0)
+    assert db.query(SheetSyncPending).count() == 0
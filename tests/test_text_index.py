@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+from app.recommender import text_index
+from app.recommender.result_cache import catalog_version
+from app.recommender.text_index import CatalogTextIndex, get_catalog_index
+
+
+def place(place_id, name, description):
+    return SimpleNamespace(id=place_id, name=name, state="Kerala", best_time=None, description=description)
+
+
+def test_index_saved_by_another_process_is_reloaded():
+    CatalogTextIndex.build([place(1, "Varkala", "cliff beach")]).save()
+    assert len(get_catalog_index()) == 1
+    version = catalog_version()
+
+    # Written by e.g. scripts/load_places.py in another process
+    CatalogTextIndex.build([place(1, "Varkala", "cliff beach"), place(2, "Munnar", "tea hills")]).save()
+    index = get_catalog_index()
+
+    assert len(index) == 2 and 2 in index
+    assert catalog_version() > version
+    assert get_catalog_index() is index # Unchanged file, no reload
+
+
+def test_own_updates_are_not_reloaded():
+    CatalogTextIndex.build([place(1, "Varkala", "cliff beach")]).save()
+    index = get_catalog_index()
+    text_index.update_catalog_index(None, [place(3, "Alleppey", "beach backwaters")])
+    assert get_catalog_index() is index
+    assert 3 in index
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+
+from app.recommender.enrichment import WeatherEnricher
+
+
+class FakeArchive:
+    """Bulk lookups that count calls; after `failing_after` calls every location fails."""
+
+    def __init__(self, failing_after=None):
+        self.calls = 0
+        self.failing_after = failing_after
+
+    def __call__(self, coords, year, month):
+        self.calls += 1
+        value = np.nan if self.failing_after is not None and self.calls > self.failing_after else 1.0
+        column = np.full(len(coords), value)
+        return {"avg_max_temp": column, "avg_min_temp": column,
+                "total_precipitation": column, "precipitation_mm_per_day": column}
+
+
+def test_cache_keeps_only_the_most_recent_locations():
+    archive = FakeArchive()
+    enricher = WeatherEnricher(fetch_bulk=archive, chunk_size=1, max_entries=2)
+    coords = [(10.0, 76.0), (11.0, 76.0), (12.0, 76.0)]
+
+    enricher.enrich(coords[:2], 2024, 1, deadline=5)
+    enricher.enrich(coords[:1], 2024, 1, deadline=5) # Hit: first location is now most recent
+    enricher.enrich(coords[2:], 2024, 1, deadline=5)
+    assert archive.calls == 3
+
+    assert all(enricher.enrich([coords[0], coords[2]], 2024, 1, deadline=5))
+    assert archive.calls == 3
+    enricher.enrich([coords[1]], 2024, 1, deadline=5) # Was evicted
+    assert archive.calls == 4
+
+
+def test_expired_entries_are_served_for_one_more_ttl():
+    archive = FakeArchive(failing_after=1)
+    enricher = WeatherEnricher(fetch_bulk=archive, ttl_seconds=0.2, retries=0)
+    coords = [(10.0, 76.0)]
+
+    assert enricher.enrich(coords, 2024, 1, deadline=5)[0] is not None
+    time.sleep(0.25)
+    # Stale: served while a (failing) refresh runs
+    assert enricher.enrich(coords, 2024, 1, deadline=5)[0] is not None
+    time.sleep(0.2)
+    # Past twice the TTL: dropped and looked up again
+    assert enricher.enrich(coords, 2024, 1, deadline=5)[0] is None